@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Moteur de sondes asyncio (connexions TCP et écho ICMP)
+Scan de ports par connexion et mesure de latence sans processus externe
+"""
+
+import asyncio
+import errno
+import ipaddress
+import itertools
+import os
+import socket
+import struct
+import time
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+# Erreurs de connexion qui signifient « pas de réponse » plutôt que « fermé »
+UNREACHABLE_ERRNOS = {errno.EHOSTUNREACH, errno.ENETUNREACH, errno.EHOSTDOWN, errno.ETIMEDOUT}
+
+_icmp_sequence = itertools.count(1)
+
+
+def expand_targets(target: str) -> Iterable[str]:
+    """
+    Adresses d'une cible: CIDR, adresse seule, ou liste séparée par des espaces
+    
+    Les adresses réseau et de broadcast d'un CIDR ne sont pas sondées.
+    
+    Raises:
+        ValueError: cible non reconnue (plage nmap, nom d'hôte)
+    """
+    for token in target.split():
+        network = ipaddress.ip_network(token, strict=False)
+        for address in network.hosts():
+            yield str(address)
+
+
+def parse_ports(ports: str) -> List[int]:
+    """
+    Ports d'une liste au format nmap simple ("22,80,8000-8010")
+    
+    Raises:
+        ValueError: port ou plage invalide
+    """
+    parsed = set()
+    for token in ports.replace(' ', '').split(','):
+        if not token:
+            continue
+        first, _, last = token.partition('-')
+        start, end = int(first), int(last or first)
+        if not 0 < start <= end <= 65535:
+            raise ValueError(f"Plage de ports invalide: {token}")
+        parsed.update(range(start, end + 1))
+    return sorted(parsed)
+
+
+def service_name(port: int) -> str:
+    """Nom usuel du service d'un port TCP (base locale /etc/services)"""
+    try:
+        return socket.getservbyport(port, 'tcp')
+    except OSError:
+        return "unknown"
+
+
+def _icmp_checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def _icmp_packet(identifier: int, sequence: int) -> bytes:
+    payload = struct.pack('!d', time.time()).ljust(16, b'\0')
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = _icmp_checksum(header + payload)
+    return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence) + payload
+
+
+class _HostLimiter:
+    """Connexions simultanées et débit (connexions par seconde) vers un même hôte"""
+    
+    def __init__(self, concurrency: int, rate: float):
+        self._slots = asyncio.Semaphore(max(concurrency, 1))
+        self._interval = 1 / rate if rate else 0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def __aenter__(self):
+        await self._slots.acquire()
+        if not self._interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self._interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+    
+    async def __aexit__(self, *exc_info):
+        self._slots.release()
+
+
+class AsyncProbeEngine:
+    """
+    Sondes réseau concurrentes dans une boucle asyncio
+    
+    - concurrency: sondes en vol au total
+    - host_concurrency / host_rate: sondes simultanées et sondes par seconde
+      vers un même hôte (0: pas de limite de débit)
+    - timeout / retries: délai d'une sonde et nouvelles tentatives sans réponse
+    - resolve_names: nom DNS inverse des hôtes actifs
+    """
+    
+    def __init__(self, concurrency: int = 256, host_concurrency: int = 4, host_rate: float = 0,
+                 timeout: float = 1.0, retries: int = 1, icmp: bool = True,
+                 resolve_names: bool = True):
+        self.concurrency = max(concurrency, 1)
+        self.host_concurrency = host_concurrency
+        self.host_rate = host_rate
+        self.timeout = timeout
+        self.retries = retries
+        self.icmp = icmp
+        self.resolve_names = resolve_names
+        # Type de socket ICMP utilisable: None (à tester), SOCK_DGRAM, SOCK_RAW ou False
+        self._icmp_socket_type = None
+        self._slots = None
+    
+    def _open_icmp_socket(self) -> Optional[socket.socket]:
+        """Socket d'écho ICMP: sans privilège (ping_group_range) ou brute (CAP_NET_RAW)"""
+        candidates = [self._icmp_socket_type] if self._icmp_socket_type else [socket.SOCK_DGRAM, socket.SOCK_RAW]
+        for socket_type in candidates:
+            try:
+                sock = socket.socket(socket.AF_INET, socket_type, socket.IPPROTO_ICMP)
+            except OSError:
+                continue
+            self._icmp_socket_type = socket_type
+            sock.setblocking(False)
+            return sock
+        self._icmp_socket_type = False
+        return None
+    
+    @property
+    def icmp_available(self) -> bool:
+        """Vrai si l'écho ICMP est utilisable (testé à la première sonde)"""
+        if self._icmp_socket_type is None:
+            sock = self._open_icmp_socket()
+            if sock is not None:
+                sock.close()
+        return bool(self._icmp_socket_type)
+    
+    async def icmp_echo(self, address: str, timeout: float = None) -> Optional[float]:
+        """
+        Écho ICMP vers une adresse IPv4
+        
+        Returns:
+            Temps aller-retour en ms, ou None sans réponse (ou ICMP indisponible)
+        """
+        if not self.icmp or self._icmp_socket_type is False or ':' in address:
+            return None
+        sock = self._open_icmp_socket()
+        if sock is None:
+            return None
+        
+        loop = asyncio.get_running_loop()
+        sequence = next(_icmp_sequence) & 0xffff
+        # Avec une socket SOCK_DGRAM, le noyau impose son propre identifiant
+        identifier = os.getpid() & 0xffff
+        deadline = loop.time() + (timeout or self.timeout)
+        
+        try:
+            async with self._slot():
+                started = time.perf_counter()
+                await loop.sock_sendto(sock, _icmp_packet(identifier, sequence), (address, 0))
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        return None
+                    data, source = await asyncio.wait_for(loop.sock_recvfrom(sock, 2048), remaining)
+                    if self._icmp_socket_type == socket.SOCK_RAW:
+                        data = data[(data[0] & 0x0f) * 4:]  # En-tête IP
+                    if len(data) < 8 or source[0] != address:
+                        continue
+                    reply_type, _, _, _, reply_sequence = struct.unpack('!BBHHH', data[:8])
+                    if reply_type == ICMP_ECHO_REPLY and reply_sequence == sequence:
+                        return round((time.perf_counter() - started) * 1000, 3)
+        except (asyncio.TimeoutError, OSError):
+            return None
+        finally:
+            sock.close()
+    
+    def _slot(self) -> asyncio.Semaphore:
+        # Un sémaphore par boucle: un moteur peut servir à plusieurs asyncio.run
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots[0] is not loop:
+            self._slots = (loop, asyncio.Semaphore(self.concurrency))
+        return self._slots[1]
+    
+    async def tcp_connect(self, address: str, port: int, timeout: float = None):
+        """
+        Tentative de connexion TCP
+        
+        Returns:
+            (état, temps aller-retour en ms): 'open' (connexion acceptée),
+            'closed' (refusée, l'hôte a répondu) ou 'filtered' (pas de réponse)
+        """
+        loop = asyncio.get_running_loop()
+        family = socket.AF_INET6 if ':' in address else socket.AF_INET
+        
+        for _ in range(self.retries + 1):
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            # Fermeture par RST: pas de TIME_WAIT accumulés côté scanner
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            try:
+                async with self._slot():
+                    started = time.perf_counter()
+                    await asyncio.wait_for(
+                        loop.sock_connect(sock, (address, port)), timeout or self.timeout
+                    )
+                    return 'open', round((time.perf_counter() - started) * 1000, 3)
+            except ConnectionRefusedError:
+                return 'closed', round((time.perf_counter() - started) * 1000, 3)
+            except asyncio.TimeoutError:
+                continue
+            except OSError as e:
+                if e.errno not in UNREACHABLE_ERRNOS:
+                    return 'filtered', None
+            finally:
+                sock.close()
+        return 'filtered', None
+    
+    async def measure_rtt(self, address: str, port: int = None, count: int = 4,
+                          interval: float = 0.2) -> List[Optional[float]]:
+        """Série de mesures de latence (écho ICMP, ou connexion TCP si port donné)"""
+        samples = []
+        for index in range(count):
+            if port is None:
+                samples.append(await self.icmp_echo(address))
+            else:
+                state, rtt = await self.tcp_connect(address, port)
+                samples.append(rtt if state != 'filtered' else None)
+            if index < count - 1:
+                await asyncio.sleep(interval)
+        return samples
+    
+    async def probe_host(self, address: str, ports: List[int], discovery: bool = False,
+                         assume_up: bool = False) -> Optional[Dict]:
+        """
+        Sonde un hôte
+        
+        En découverte, l'hôte est actif dès la première réponse (écho ICMP ou
+        connexion acceptée/refusée) et ses ports ne sont pas relevés. Sinon,
+        tous les ports sont testés; sans assume_up, un hôte qui ne répond sur
+        aucun port est considéré inactif.
+        
+        Returns:
+            Hôte au format du rapport, ou None s'il est inactif
+        """
+        limiter = _HostLimiter(self.host_concurrency, self.host_rate)
+        
+        async def connect(port):
+            async with limiter:
+                return port, await self.tcp_connect(address, port)
+        
+        if discovery:
+            probes = [asyncio.ensure_future(connect(port)) for port in ports]
+            if self.icmp:
+                probes.append(asyncio.ensure_future(self.icmp_echo(address)))
+            try:
+                for probe in asyncio.as_completed(probes):
+                    result = await probe
+                    if isinstance(result, tuple):
+                        answered = result[1][0] != 'filtered'
+                    else:
+                        answered = result is not None  # Écho ICMP
+                    if answered:
+                        return self._host_record(address, await self._hostname(address), [])
+                return None
+            finally:
+                for probe in probes:
+                    probe.cancel()
+        
+        results = await asyncio.gather(*(connect(port) for port in ports))
+        if not assume_up and all(state == 'filtered' for _, (state, _) in results):
+            return None
+        return self._host_record(address, await self._hostname(address), [
+            {
+                "port": port,
+                "state": state,
+                "service": service_name(port),
+                "version": "",
+                "product": ""
+            }
+            for port, (state, _) in sorted(results)
+        ])
+    
+    async def _hostname(self, address: str) -> str:
+        """Nom DNS inverse (PTR), "Unknown" sans réponse dans le délai"""
+        if not self.resolve_names:
+            return "Unknown"
+        loop = asyncio.get_running_loop()
+        try:
+            name, _ = await asyncio.wait_for(
+                loop.getnameinfo((address, 0), socket.NI_NAMEREQD), self.timeout
+            )
+            return name
+        except (asyncio.TimeoutError, OSError):
+            return "Unknown"
+    
+    @staticmethod
+    def _host_record(address: str, hostname: str, ports: List[Dict]) -> Dict:
+        return {
+            "ip": address,
+            "hostname": hostname,
+            "state": "up",
+            "mac_address": "Unknown",
+            "vendor": "Unknown",
+            "os": {"name": "Unknown", "accuracy": 0},
+            "ports": ports
+        }
+    
+    async def scan(self, addresses: Iterable[str], ports: List[int], discovery: bool = False,
+                   assume_up: bool = False) -> AsyncIterator[Dict]:
+        """
+        Sonde des adresses et produit les hôtes actifs au fur et à mesure
+        
+        Les hôtes en cours sont bornés pour que la file des sondes reste
+        pleine sans créer une tâche par adresse d'une grande plage.
+        """
+        per_host = max(min(len(ports), self.host_concurrency), 1)
+        host_slots = max(self.concurrency // per_host, 1)
+        pending = set()
+        
+        async def drain(wait_for):
+            nonlocal pending
+            done, pending = await asyncio.wait(pending, return_when=wait_for)
+            return [task.result() for task in done if task.result() is not None]
+        
+        for address in addresses:
+            pending.add(asyncio.ensure_future(self.probe_host(address, ports, discovery, assume_up)))
+            if len(pending) >= host_slots:
+                for host in await drain(asyncio.FIRST_COMPLETED):
+                    yield host
+        
+        while pending:
+            for host in await drain(asyncio.FIRST_COMPLETED):
+                yield host
+    
+    def run(self, addresses: Iterable[str], ports: List[int], discovery: bool = False,
+            assume_up: bool = False, on_host: Callable[[Dict], None] = None) -> List[Dict]:
+        """Version bloquante de scan (nouvelle boucle asyncio), on_host appelé par hôte"""
+        async def collect():
+            hosts = []
+            async for host in self.scan(addresses, ports, discovery, assume_up):
+                hosts.append(host)
+                if on_host is not None:
+                    on_host(host)
+            return hosts
+        
+        return asyncio.run(collect())
+
+
+def read_arp_table(path: str = "/proc/net/arp") -> Dict[str, str]:
+    """Adresses MAC connues du noyau (Linux), remplies par les sondes du réseau local"""
+    table = {}
+    try:
+        with open(path, 'r') as f:
+            next(f, None)
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 4 and fields[3] != "00:00:00:00:00:00":
+                    table[fields[0]] = fields[3].upper()
+    except OSError:
+        pass
+    return table
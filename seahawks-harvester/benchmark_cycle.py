@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark du surcoût d'un cycle du service Harvester
+Ancien service (un processus « python harvester.py » par scan) contre le
+service en un seul processus (HarvesterDaemon), sur un scan minimal
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from report_stream import load_latest_report
+from run_with_nester import HarvesterDaemon
+
+
+HARVESTER_SCRIPT = Path(__file__).resolve().parent / "harvester.py"
+
+
+def write_config(directory: Path, backend: str) -> Path:
+    """Configuration d'un scan minimal (une adresse locale, un port), sans Nester"""
+    config = {
+        "franchise_id": "benchmark",
+        "franchise_name": "Benchmark",
+        "scan_network": "127.0.0.1/32",
+        "scan_ports": "9",
+        "scanner_backend": backend,
+        "probe_icmp": False,
+        "probe_resolve_names": False,
+        "version_detection": False,
+        "fingerprint_cache_ttl": 0,
+        "report_dir": str(directory / "reports"),
+        "log_dir": str(directory / "logs")
+    }
+    path = directory / "config.json"
+    with open(path, 'w') as f:
+        json.dump(config, f)
+    return path
+
+
+def subprocess_cycles(directory: Path, cycles: int) -> list:
+    """Surcoût (s) par cycle de l'ancien service: durée du processus moins celle du scan"""
+    overheads = []
+    for _ in range(cycles):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(HARVESTER_SCRIPT)], cwd=directory,
+            capture_output=True, check=True
+        )
+        total = time.perf_counter() - started
+        report = load_latest_report(directory / "reports")
+        overheads.append(total - report['scan_duration_seconds'])
+    return overheads
+
+
+def daemon_cycles(config_path: Path, cycles: int) -> list:
+    """Surcoût (s) par cycle du service en un seul processus"""
+    daemon = HarvesterDaemon(str(config_path))
+    return [daemon.run_cycle()['overhead'] for _ in range(cycles)]
+
+
+def describe(overheads: list) -> str:
+    milliseconds = [overhead * 1000 for overhead in overheads]
+    return (
+        f"médiane {statistics.median(milliseconds):7.1f} ms  "
+        f"min {min(milliseconds):7.1f} ms  max {max(milliseconds):7.1f} ms"
+    )
+
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark du surcoût d'un cycle du service")
+    parser.add_argument("--cycles", type=int, default=10, help="Cycles mesurés par mode")
+    parser.add_argument(
+        "--backend", choices=["asyncio", "nmap"], default="asyncio",
+        help="Backend du scan minimal (asyncio: sans binaire nmap)"
+    )
+    args = parser.parse_args()
+    
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        config_path = write_config(directory, args.backend)
+        
+        before = subprocess_cycles(directory, args.cycles)
+        after = daemon_cycles(config_path, args.cycles)
+    
+    print(f"Surcoût par cycle ({args.cycles} cycles, scan minimal {args.backend})")
+    print(f"  processus par scan   {describe(before)}")
+    print(f"  service persistant   {describe(after)}")
+    print(f"  gain                 x{statistics.median(before) / max(statistics.median(after), 1e-6):.0f}")
+
+
+if __name__ == "__main__":
+    main()
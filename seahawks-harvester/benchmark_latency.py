@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Banc de test de la mesure de latence WAN, contre des répondeurs locaux
+Vérifie les statistiques (percentiles, gigue, perte), la méthode de
+mesure et la mémoire de la surveillance continue, puis la durée d'un scan
+avec et sans mesure simultanée
+"""
+
+import argparse
+import socket
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from async_scanner import AsyncProbeEngine
+from wan_latency import WanLatencyProber, latency_stats
+from wan_monitor import WanMonitor
+
+
+def check(label: str, condition: bool, detail: str = "") -> bool:
+    print(f"  {'OK   ' if condition else 'ÉCHEC'} {label}{f'  ({detail})' if detail else ''}")
+    return condition
+
+
+def check_statistics() -> bool:
+    """Série connue: 8 réponses sur 10"""
+    stats = latency_stats([10.0, 12.0, None, 11.0, 30.0, 10.0, None, 13.0, 12.0, 14.0])
+    return all([
+        check("perte", stats['loss_percent'] == 20.0, f"{stats['loss_percent']}%"),
+        check("moyenne", stats['mean_ms'] == 14.0, f"{stats['mean_ms']} ms"),
+        check("médiane", stats['p50_ms'] == 12.0, f"{stats['p50_ms']} ms"),
+        check("p95 / p99", (stats['p95_ms'], stats['p99_ms']) == (24.4, 28.88),
+              f"{stats['p95_ms']} / {stats['p99_ms']} ms"),
+        check("gigue", stats['jitter_ms'] == 6.86, f"{stats['jitter_ms']} ms"),
+        check("sans réponse", latency_stats([None, None])['mean_ms'] is None)
+    ])
+
+
+def tcp_responder(backlog_full: bool = False):
+    """
+    Répondeur TCP local: accepte les connexions, ou les ignore toutes
+    (file d'attente pleine, les SYN sont perdus) si backlog_full
+    """
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(0 if backlog_full else 128)
+    held = []
+    if backlog_full:
+        client = socket.socket()
+        client.connect(server.getsockname())
+        held.append(client)
+    return server, held
+
+
+def check_probes(count: int, timeout: float) -> bool:
+    server, _ = tcp_responder()
+    lossy, held = tcp_responder(backlog_full=True)
+    port, lossy_port = server.getsockname()[1], lossy.getsockname()[1]
+    
+    def prober(tcp_port, icmp=False):
+        engine = AsyncProbeEngine(timeout=timeout, retries=0, icmp=icmp, resolve_names=False)
+        return WanLatencyProber(engine, count=count, interval=0.01, tcp_port=tcp_port)
+    
+    try:
+        answered = prober(port).run("127.0.0.1")
+        lost = prober(lossy_port).run("127.0.0.1")
+        ok = all([
+            check("TCP, répondeur actif", answered['received'] == count and answered['method'] == f"tcp:{port}",
+                  f"{answered['received']}/{count}, p50 {answered['p50_ms']} ms"),
+            check("TCP, SYN perdus", lost['loss_percent'] == 100.0 and lost['mean_ms'] is None,
+                  f"perte {lost['loss_percent']}%")
+        ])
+    finally:
+        for sock in [server, lossy, *held]:
+            sock.close()
+    
+    icmp_prober = prober(9, icmp=True)
+    if icmp_prober.engine.icmp_available:
+        echo = icmp_prober.run("127.0.0.1")
+        ok &= check("écho ICMP", echo['method'] == "icmp" and echo['received'] == count,
+                    f"{echo['received']}/{count}, p50 {echo['p50_ms']} ms")
+    else:
+        print("  --    écho ICMP indisponible (ni ping_group_range ni CAP_NET_RAW)")
+    return ok
+
+
+def check_monitor(seconds: float, capacity: int, timeout: float) -> bool:
+    """Surveillance accélérée (100 tours/s): tampon plein, mémoire constante"""
+    server, _ = tcp_responder()
+    monitor = WanMonitor(
+        ["127.0.0.1", "localhost", "127.0.0.2"], interval=0.01, capacity=capacity,
+        summary_seconds=seconds / 4, tcp_port=server.getsockname()[1],
+        engine=AsyncProbeEngine(timeout=timeout, retries=0, resolve_names=False)
+    )
+    tracemalloc.start()
+    monitor.start()
+    try:
+        time.sleep(seconds / 2)
+        filled = tracemalloc.get_traced_memory()[0]
+        time.sleep(seconds / 2)
+        growth = tracemalloc.get_traced_memory()[0] - filled
+        report = monitor.report()
+    finally:
+        monitor.stop()
+        tracemalloc.stop()
+        server.close()
+    
+    targets = report['windows'][-1]['targets'] if report['windows'] else {}
+    return all([
+        check("tampon circulaire plein", monitor.samples.count == capacity,
+              f"{monitor.samples.count} échantillons, {monitor.samples.nbytes} octets"),
+        check("mémoire constante", growth < 64 * 1024, f"{growth / 1024:+.1f} Ko en {seconds / 2:.0f}s"),
+        check("résumés par cible", len(targets) == 3 and all(t['received'] for t in targets.values()),
+              f"{len(report['windows'])} intervalles")
+    ])
+
+
+def measure_overlap(count: int, interval: float) -> dict:
+    """Durée d'un scan local seul, de la mesure seule, et des deux ensemble"""
+    engine = AsyncProbeEngine(timeout=0.5, retries=0, icmp=False, resolve_names=False)
+    addresses = [f"127.43.{i // 256}.{i % 256}" for i in range(1, 2049)]
+    prober = WanLatencyProber(
+        AsyncProbeEngine(timeout=0.5, retries=0, icmp=False, resolve_names=False),
+        count=count, interval=interval, tcp_port=9
+    )
+    
+    def timed(function):
+        started = time.perf_counter()
+        function()
+        return time.perf_counter() - started
+    
+    def scan():
+        engine.run(addresses, [22, 80, 443], assume_up=True)
+    
+    def wan():
+        prober.run("127.0.0.1")
+    
+    scan_alone, wan_alone = timed(scan), timed(wan)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        started = time.perf_counter()
+        future = pool.submit(wan)
+        scan()
+        future.result()
+        together = time.perf_counter() - started
+    return {"scan": scan_alone, "wan": wan_alone, "together": together}
+
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Banc de test de la latence WAN (local)")
+    parser.add_argument("--count", type=int, default=10, help="Sondes par mesure")
+    parser.add_argument("--interval", type=float, default=0.2, help="Intervalle entre sondes (s)")
+    parser.add_argument("--timeout", type=float, default=0.3, help="Délai d'une sonde (s)")
+    parser.add_argument("--monitor-seconds", type=float, default=4, help="Durée de la surveillance accélérée")
+    parser.add_argument("--monitor-capacity", type=int, default=300, help="Places du tampon circulaire")
+    args = parser.parse_args()
+    
+    print("Statistiques")
+    ok = check_statistics()
+    print("Sondes contre des répondeurs locaux")
+    ok &= check_probes(args.count, args.timeout)
+    print("Surveillance continue")
+    ok &= check_monitor(args.monitor_seconds, args.monitor_capacity, args.timeout)
+    
+    timings = measure_overlap(args.count, args.interval)
+    print(
+        f"Scan local {timings['scan']:.2f}s, mesure WAN {timings['wan']:.2f}s, "
+        f"ensemble {timings['together']:.2f}s (en séquence: {timings['scan'] + timings['wan']:.2f}s)"
+    )
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
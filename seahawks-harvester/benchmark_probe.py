@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark du moteur de sondes asyncio
+Débit (hôtes/s, ports/s) contre des services locaux sur 127.0.0.0/8, avec
+vérification que les ports trouvés ouverts sont exactement ceux en écoute
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import random
+import time
+
+from async_scanner import AsyncProbeEngine, parse_ports
+
+
+async def start_listeners(network: ipaddress.IPv4Network, ports: list, listeners: int,
+                          open_ratio: float, seed: int):
+    """Services TCP locaux sur une partie des (adresse, port) du réseau de test"""
+    rng = random.Random(seed)
+    addresses = [str(address) for address in network.hosts()]
+    servers = []
+    expected = set()
+    
+    async def accept(reader, writer):
+        writer.close()
+    
+    for address in rng.sample(addresses, min(listeners, len(addresses))):
+        for port in ports:
+            if rng.random() >= open_ratio:
+                continue
+            servers.append(await asyncio.start_server(accept, address, port))
+            expected.add((address, port))
+    return servers, expected
+
+
+async def measure(engine: AsyncProbeEngine, network: ipaddress.IPv4Network, ports: list,
+                  expected: set) -> dict:
+    """Scan complet du réseau de test (ports de toutes les adresses)"""
+    found = set()
+    first_host = None
+    started = time.perf_counter()
+    
+    async for host in engine.scan((str(a) for a in network.hosts()), ports, assume_up=True):
+        first_host = first_host or time.perf_counter() - started
+        found.update((host['ip'], p['port']) for p in host['ports'] if p['state'] == 'open')
+    
+    seconds = time.perf_counter() - started
+    addresses = network.num_addresses - 2
+    return {
+        "seconds": seconds,
+        "hosts_per_second": addresses / seconds,
+        "ports_per_second": addresses * len(ports) / seconds,
+        "first_host_ms": (first_host or 0) * 1000,
+        "missing": len(expected - found),
+        "unexpected": len(found - expected)
+    }
+
+
+async def run(args):
+    network = ipaddress.ip_network(args.network)
+    if not network.is_loopback:
+        raise SystemExit("Le benchmark ne sonde que des adresses locales (127.0.0.0/8)")
+    ports = parse_ports(args.ports)
+    
+    servers, expected = await start_listeners(
+        network, ports, args.listeners, args.open_ratio, args.seed
+    )
+    print(
+        f"{network} ({network.num_addresses - 2} adresses x {len(ports)} ports), "
+        f"{len(expected)} services en écoute sur {args.listeners} adresses"
+    )
+    
+    try:
+        for concurrency in [int(c) for c in args.concurrency.split(',')]:
+            engine = AsyncProbeEngine(
+                concurrency=concurrency, host_concurrency=args.host_concurrency,
+                host_rate=args.host_rate, timeout=args.timeout, retries=0,
+                icmp=False, resolve_names=False
+            )
+            result = min(
+                [await measure(engine, network, ports, expected) for _ in range(args.repeat)],
+                key=lambda r: r['seconds']
+            )
+            status = "OK" if not result['missing'] and not result['unexpected'] else (
+                f"ÉCART: {result['missing']} manquants, {result['unexpected']} en trop"
+            )
+            print(
+                f"  concurrence {concurrency:>5}  {result['seconds']:>7.2f} s  "
+                f"{result['hosts_per_second']:>9.0f} hôtes/s  "
+                f"{result['ports_per_second']:>9.0f} ports/s  "
+                f"premier hôte {result['first_host_ms']:.0f} ms  {status}"
+            )
+    finally:
+        for server in servers:
+            server.close()
+            await server.wait_closed()
+
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark du moteur de sondes asyncio (local)")
+    parser.add_argument("--network", default="127.42.0.0/22", help="Réseau de test dans 127.0.0.0/8")
+    parser.add_argument("--ports", default="22,80,443,3389,8080", help="Ports sondés")
+    parser.add_argument("--listeners", type=int, default=64, help="Adresses avec des services")
+    parser.add_argument("--open-ratio", type=float, default=0.5, help="Part des ports ouverts")
+    parser.add_argument("--concurrency", default="64,256,1024", help="Sondes en vol à comparer")
+    parser.add_argument("--host-concurrency", type=int, default=4, help="Sondes simultanées par hôte")
+    parser.add_argument("--host-rate", type=float, default=0, help="Sondes par seconde par hôte (0: libre)")
+    parser.add_argument("--timeout", type=float, default=1.0, help="Délai d'une sonde (secondes)")
+    parser.add_argument("--repeat", type=int, default=3, help="Scans par mesure (meilleur temps gardé)")
+    parser.add_argument("--seed", type=int, default=1, help="Graine du choix des services")
+    args = parser.parse_args()
+    
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
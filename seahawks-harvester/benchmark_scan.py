@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark du scan réseau du Harvester
+Temps de scan d'une cible en un seul appel nmap contre un scan découpé en parallèle
+"""
+
+import argparse
+import time
+
+from harvester import SeahawksHarvester
+from scanner_backends import create_backend, create_version_backend
+
+
+def measure(harvester: SeahawksHarvester, network: str, ports: str,
+            parallelism: int, repeat: int) -> dict:
+    """Meilleur temps de scan (secondes) pour un degré de parallélisme"""
+    harvester.config['scan_parallelism'] = parallelism
+    harvester.config.pop('scan_shard_prefix', None)
+    
+    timings = []
+    hosts = []
+    shards = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hosts, shards, _ = harvester._scan_hosts(network, ports)
+        timings.append(time.perf_counter() - start)
+    
+    return {
+        "seconds": round(min(timings), 2),
+        "hosts": len(hosts),
+        "ports_open": sum(
+            1 for host in hosts for port in host['ports'] if port['state'] == 'open'
+        ),
+        "shards": shards['count']
+    }
+
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark du scan réseau (séquentiel contre parallèle)")
+    parser.add_argument(
+        "--networks", nargs='+', required=True,
+        help="Réseaux à scanner (ex: 192.168.1.0/24 10.20.0.0/22), avec autorisation"
+    )
+    parser.add_argument("--ports", help="Ports à scanner (défaut: scan_ports de la configuration)")
+    parser.add_argument("--parallelism", default="1,4,8", help="Degrés de parallélisme à comparer")
+    parser.add_argument("--repeat", type=int, default=1, help="Scans par mesure (meilleur temps gardé)")
+    parser.add_argument(
+        "--mode", choices=["two_phase", "single"],
+        help="Découverte puis services, ou scan complet de chaque adresse (défaut: scan_mode)"
+    )
+    parser.add_argument(
+        "--backend", choices=["nmap", "asyncio"],
+        help="Backend de scan (défaut: scanner_backend de la configuration)"
+    )
+    parser.add_argument("--config", default="config.json", help="Configuration du Harvester")
+    args = parser.parse_args()
+    
+    harvester = SeahawksHarvester(args.config)
+    if args.backend:
+        harvester.scanner = create_backend(args.backend, harvester.config)
+        harvester.version_scanner = create_version_backend(harvester.scanner, harvester.config)
+    if args.mode:
+        harvester.config['scan_mode'] = args.mode
+    ports = args.ports or harvester.config.get("scan_ports", "22,80,443,3389,8080")
+    
+    for network in args.networks:
+        print(f"\n{network} (ports {ports})")
+        baseline = None
+        
+        for parallelism in [int(p) for p in args.parallelism.split(',')]:
+            result = measure(harvester, network, ports, parallelism, args.repeat)
+            baseline = baseline or result['seconds']
+            label = "appel unique" if parallelism == 1 else f"{parallelism} workers"
+            print(
+                f"  {label:<14} {result['shards']:>4} sous-réseaux  "
+                f"{result['seconds']:>8.2f} s  (x{baseline / max(result['seconds'], 0.01):.1f})  "
+                f"{result['hosts']} hôtes, {result['ports_open']} ports ouverts"
+            )
+
+
+if __name__ == "__main__":
+    main()
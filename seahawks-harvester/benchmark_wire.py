@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark du format de transport Harvester → Nester
+Taille et coût CPU d'encodage/décodage des rapports selon l'encodage et la compression
+"""
+
+import argparse
+import ipaddress
+import json
+import random
+import statistics
+import time
+
+import wire_format
+
+
+SERVICES = [
+    (22, "ssh", "OpenSSH", "8.9p1"),
+    (80, "http", "nginx", "1.24.0"),
+    (443, "https", "nginx", "1.24.0"),
+    (3389, "ms-wbt-server", "Microsoft Terminal Services", ""),
+    (8080, "http-proxy", "Apache Tomcat", "9.0.82")
+]
+
+
+def make_report(network: str, density: float, seed: int = 42) -> dict:
+    """Génère un rapport de scan synthétique au format du Harvester"""
+    rng = random.Random(seed)
+    hosts = []
+    ports_open = 0
+    
+    for ip in ipaddress.ip_network(network).hosts():
+        if rng.random() > density:
+            continue
+        
+        ports = []
+        for port, service, product, version in SERVICES:
+            if rng.random() < 0.35:
+                ports.append({
+                    "port": port,
+                    "state": "open",
+                    "service": service,
+                    "version": version,
+                    "product": product
+                })
+        ports_open += len(ports)
+        
+        mac = ':'.join(f"{rng.randrange(256):02X}" for _ in range(6))
+        hosts.append({
+            "ip": str(ip),
+            "hostname": f"pos-{rng.randrange(10000):04d}.franchise.local" if rng.random() < 0.6 else "Unknown",
+            "state": "up",
+            "mac_address": mac,
+            "vendor": rng.choice(["Dell Inc.", "Hewlett Packard", "Cisco Systems", "Unknown"]),
+            "os": {"name": "Unknown", "accuracy": 0},
+            "ports": ports
+        })
+    
+    return {
+        "scan_id": "scan_20260126_103000",
+        "franchise_id": "franchise_01",
+        "franchise_name": "Seattle Seahawks",
+        "timestamp": "2026-01-26T10:30:00",
+        "harvester_version": "1.0.0",
+        "network": network,
+        "hosts": hosts,
+        "summary": {
+            "total_hosts": len(hosts),
+            "hosts_up": len(hosts),
+            "hosts_down": 0,
+            "total_ports_open": ports_open
+        },
+        "wan_latency_ms": 15.2,
+        "scan_duration_seconds": 42.0
+    }
+
+
+def measure(report: dict, content_type: str, encoding: str, iterations: int) -> dict:
+    """Mesure taille et temps CPU (médiane) d'encodage et de décodage"""
+    encode_times = []
+    decode_times = []
+    body = b""
+    
+    for _ in range(iterations):
+        start = time.process_time()
+        body, _ = wire_format.encode_payload(report, content_type, encoding)
+        encode_times.append((time.process_time() - start) * 1000)
+        
+        start = time.process_time()
+        wire_format.decode_payload(body, content_type, encoding)
+        decode_times.append((time.process_time() - start) * 1000)
+    
+    return {
+        "bytes": len(body),
+        "encode_ms": round(statistics.median(encode_times), 2),
+        "decode_ms": round(statistics.median(decode_times), 2)
+    }
+
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark du format d'upload des rapports")
+    parser.add_argument(
+        "--networks", nargs='+', default=["192.168.1.0/24", "10.20.0.0/16"],
+        help="Réseaux simulés"
+    )
+    parser.add_argument("--density", type=float, default=0.5, help="Proportion d'hôtes actifs")
+    parser.add_argument("--iterations", type=int, default=5, help="Mesures par format")
+    args = parser.parse_args()
+    
+    for network in args.networks:
+        report = make_report(network, args.density)
+        indented = len(json.dumps(report, indent=2, ensure_ascii=False).encode('utf-8'))
+        print(f"\n{network}: {len(report['hosts'])} hôtes, JSON indenté (ancien format) {indented} octets")
+        
+        for content_type in wire_format.local_content_types():
+            for encoding in wire_format.local_encodings():
+                result = measure(report, content_type, encoding, args.iterations)
+                print(
+                    f"  {content_type:<22} {encoding:<9} "
+                    f"{result['bytes']:>11} octets ({result['bytes'] / indented:>6.1%})  "
+                    f"encodage {result['encode_ms']:>8.2f} ms  "
+                    f"décodage {result['decode_ms']:>8.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,13 @@ import HostsList from './components/HostsList'
 import StatsCards from './components/StatsCards'
 import NetworkChart from './components/NetworkChart'
 
+// Étapes du scan en cours (rapport en flux du Harvester)
+const PHASE_LABELS = {
+  discovery: 'découverte',
+  services: 'services',
+  wan_latency: 'latence WAN'
+}
+
 function App() {
   const [status, setStatus] = useState(null)
   const [report, setReport] = useState(null)
@@ -44,13 +51,57 @@ function App() {
     }
   }
 
+  // Fin d'un scan: rapport et équipements rechargés une fois
+  const fetchReport = async () => {
+    try {
+      const [reportRes, hostsRes] = await Promise.all([
+        axios.get('/api/report'),
+        axios.get('/api/hosts')
+      ])
+      setReport(reportRes.data)
+      setHosts(hostsRes.data)
+    } catch (error) {
+      console.error('Erreur lors du chargement du rapport:', error)
+    }
+  }
+
   useEffect(() => {
     fetchData()
     
-    if (autoRefresh) {
+    if (!autoRefresh) return
+    
+    // Mises à jour en direct (Server-Sent Events); actualisation toutes les 30 secondes en secours
+    if (!window.EventSource) {
       const interval = setInterval(fetchData, 30000)
       return () => clearInterval(interval)
     }
+    
+    const source = new EventSource('/api/stream')
+    let interval = null
+    let reconnecting = false
+    
+    source.addEventListener('status', event => {
+      setStatus(JSON.parse(event.data))
+      setLastUpdate(new Date())
+    })
+    source.addEventListener('report', fetchReport)
+    source.addEventListener('resync', fetchData)
+    
+    source.onopen = () => {
+      if (reconnecting) fetchData()
+      reconnecting = false
+    }
+    source.onerror = () => {
+      reconnecting = true
+      if (source.readyState === EventSource.CLOSED && interval === null) {
+        interval = setInterval(fetchData, 30000)
+      }
+    }
+    
+    return () => {
+      source.close()
+      if (interval !== null) clearInterval(interval)
+    }
   }, [autoRefresh])
 
   if (loading && !status) {
@@ -114,6 +165,14 @@ function App() {
                 Dernière mise à jour : {lastUpdate.toLocaleTimeString('fr-FR')}
               </div>
             )}
+
+            {status?.scan_in_progress && (
+              <div className="mt-2 flex items-center text-sm text-seahawks-blue">
+                <Activity className="w-4 h-4 mr-2 animate-pulse" />
+                Scan en cours ({PHASE_LABELS[status.scan_in_progress.phase] || 'démarrage'}) :{' '}
+                {status.scan_in_progress.hosts_seen} hôte{status.scan_in_progress.hosts_seen > 1 ? 's' : ''} trouvé{status.scan_in_progress.hosts_seen > 1 ? 's' : ''}
+              </div>
+            )}
           </div>
         </header>
 
@@ -25,7 +25,9 @@ function StatsCards({ report, status }) {
       value: report?.wan_latency_ms ? `${report.wan_latency_ms}ms` : 'N/A',
       color: 'text-purple-600',
       bgColor: 'bg-purple-50',
-      trend: report?.wan_latency_ms ? 'Excellente' : 'Non mesurée'
+      trend: report?.wan_latency?.received
+        ? `p95 ${report.wan_latency.p95_ms}ms · perte ${report.wan_latency.loss_percent}%`
+        : report?.wan_latency_ms ? 'Excellente' : 'Non mesurée'
     },
     {
       icon: Clock,
@@ -33,7 +35,9 @@ function StatsCards({ report, status }) {
       value: report?.scan_duration_seconds ? `${report.scan_duration_seconds.toFixed(1)}s` : 'N/A',
       color: 'text-orange-600',
       bgColor: 'bg-orange-50',
-      trend: 'Rapide'
+      trend: report?.fingerprint_cache?.hit_rate != null
+        ? `Empreintes réutilisées: ${Math.round(report.fingerprint_cache.hit_rate * 100)}%`
+        : 'Rapide'
     }
   ]
 
@@ -4,46 +4,85 @@ Seahawks Harvester - Dashboard Local
 Interface web simple pour visualiser l'état des scans
 """
 
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, render_template, jsonify, request
 from pathlib import Path
 import json
+import threading
+import time
 from datetime import datetime
 
+from live_updates import Broadcaster
+import report_stream
+from response_cache import ResponseCache
+
 
 app = Flask(__name__)
 
 
+REPORT_DIR = Path("reports")
+CONFIG_FILE = Path("config.json")
+
+# Fichiers dont dépendent les réponses: dernier rapport, ancien format, scan en cours
+WATCHED_REPORTS = (report_stream.LATEST_REPORT, report_stream.LEGACY_LATEST_REPORT,
+                   report_stream.CURRENT_SCAN)
+
+
 def load_latest_report():
-    """Charge le dernier rapport de scan"""
-    report_file = Path("reports/latest_report.json")
-    
-    if report_file.exists():
-        with open(report_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return None
+    """Charge le dernier rapport de scan terminé"""
+    return report_stream.load_latest_report(REPORT_DIR)
+
+
+def load_current_scan():
+    """Charge le rapport partiel du scan en cours (None sans scan en cours)"""
+    return report_stream.load_current_scan(REPORT_DIR)
+
+
+def host_summary(host):
+    """Résumé d'un hôte pour la liste des équipements"""
+    return {
+        "ip": host['ip'],
+        "hostname": host['hostname'],
+        "state": host['state'],
+        "mac_address": host['mac_address'],
+        "vendor": host['vendor'],
+        "os": host['os']['name'],
+        "ports_count": len(host['ports'])
+    }
 
 
 def load_config():
     """Charge la configuration"""
-    config_file = Path("config.json")
-    
-    if config_file.exists():
-        with open(config_file, 'r', encoding='utf-8') as f:
+    if CONFIG_FILE.exists():
+        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
             return json.load(f)
     return {}
 
 
+def file_signature(*paths) -> tuple:
+    """(inode, date, taille) de chaque fichier: change à chaque réécriture ou remplacement"""
+    signature = []
+    for path in paths:
+        try:
+            stat = path.stat()
+            signature.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def report_signature() -> tuple:
+    return file_signature(*(REPORT_DIR / name for name in WATCHED_REPORTS))
+
+
 @app.route('/')
 def index():
     """Page principale du dashboard"""
     return render_template('dashboard.html')
 
 
-@app.route('/api/status')
-def api_status():
-    """API: Retourne le statut actuel"""
+def build_status(report=None, current=None):
+    """Statut actuel à partir du dernier rapport et du scan en cours (None si absents)"""
     config = load_config()
-    report = load_latest_report()
     
     status = {
         "version": "1.0.0",
@@ -58,6 +97,8 @@ def api_status():
         status['last_scan'] = report.get('timestamp')
         status['equipment_count'] = report['summary']['hosts_up']
         status['wan_latency_ms'] = report.get('wan_latency_ms')
+        status['wan_latency'] = report.get('wan_latency')
+        status['fingerprint_cache'] = report.get('fingerprint_cache')
         status['status'] = 'online'
         
         # Calcul du temps écoulé depuis le dernier scan
@@ -65,16 +106,124 @@ def api_status():
         time_diff = (datetime.now() - last_scan_dt).total_seconds()
         status['last_scan_ago_seconds'] = int(time_diff)
     
-    return jsonify(status)
+    if current:
+        status['scan_in_progress'] = {
+            "scan_id": current.get('scan_id'),
+            "started_at": current.get('timestamp'),
+            **current['scan_progress']
+        }
+    
+    return status
+
+
+class ReportWatcher:
+    """
+    Surveille les rapports et diffuse les changements aux dashboards ouverts
+    
+    Un seul thread relit toutes les interval secondes la date et la taille
+    du dernier rapport et du scan en cours, quel que soit le nombre de
+    navigateurs: à chaque changement, le statut est recalculé une fois et
+    diffusé ('status'); un nouveau scan terminé est annoncé par 'report'
+    (le navigateur recharge alors la liste des équipements).
+    """
+    
+    def __init__(self, broadcaster: Broadcaster, interval: float = 1.0):
+        self.broadcaster = broadcaster
+        self.interval = interval
+        self._signature = report_signature()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+    
+    def start(self):
+        """Démarre la surveillance (au premier navigateur abonné)"""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="report-watcher", daemon=True)
+                self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                # Rapport en cours de remplacement: nouvel essai au tour suivant
+                app.logger.warning(f"Lecture des rapports impossible: {e}")
+    
+    def check(self):
+        """Diffuse le statut si un rapport a changé depuis le dernier appel"""
+        signature = report_signature()
+        if signature == self._signature:
+            return
+        report_changed = signature[:2] != self._signature[:2]
+        self._signature = signature
+        if not self.broadcaster.subscribers:
+            return
+        
+        report = load_latest_report()
+        self.broadcaster.publish('status', build_status(report, load_current_scan()))
+        if report_changed and report:
+            self.broadcaster.publish('report', {
+                "scan_id": report.get('scan_id'),
+                "timestamp": report.get('timestamp'),
+                "summary": report.get('summary')
+            })
+
+
+# Mises à jour en direct (/api/stream)
+live = Broadcaster(max_subscribers=50)
+watcher = ReportWatcher(live)
+
+# Réponses sérialisées une fois par version des rapports: le Harvester écrit
+# dans un autre processus, une version change quand les fichiers changent
+responses = ResponseCache(max_entries=16)
+
+
+def _cached_json(resource: str, build, variant: str = ''):
+    """
+    Réponse JSON servie depuis le cache des réponses
+    
+    ETag fort, Last-Modified et Cache-Control: no-cache; 304 si le client a
+    déjà cette version. last_scan_ago_seconds date de la construction du
+    corps: l'en-tête Age donne le temps écoulé depuis.
+    
+    Returns:
+        La réponse, ou None si build retourne None
+    """
+    def serialize():
+        data = build()
+        return (app.json.response(data).get_data(), {}) if data is not None else None
+    
+    cached = responses.get(resource, serialize, variant)
+    if cached.body is None:
+        return None
+    
+    response = Response(cached.body, mimetype='application/json')
+    response.set_etag(cached.etag)
+    response.last_modified = cached.last_modified
+    response.cache_control.no_cache = True
+    response.headers['Age'] = str(int(time.time() - cached.built_at))
+    return response.make_conditional(request)
+
+
+@app.route('/api/status')
+def api_status():
+    """API: Retourne le statut actuel"""
+    responses.track('status', report_signature() + file_signature(CONFIG_FILE))
+    return _cached_json('status', lambda: build_status(load_latest_report(), load_current_scan()))
 
 
 @app.route('/api/report')
 def api_report():
     """API: Retourne le dernier rapport complet"""
-    report = load_latest_report()
+    responses.track('report', report_signature()[:2])
+    response = _cached_json('report', lambda: load_latest_report() or None)
     
-    if report:
-        return jsonify(report)
+    if response:
+        return response
     
     return jsonify({"error": "No report available"}), 404
 
@@ -82,23 +231,48 @@ def api_report():
 @app.route('/api/hosts')
 def api_hosts():
     """API: Liste des hôtes découverts"""
-    report = load_latest_report()
+    def build():
+        report = load_latest_report()
+        return [host_summary(host) for host in report.get('hosts', [])] if report else []
     
-    if report:
-        hosts = []
-        for host in report.get('hosts', []):
-            hosts.append({
-                "ip": host['ip'],
-                "hostname": host['hostname'],
-                "state": host['state'],
-                "mac_address": host['mac_address'],
-                "vendor": host['vendor'],
-                "os": host['os']['name'],
-                "ports_count": len(host['ports'])
-            })
-        return jsonify(hosts)
+    responses.track('report', report_signature()[:2])
+    return _cached_json('report', build, variant='hosts')
+
+
+@app.route('/api/progress')
+def api_progress():
+    """API: Progression du scan en cours (hôtes déjà trouvés)"""
+    current = load_current_scan()
+    
+    if current:
+        return jsonify({
+            "in_progress": True,
+            "scan_id": current.get('scan_id'),
+            "started_at": current.get('timestamp'),
+            **current['scan_progress'],
+            "hosts": [host_summary(host) for host in current['hosts']]
+        })
+    
+    return jsonify({"in_progress": False})
+
+
+@app.route('/api/stream')
+def api_stream():
+    """
+    API: Mises à jour en direct (Server-Sent Events)
+    
+    Événements: status (même contenu que /api/status) à chaque changement
+    des rapports, report à la fin d'un scan, resync (recharger l'état complet)
+    """
+    subscription = live.subscribe(request.headers.get('Last-Event-ID'))
+    if subscription is None:
+        return jsonify({"error": "Too many live clients"}), 503
     
-    return jsonify([])
+    watcher.start()
+    return Response(subscription, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 
 if __name__ == '__main__':
@@ -106,6 +280,6 @@ if __name__ == '__main__':
     print("  🏈 Seahawks Harvester - Dashboard Local")
     print("="*60)
     print("\n📊 Dashboard accessible sur: http://localhost:5000")
-    print("🔄 Actualisation automatique toutes les 30 secondes\n")
+    print("🔄 Mises à jour en direct (actualisation toutes les 30 secondes en secours)\n")
     
     app.run(host='0.0.0.0', port=5000, debug=True)
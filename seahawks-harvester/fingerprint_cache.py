@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Cache local des empreintes de services (service, produit, version)
+Évite de relancer la détection de version (-sV) sur les ports inchangés
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+# Champs d'un port repris du cache
+FINGERPRINT_FIELDS = ("service", "product", "version")
+
+
+class FingerprintCache:
+    """
+    Empreintes par (équipement, port), valables ttl secondes
+    
+    L'équipement est identifié par son adresse MAC quand elle est connue
+    (une adresse IP peut être réattribuée par DHCP), sinon par son IP. Le
+    fichier est réécrit en entier à chaque sauvegarde, une fois par scan.
+    """
+    
+    def __init__(self, path: str, ttl: float = 86400):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._entries = self._load()
+        self.metrics = {"hits": 0, "misses": 0, "expired": 0}
+    
+    def _load(self) -> Dict:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    @staticmethod
+    def key(host: Dict, port: int) -> str:
+        """Clé d'un port: MAC si connue, sinon IP"""
+        mac = host.get('mac_address')
+        device = mac.lower() if mac and mac != "Unknown" else host['ip']
+        return f"{device}/{port}"
+    
+    def lookup(self, host: Dict, port: int, now: float = None) -> Optional[Dict]:
+        """Empreinte encore valable d'un port ouvert, ou None"""
+        entry = self._entries.get(self.key(host, port))
+        if entry is None:
+            self.metrics['misses'] += 1
+            return None
+        
+        now = now or time.time()
+        if now - entry['fingerprinted_at'] > self.ttl:
+            self.metrics['expired'] += 1
+            return None
+        
+        self.metrics['hits'] += 1
+        return entry
+    
+    def store(self, host: Dict, port_info: Dict, now: float = None):
+        """Mémorise l'empreinte d'un port qui vient d'être analysé (-sV)"""
+        entry = {field: port_info.get(field, '') for field in FINGERPRINT_FIELDS}
+        entry['fingerprinted_at'] = now or time.time()
+        self._entries[self.key(host, port_info['port'])] = entry
+    
+    def forget(self, host: Dict, port: int):
+        """Oublie un port fermé: il sera analysé de nouveau à sa réouverture"""
+        self._entries.pop(self.key(host, port), None)
+    
+    def save(self, now: float = None):
+        """Écrit le cache sur disque (les entrées expirées sont purgées)"""
+        now = now or time.time()
+        self._entries = {
+            key: entry for key, entry in self._entries.items()
+            if now - entry['fingerprinted_at'] <= self.ttl
+        }
+        
+        tmp_file = self.path.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, separators=(',', ':'))
+        tmp_file.replace(self.path)
+    
+    def stats(self) -> Dict:
+        """Compteurs depuis le dernier reset_metrics et taux de réutilisation"""
+        lookups = sum(self.metrics.values())
+        return {
+            **self.metrics,
+            "entries": len(self._entries),
+            "hit_rate": round(self.metrics['hits'] / lookups, 3) if lookups else None
+        }
+    
+    def reset_metrics(self):
+        """Remet les compteurs à zéro (début d'un scan)"""
+        self.metrics = {"hits": 0, "misses": 0, "expired": 0}
@@ -5,16 +5,24 @@ Version: 1.0.0
 Description: Scan réseau autonome pour détection d'équipements et mesure de latence
 """
 
+import ipaddress
 import json
 import logging
+import math
 import os
 import socket
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
-import nmap
+from async_scanner import AsyncProbeEngine
+from fingerprint_cache import FINGERPRINT_FIELDS, FingerprintCache
+from report_stream import CURRENT_SCAN, ReportStreamWriter, load_latest_report
+from scanner_backends import ScannerBackend, create_backend, create_version_backend
+from wan_latency import WanLatencyProber
 
 
 class SeahawksHarvester:
@@ -24,17 +32,43 @@ class SeahawksHarvester:
     
     def __init__(self, config_path: str = "config.json"):
         """Initialise le Harvester avec la configuration"""
+        self.config_path = config_path
         self.config = self._load_config(config_path)
         self.scan_results = []
         self.report_dir = Path(self.config.get("report_dir", "reports"))
         self.report_dir.mkdir(exist_ok=True)
+        # Scan interrompu par un arrêt brutal: il n'est plus en cours
+        (self.report_dir / CURRENT_SCAN).unlink(missing_ok=True)
         
         # Configuration du logger
         self._setup_logging()
         self.logger.info(f"Seahawks Harvester v{self.VERSION} démarré")
         
-        # Initialisation du scanner nmap
-        self.nm = nmap.PortScanner()
+        # Backend de scan (nmap ou asyncio) et de détection de version
+        self.scanner = create_backend(self.config.get("scanner_backend", "nmap"), self.config)
+        self.version_scanner = create_version_backend(self.scanner, self.config)
+        if self.version_scanner is None:
+            self.logger.warning("Détection de version indisponible: services nommés d'après le port")
+        
+        # Latence WAN: sondes dans le processus, en parallèle du scan
+        self.wan_prober = WanLatencyProber(
+            AsyncProbeEngine(
+                concurrency=8, timeout=self.config.get("wan_probe_timeout", 1.0), retries=0,
+                icmp=self.config.get("probe_icmp", True), resolve_names=False
+            ),
+            count=self.config.get("wan_probe_count", 10),
+            interval=self.config.get("wan_probe_interval", 0.2),
+            tcp_port=self.config.get("wan_probe_tcp_port", 443)
+        )
+        
+        # Échantillonnage WAN continu (fourni par le service de longue durée)
+        self.wan_monitor = None
+        
+        # Empreintes des services déjà analysés (-sV), 0 pour désactiver
+        ttl = self.config.get("fingerprint_cache_ttl", 86400)
+        self.fingerprints = FingerprintCache(
+            self.report_dir / "fingerprint_cache.json", ttl
+        ) if ttl > 0 else None
     
     def _load_config(self, config_path: str) -> Dict:
         """Charge la configuration depuis un fichier JSON"""
@@ -59,15 +93,24 @@ class SeahawksHarvester:
             return json.load(f)
     
     def _setup_logging(self):
-        """Configure le système de logging en format JSON"""
+        """Configure le système de logging en format JSON (rappelable sans doublons)"""
         log_dir = Path(self.config.get("log_dir", "logs"))
         log_dir.mkdir(exist_ok=True)
         
-        log_file = log_dir / f"harvester_{datetime.now().strftime('%Y%m%d')}.log"
+        self._log_day = datetime.now().strftime('%Y%m%d')
+        log_file = log_dir / f"harvester_{self._log_day}.log"
         
         # Configuration du logger
         self.logger = logging.getLogger('SeahawksHarvester')
         self.logger.setLevel(logging.INFO)
+        # Logger partagé par les instances d'un même processus (service de
+        # longue durée, rechargement de la configuration): les handlers
+        # précédents sont remplacés, pas accumulés
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+        # Ses propres handlers: pas de double écriture via ceux du service
+        self.logger.propagate = False
         
         # Handler pour fichier
         file_handler = logging.FileHandler(log_file)
@@ -88,85 +131,60 @@ class SeahawksHarvester:
         self.logger.addHandler(file_handler)
         self.logger.addHandler(console_handler)
     
-    def measure_wan_latency(self, host: str = None, ping_count: int = 4) -> Optional[float]:
+    def measure_wan_latency(self, host: str = None) -> Optional[Dict]:
         """
-        Mesure la latence WAN vers un hôte de test avec plusieurs pings ICMP
+        Mesure la latence WAN vers un hôte de test (écho ICMP, ou connexion TCP)
         
         Args:
-            host: Hôte de test (défaut: 8.8.8.8)
-            ping_count: Nombre de pings pour la moyenne (défaut: 4)
+            host: Hôte de test (défaut: wan_test_host, 8.8.8.8)
         
         Returns:
-            Latence moyenne en ms, ou None en cas d'erreur
+            Statistiques (moyenne, percentiles, gigue, perte, méthode), ou
+            None en cas d'erreur
         """
         if host is None:
             host = self.config.get("wan_test_host", "8.8.8.8")
         
         try:
-            # Utiliser ping ICMP via subprocess
-            import subprocess
-            import platform
-            
-            # Adapter la commande selon l'OS
-            param = '-n' if platform.system().lower() == 'windows' else '-c'
-            command = ['ping', param, str(ping_count), host]
-            
-            # Exécuter ping
-            result = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=ping_count * 2 + 5,
-                text=True
-            )
-            
-            if result.returncode != 0:
-                self.logger.error(f"Ping échoué vers {host}")
-                return None
-            
-            # Parser les résultats pour extraire les latences
-            import re
-            latencies = []
-            
-            # Regex pour extraire les temps (format: time=XX.X ms)
-            for match in re.finditer(r'time[=<](\d+\.?\d*)\s*ms', result.stdout):
-                latencies.append(float(match.group(1)))
-            
-            if not latencies:
-                self.logger.error(f"Impossible d'extraire les latences pour {host}")
-                return None
-            
-            # Calculer les statistiques
-            avg_latency = sum(latencies) / len(latencies)
-            min_latency = min(latencies)
-            max_latency = max(latencies)
-            
-            self.logger.info(
-                f"Latence WAN vers {host}: {len(latencies)}/{ping_count} pings réussis | "
-                f"Moyenne: {avg_latency:.2f}ms | Min: {min_latency:.2f}ms | Max: {max_latency:.2f}ms"
-            )
-            
-            return round(avg_latency, 2)
-            
+            stats = self.wan_prober.run(host)
         except Exception as e:
             self.logger.error(f"Erreur lors de la mesure de latence vers {host}: {e}")
             return None
+        
+        if not stats['received']:
+            self.logger.error(f"Aucune réponse de {host} ({stats['method']}, {stats['sent']} sondes)")
+        else:
+            self.logger.info(
+                f"Latence WAN vers {host} ({stats['method']}): {stats['received']}/{stats['sent']} réponses | "
+                f"Moyenne: {stats['mean_ms']}ms | p95: {stats['p95_ms']}ms | "
+                f"Gigue: {stats['jitter_ms']}ms | Perte: {stats['loss_percent']}%"
+            )
+        return stats
     
     def scan_network(self) -> Dict:
         """Effectue un scan complet du réseau local"""
         network = self.config.get("scan_network", "192.168.1.0/24")
         ports = self.config.get("scan_ports", "22,80,443,3389,8080")
         
+        # Processus de longue durée: un fichier de log par jour
+        if datetime.now().strftime('%Y%m%d') != self._log_day:
+            self._setup_logging()
+        
         self.logger.info(f"Démarrage scan réseau: {network} ports: {ports}")
         
         scan_start = datetime.now()
-        results = {
+        header = {
             "scan_id": f"scan_{scan_start.strftime('%Y%m%d_%H%M%S')}",
             "franchise_id": self.config.get("franchise_id"),
             "franchise_name": self.config.get("franchise_name"),
             "timestamp": scan_start.isoformat(),
             "harvester_version": self.VERSION,
-            "network": network,
+            "network": network
+        }
+        # Les hôtes sont écrits au fil du scan (lisibles par le dashboard)
+        stream = ReportStreamWriter(self.report_dir, header)
+        results = {
+            **header,
             "hosts": [],
             "summary": {
                 "total_hosts": 0,
@@ -176,49 +194,39 @@ class SeahawksHarvester:
             }
         }
         
+        # La latence WAN se mesure pendant le scan (sondes indépendantes)
+        wan_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wan")
+        wan_future = wan_pool.submit(self._timed, self.measure_wan_latency)
+        
         try:
-            # Scan du réseau
-            self.nm.scan(hosts=network, arguments=f'-p {ports} -sV --max-retries 2 --host-timeout 30s')
+            # Scan du réseau, découpé en sous-réseaux scannés en parallèle
+            hosts, shards, phases = self._scan_hosts(network, ports, stream)
+            results['scan_shards'] = shards
+            results['scan_phases'] = phases
+            if self.fingerprints is not None and 'discovery' in phases:
+                results['fingerprint_cache'] = self.fingerprints.stats()
             
-            for host in self.nm.all_hosts():
-                host_info = {
-                    "ip": host,
-                    "hostname": self.nm[host].hostname() or "Unknown",
-                    "state": self.nm[host].state(),
-                    "mac_address": self.nm[host].get('addresses', {}).get('mac', 'Unknown'),
-                    "vendor": self.nm[host].get('vendor', {}).get(
-                        self.nm[host].get('addresses', {}).get('mac', ''), 'Unknown'
-                    ),
-                    "os": self._extract_os_info(host),
-                    "ports": []
-                }
-                
-                # Ports ouverts
-                if 'tcp' in self.nm[host]:
-                    for port in self.nm[host]['tcp'].keys():
-                        port_info = self.nm[host]['tcp'][port]
-                        host_info['ports'].append({
-                            "port": port,
-                            "state": port_info['state'],
-                            "service": port_info.get('name', 'unknown'),
-                            "version": port_info.get('version', ''),
-                            "product": port_info.get('product', '')
-                        })
-                        
-                        if port_info['state'] == 'open':
-                            results['summary']['total_ports_open'] += 1
-                
+            for host_info in hosts:
                 results['hosts'].append(host_info)
                 results['summary']['total_hosts'] += 1
+                results['summary']['total_ports_open'] += sum(
+                    1 for port in host_info['ports'] if port['state'] == 'open'
+                )
                 
                 if host_info['state'] == 'up':
                     results['summary']['hosts_up'] += 1
                 else:
                     results['summary']['hosts_down'] += 1
             
-            # Mesure latence WAN
-            wan_latency = self.measure_wan_latency()
-            results['wan_latency_ms'] = wan_latency
+            # Latence WAN (mesure lancée avec le scan)
+            if not wan_future.done():
+                stream.phase("wan_latency")
+            wan_latency, duration = wan_future.result()
+            results['wan_latency'] = wan_latency
+            results['wan_latency_ms'] = wan_latency['mean_ms'] if wan_latency else None
+            phases['wan_latency'] = {"duration_seconds": round(duration, 2), "concurrent": True}
+            if self.wan_monitor is not None:
+                results['wan_monitor'] = self.wan_monitor.report()
             
             scan_duration = (datetime.now() - scan_start).total_seconds()
             results['scan_duration_seconds'] = round(scan_duration, 2)
@@ -229,56 +237,341 @@ class SeahawksHarvester:
             )
             
             # Sauvegarde du rapport
-            self._save_report(results)
+            self._save_report(stream, header, results)
             
             return results
             
         except Exception as e:
             self.logger.error(f"Erreur lors du scan réseau: {str(e)}")
             results['error'] = str(e)
+            self._save_report(stream, header, results, publish=False)
             return results
+        finally:
+            wan_pool.shutdown(wait=False)
     
-    def _extract_os_info(self, host: str) -> Dict:
-        """Extrait les informations OS détectées"""
-        os_info = {
-            "name": "Unknown",
-            "accuracy": 0
-        }
+    @staticmethod
+    def _timed(function: Callable):
+        """(résultat, durée en secondes) d'un appel"""
+        started = time.perf_counter()
+        result = function()
+        return result, time.perf_counter() - started
+    
+    def _scan_shards(self, network: str) -> List[str]:
+        """
+        Découpe la cible en sous-réseaux à scanner en parallèle
+        
+        Sans scan_shard_prefix, la cible est coupée en deux fois plus de
+        morceaux que de workers pour qu'un sous-réseau lent n'en bloque pas
+        un autre. Une cible qui n'est pas un CIDR (plage nmap, nom d'hôte) est
+        scannée d'un seul appel, comme toute cible d'un backend qui gère sa
+        propre concurrence (asyncio).
+        """
+        parallelism = max(int(self.config.get("scan_parallelism", 4)), 1)
+        prefix = self.config.get("scan_shard_prefix")
+        
+        if not self.scanner.shardable:
+            return [network]
+        
+        try:
+            target = ipaddress.ip_network(network, strict=False)
+        except ValueError:
+            return [network]
+        
+        if prefix is None:
+            if parallelism == 1:
+                return [network]
+            prefix = target.prefixlen + math.ceil(math.log2(parallelism * 2))
+        
+        prefix = min(max(int(prefix), target.prefixlen), target.max_prefixlen)
+        return [str(subnet) for subnet in target.subnets(new_prefix=prefix)]
+    
+    def _run_shards(self, jobs: List[Tuple[str, Callable[[], List[Dict]]]]):
+        """
+        Scanne les parties de la cible avec un pool de scan_parallelism workers
+        
+        Args:
+            jobs: (cible, appel du backend qui la scanne) par partie
+        
+        Returns:
+            (hôtes, parties en erreur, nombre de workers)
+        
+        Raises:
+            RuntimeError: si aucune partie n'a pu être scannée
+        """
+        parallelism = min(max(int(self.config.get("scan_parallelism", 4)), 1), len(jobs))
+        hosts = []
+        failed = []
+        
+        with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="scan") as pool:
+            futures = {pool.submit(scan): target for target, scan in jobs}
+            for future in as_completed(futures):
+                try:
+                    hosts.extend(future.result())
+                except Exception as e:
+                    failed.append(futures[future])
+                    self.logger.error(f"Erreur lors du scan de {futures[future]}: {e}")
         
-        if 'osmatch' in self.nm[host] and len(self.nm[host]['osmatch']) > 0:
-            best_match = self.nm[host]['osmatch'][0]
-            os_info['name'] = best_match.get('name', 'Unknown')
-            os_info['accuracy'] = int(best_match.get('accuracy', 0))
+        if len(failed) == len(jobs):
+            raise RuntimeError(f"Aucune partie de la cible scannée ({len(jobs)} en erreur)")
+        return hosts, failed, parallelism
+    
+    def _service_groups(self, addresses: List[str], backend: ScannerBackend) -> List[str]:
+        """Répartit les hôtes actifs en groupes pour le scan de services"""
+        if not backend.shardable:
+            return [' '.join(addresses)]
+        parallelism = max(int(self.config.get("scan_parallelism", 4)), 1)
+        count = min(parallelism * 2, len(addresses))
+        size = math.ceil(len(addresses) / count)
+        return [' '.join(addresses[i:i + size]) for i in range(0, len(addresses), size)]
+    
+    def _scan_hosts(self, network: str, ports: str, stream: ReportStreamWriter = None):
+        """
+        Scanne la cible, en deux phases par défaut
+        
+        1. Découverte: balayage ping (ARP/ICMP/TCP SYN, ou écho ICMP et
+           connexions TCP avec le backend asyncio) par sous-réseaux
+        2. Services: ports et détection de version (-sV) des seuls hôtes actifs
+        
+        Avec scan_mode "single", chaque adresse reçoit directement le scan
+        complet (ancien comportement).
+        
+        Les hôtes sont écrits dans stream dès qu'ils sont découverts puis à
+        chaque fois que leurs informations se complètent.
+        
+        Returns:
+            (hôtes triés par adresse IP, statistiques des parties, durée des phases)
+        
+        Raises:
+            RuntimeError: si aucune partie de la cible n'a pu être scannée
+        """
+        shards = self._scan_shards(network)
+        phases = {}
+        emit = stream.host if stream is not None else None
+        
+        if self.config.get("scan_mode", "two_phase") == "single":
+            if stream is not None:
+                stream.phase("services")
+            started = time.perf_counter()
+            hosts, failed, parallelism = self._run_shards([
+                (shard, partial(self.scanner.scan_ports, shard, ports,
+                                detect_versions=self.version_scanner is self.scanner, on_host=emit))
+                for shard in shards
+            ])
+            fingerprinted = self._fingerprint_services(hosts, use_cache=False, on_host=emit)
+            phases['services'] = {
+                "duration_seconds": round(time.perf_counter() - started, 2),
+                "hosts_scanned": len(hosts)
+            }
+            if fingerprinted is not None:
+                phases['services']['ports_fingerprinted'] = fingerprinted
+        else:
+            if stream is not None:
+                stream.phase("discovery", addresses=self._count_addresses(network))
+            started = time.perf_counter()
+            discovered, failed, parallelism = self._run_shards([
+                (shard, partial(self.scanner.discover, shard, ports, on_host=emit))
+                for shard in shards
+            ])
+            live = sorted(
+                (host['ip'] for host in discovered if host['state'] == 'up'),
+                key=self._ip_sort_key
+            )
+            phases['discovery'] = {
+                "duration_seconds": round(time.perf_counter() - started, 2),
+                "addresses": self._count_addresses(network),
+                "hosts_up": len(live),
+                "hosts": [
+                    {key: host[key] for key in ("ip", "hostname", "mac_address", "vendor")}
+                    for host in sorted(discovered, key=lambda host: self._ip_sort_key(host['ip']))
+                ]
+            }
+            
+            if stream is not None:
+                stream.phase("services", hosts_up=len(live))
+            started = time.perf_counter()
+            hosts, failed_ips, fingerprinted = self._scan_services(live, ports, discovered, emit)
+            failed.extend(failed_ips)
+            phases['services'] = {
+                "duration_seconds": round(time.perf_counter() - started, 2),
+                "hosts_scanned": len(live),
+                "ports_fingerprinted": fingerprinted
+            }
+        
+        hosts.sort(key=lambda host: self._ip_sort_key(host['ip']))
+        self.logger.info(
+            f"{len(shards)} sous-réseaux scannés par {parallelism} workers "
+            f"({len(failed)} en erreur), phases: "
+            + ", ".join(f"{name} {phase['duration_seconds']}s" for name, phase in phases.items())
+        )
+        return hosts, {
+            "count": len(shards),
+            "parallelism": parallelism,
+            "failed": sorted(failed, key=self._ip_sort_key)
+        }, phases
+    
+    def _scan_services(self, live: List[str], ports: str, discovered: List[Dict],
+                       on_host: Callable[[Dict], None] = None):
+        """
+        Ports et services des hôtes actifs (phase 2)
+        
+        Sans cache d'empreintes, un backend capable de détection de version
+        relève ports et versions (-sV) d'un seul passage. Sinon l'état des
+        ports est relevé d'abord (scan rapide, sans -sV) et les ports ouverts
+        passent ensuite à la détection de version (voir _fingerprint_services).
+        
+        Returns:
+            (hôtes, adresses en erreur, nombre de ports analysés par -sV)
+        """
+        hosts = []
+        failed = []
+        one_pass = self.fingerprints is None and self.version_scanner is self.scanner
+        discovered_by_ip = {host['ip']: host for host in discovered}
+        
+        def scanned(host):
+            # Informations de la découverte complétées avant l'écriture de l'hôte
+            found = discovered_by_ip.get(host['ip'])
+            if found is not None:
+                for key in ("hostname", "mac_address", "vendor"):
+                    if host[key] == "Unknown":
+                        host[key] = found[key]
+            if on_host is not None:
+                on_host(host)
+        
+        if live:
+            hosts, failed_groups, _ = self._run_shards([
+                (group, partial(self.scanner.scan_ports, group, ports,
+                                detect_versions=one_pass, assume_up=True, on_host=scanned))
+                for group in self._service_groups(live, self.scanner)
+            ])
+            failed.extend(ip for group in failed_groups for ip in group.split())
         
-        return os_info
+        # Un hôte découvert garde ses informations même si le scan de
+        # services ne l'a pas retrouvé (délai dépassé, groupe en erreur)
+        scanned_ips = {host['ip'] for host in hosts}
+        hosts.extend(host for host in discovered if host['ip'] not in scanned_ips)
+        
+        if one_pass:
+            return hosts, failed, sum(
+                1 for host in hosts for port_info in host['ports'] if port_info['state'] == 'open'
+            )
+        return hosts, failed, self._fingerprint_services(hosts, on_host=on_host) or 0
     
-    def _save_report(self, results: Dict):
-        """Sauvegarde le rapport de scan"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        report_file = self.report_dir / f"scan_report_{timestamp}.json"
+    def _fingerprint_services(self, hosts: List[Dict], use_cache: bool = True,
+                              on_host: Callable[[Dict], None] = None) -> Optional[int]:
+        """
+        Détection de version (-sV) des ports ouverts dont l'état vient d'être relevé
         
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        Avec le cache, seuls les ports ouverts sans empreinte valable
+        (nouveaux, rouverts, expirés, ou équipement changé) sont analysés, les
+        autres reprennent l'empreinte du cache ("cached"). Sans backend de
+        détection de version, les services gardent le nom associé au port.
+        Les hôtes complétés sont repassés à on_host.
         
-        # Lien symbolique vers le dernier rapport
-        latest_report = self.report_dir / "latest_report.json"
-        if latest_report.exists():
-            latest_report.unlink()
+        Returns:
+            Nombre de ports analysés, None si le backend de scan les a déjà analysés
+        """
+        if self.version_scanner is self.scanner and not (use_cache and self.fingerprints is not None):
+            return None
+        cache = self.fingerprints if use_cache else None
+        if cache is not None:
+            cache.reset_metrics()
         
-        # Copier le contenu du dernier rapport
-        with open(latest_report, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        # Ports ouverts à analyser, regroupés par liste de ports identique
+        # (un appel nmap ne prend qu'une liste de ports pour tous ses hôtes)
+        to_fingerprint = {}
+        updated = set()
+        for host in hosts:
+            host_ports = []
+            for port_info in host['ports']:
+                if port_info['state'] != 'open':
+                    if cache is not None:
+                        cache.forget(host, port_info['port'])
+                    continue
+                entry = cache.lookup(host, port_info['port']) if cache is not None else None
+                if entry is None:
+                    host_ports.append(port_info['port'])
+                    continue
+                port_info.update({field: entry[field] for field in FINGERPRINT_FIELDS})
+                port_info['cached'] = True
+                updated.add(host['ip'])
+            if host_ports:
+                port_list = ','.join(str(port) for port in sorted(host_ports))
+                to_fingerprint.setdefault(port_list, []).append(host['ip'])
+        
+        if self.version_scanner is None:
+            to_fingerprint = {}
+        
+        jobs = []
+        for port_list, addresses in to_fingerprint.items():
+            jobs.extend(
+                (group, partial(self.version_scanner.scan_ports, group, port_list,
+                                detect_versions=True, assume_up=True))
+                for group in self._service_groups(addresses, self.version_scanner)
+            )
         
+        if jobs:
+            try:
+                results, _, _ = self._run_shards(jobs)
+            except RuntimeError as e:
+                # L'état des ports reste connu: le rapport est gardé sans versions
+                self.logger.error(f"Détection de version impossible: {e}")
+                results = []
+            
+            by_ip = {host['ip']: host for host in hosts}
+            for result in results:
+                host = by_ip.get(result['ip'])
+                if host is None:
+                    continue
+                analysed = {port_info['port']: port_info for port_info in result['ports']}
+                for port_info in host['ports']:
+                    fresh = analysed.get(port_info['port'])
+                    if fresh is None or port_info.get('cached'):
+                        continue
+                    port_info.update({
+                        field: fresh[field] for field in ("state",) + FINGERPRINT_FIELDS
+                    })
+                    updated.add(host['ip'])
+                    if fresh['state'] == 'open' and cache is not None:
+                        cache.store(host, port_info)
+        
+        if cache is not None:
+            cache.save()
+        if on_host is not None:
+            for host in hosts:
+                if host['ip'] in updated:
+                    on_host(host)
+        return sum(
+            len(port_list.split(',')) * len(addresses)
+            for port_list, addresses in to_fingerprint.items()
+        )
+    
+    @staticmethod
+    def _count_addresses(network: str):
+        try:
+            return ipaddress.ip_network(network, strict=False).num_addresses
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _ip_sort_key(address: str):
+        try:
+            parsed = ipaddress.ip_network(address, strict=False)
+            return (parsed.version, int(parsed.network_address), address)
+        except ValueError:
+            return (0, 0, address)
+    
+    def _save_report(self, stream: ReportStreamWriter, header: Dict, results: Dict,
+                     publish: bool = True):
+        """Termine le rapport en flux par son résumé (le dernier rapport si publish)"""
+        summary = {
+            key: value for key, value in results.items() if key != "hosts" and key not in header
+        }
+        report_file = stream.close(summary, publish)
         self.logger.info(f"Rapport sauvegardé: {report_file}")
     
     def get_last_report(self) -> Optional[Dict]:
         """Récupère le dernier rapport de scan"""
-        latest_report = self.report_dir / "latest_report.json"
-        
-        if latest_report.exists():
-            with open(latest_report, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return None
+        return load_latest_report(self.report_dir)
     
     def get_status(self) -> Dict:
         """Retourne le statut actuel du Harvester"""
@@ -297,6 +590,7 @@ class SeahawksHarvester:
             status['last_scan'] = last_report.get('timestamp')
             status['equipment_count'] = last_report['summary']['hosts_up']
             status['wan_latency_ms'] = last_report.get('wan_latency_ms')
+            status['wan_latency'] = last_report.get('wan_latency')
         
         return status
 
@@ -321,6 +615,9 @@ def main():
     print(f"  - Hotes inactifs: {results['summary']['hosts_down']}")
     print(f"  - Ports ouverts: {results['summary']['total_ports_open']}")
     print(f"  - Latence WAN: {results.get('wan_latency_ms', 'N/A')}ms")
+    wan_latency = results.get('wan_latency')
+    if wan_latency and wan_latency['received']:
+        print(f"    p95 {wan_latency['p95_ms']}ms, gigue {wan_latency['jitter_ms']}ms, perte {wan_latency['loss_percent']}%")
     
     print(f"\nRapport sauvegarde dans: {harvester.report_dir}")
     print("\nUtilisez dashboard.py pour voir l'interface web\n")
@@ -4,22 +4,82 @@ Script d'intégration Harvester → Nester
 Upload automatique des rapports de scan vers le serveur central
 """
 
+import base64
+import hashlib
 import json
+import random
+import threading
+import time
 import requests
 from pathlib import Path
 from datetime import datetime
 import logging
 
+from requests.adapters import HTTPAdapter
+
+from outbox import Outbox
+from report_delta import compute_report_delta, report_hash
+from report_stream import LATEST_REPORT, LEGACY_LATEST_REPORT, read_report_stream
+from wire_format import choose_wire_format, encode_payload
+
 
 class NesterUploader:
     """Gestionnaire d'upload vers le Nester"""
     
+    # Statuts temporaires justifiant une nouvelle tentative
+    RETRY_STATUSES = (429, 502, 503, 504)
+    # Au-delà (secondes), un heartbeat en attente n'a plus de sens
+    HEARTBEAT_TTL = 300
+    
     def __init__(self, config_path: str = "config.json"):
         self.config = self._load_config(config_path)
         self.nester_url = self.config.get("nester_url", "http://localhost:8000")
         self.franchise_id = self.config.get("franchise_id")
         
+        # Dernier rapport accepté par le Nester (base des envois différentiels)
+        self.delta_uploads = self.config.get("delta_uploads", True)
+        self.ack_file = Path(self.config.get("report_dir", "reports")) / "last_uploaded_report.json"
+        
+        # Format d'upload: négocié avec le Nester au premier envoi
+        self.upload_compression = self.config.get("upload_compression", "auto")
+        self.upload_format = self.config.get("upload_format", "auto")
+        self._wire = None
+        self._batch_max_items = 0  # Ingestion groupée annoncée par le Nester
+        self._log_bytes = False  # Logs acceptés en octets bruts (data_b64)
+        # Nester injoignable à la négociation: format de repli jusqu'au
+        # prochain contact réussi, ou au plus wire_retry_seconds
+        self.wire_retry_seconds = self.config.get("wire_retry_seconds", 300)
+        self._wire_fallback_until = None
+        
+        # Envoi incrémental des logs: curseur (inode, offset) persisté
+        self.log_file = Path(self.config.get("log_file", "logs/harvester_service.log"))
+        self.log_cursor_file = self.log_file.parent / "log_ship_cursor.json"
+        self.log_chunk_bytes = self.config.get("log_chunk_bytes", 256 * 1024)
+        self.log_initial_backlog_bytes = self.config.get("log_initial_backlog_bytes", 1024 * 1024)
+        
+        # Retentatives: backoff exponentiel avec jitter complet
+        self.http_retries = self.config.get("http_retries", 3)
+        self.http_backoff_base = self.config.get("http_backoff_base", 0.5)
+        self.http_backoff_max = self.config.get("http_backoff_max", 30)
+        
+        # File d'envoi persistante (store-and-forward)
+        self.outbox = Outbox(
+            self.config.get("outbox_dir", "outbox"),
+            max_bytes=self.config.get("outbox_max_bytes", 200 * 1024 * 1024),
+            max_age_days=self.config.get("outbox_max_age_days", 7)
+        )
+        self.outbox_batch_size = self.config.get("outbox_batch_size", 100)
+        self.outbox_batch_max_bytes = self.config.get("outbox_batch_max_bytes", 4 * 1024 * 1024)
+        self.outbox_rate = self.config.get("outbox_rate", 2.0)  # Requêtes par seconde
+        self.outbox_resume_jitter = self.config.get("outbox_resume_jitter", 30)
+        self._outbox_offline = self.outbox.size() > 0
+        # Heartbeats (thread du service) et rapports vident la même file: un
+        # seul envoi à la fois, les autres appels le lui signalent sans attendre
+        self._flush_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        
         self._setup_logging()
+        self.session = self._create_session(self.config.get("http_pool_size", 4))
     
     def _load_config(self, config_path: str):
         """Charge la configuration"""
@@ -30,6 +90,10 @@ class NesterUploader:
         """Configure le logging"""
         self.logger = logging.getLogger('NesterUploader')
         self.logger.setLevel(logging.INFO)
+        # Un seul handler même si l'uploader est recréé (rechargement de la configuration)
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
         
         handler = logging.StreamHandler()
         formatter = logging.Formatter(
@@ -38,16 +102,153 @@ class NesterUploader:
         handler.setFormatter(formatter)
         self.logger.addHandler(handler)
     
+    def _create_session(self, pool_size: int) -> requests.Session:
+        """Session HTTP keep-alive: les connexions (TCP/TLS) au Nester sont réutilisées"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
+    def close(self):
+        """Ferme les connexions ouvertes vers le Nester"""
+        self.session.close()
+    
+    def _opened_connections(self, url: str) -> int:
+        """Nombre de connexions ouvertes par la session depuis le démarrage"""
+        try:
+            pools = self.session.get_adapter(url).poolmanager.pools
+            return sum(pools[key].num_connections for key in pools.keys())
+        except Exception:
+            return 0
+    
+    def _backoff_delay(self, attempt: int, response=None) -> float:
+        """Délai avant la tentative suivante (respecte Retry-After s'il est plus long)"""
+        delay = random.uniform(0, min(self.http_backoff_max, self.http_backoff_base * 2 ** attempt))
+        
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(int(retry_after), self.http_backoff_max))
+        
+        return delay
+    
+    def _request(self, method: str, path: str, **kwargs):
+        """
+        Requête vers le Nester via la session partagée
+        
+        Les erreurs de connexion, timeouts et statuts temporaires (429, 5xx de
+        passerelle) sont retentés http_retries fois. La latence de chaque appel
+        est journalisée, avec l'ouverture éventuelle d'une nouvelle connexion.
+        
+        Returns:
+            Dernière réponse reçue
+        
+        Raises:
+            requests.RequestException: si aucune tentative n'a abouti
+        """
+        url = f"{self.nester_url}{path}"
+        
+        for attempt in range(self.http_retries + 1):
+            opened_before = self._opened_connections(url)
+            started = time.perf_counter()
+            response = None
+            
+            try:
+                response = self.session.request(method, url, **kwargs)
+                if self._opened_connections(url) > opened_before:
+                    outcome = f"{response.status_code}, nouvelle connexion"
+                else:
+                    outcome = f"{response.status_code}, connexion réutilisée"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                outcome = type(e).__name__
+                if attempt == self.http_retries:
+                    self.logger.warning(f"{method} {path} -> {outcome} (tentative {attempt + 1})")
+                    raise
+            
+            if response is not None and self._wire_fallback_until is not None:
+                # Nester de nouveau joignable: renégocier au prochain envoi
+                self._wire_fallback_until = 0
+            
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.logger.info(
+                f"{method} {path} -> {outcome} en {elapsed_ms:.1f} ms (tentative {attempt + 1})"
+            )
+            
+            if response is not None and (
+                    response.status_code not in self.RETRY_STATUSES or attempt == self.http_retries):
+                return response
+            
+            time.sleep(self._backoff_delay(attempt, response))
+        
+        return response
+    
+    def _negotiate_wire_format(self):
+        """
+        Choisit le format d'upload parmi ceux annoncés par le Nester
+        
+        Nester injoignable: le format de repli (JSON non compressé) est gardé
+        jusqu'au prochain contact réussi ou pendant wire_retry_seconds, sans
+        renégocier (et repayer les retentatives) à chaque envoi.
+        """
+        try:
+            response = self._request("GET", "/api/wire", timeout=10)
+        except Exception as e:
+            self.logger.warning(f"Négociation du format impossible: {str(e)}")
+            self._batch_max_items = 0
+            self._log_bytes = False
+            self._wire = choose_wire_format(None)
+            self._wire_fallback_until = time.monotonic() + self.wire_retry_seconds
+            return self._wire
+        
+        capabilities = response.json() if response.status_code == 200 else None
+        self._batch_max_items = (capabilities or {}).get("batch_max_items", 0)
+        self._log_bytes = bool((capabilities or {}).get("log_bytes", False))
+        
+        self._wire = choose_wire_format(
+            capabilities, self.upload_compression, self.upload_format
+        )
+        self._wire_fallback_until = None
+        self.logger.info(
+            f"Format d'upload: {self._wire[0]} ({self._wire[1]}), "
+            f"ingestion groupée: {self._batch_max_items or 'non'}"
+        )
+        return self._wire
+    
+    def _wire_format(self):
+        """Format d'upload courant, (re)négocié s'il est inconnu ou si le repli a expiré"""
+        if self._wire is None or (
+                self._wire_fallback_until is not None
+                and time.monotonic() >= self._wire_fallback_until):
+            return self._negotiate_wire_format()
+        return self._wire
+    
+    def _post_payload(self, path: str, data, timeout: int = 30):
+        """
+        Envoie un objet au Nester dans le format négocié
+        
+        Sur 415 (Nester mis à jour ou rétrogradé), le format est renégocié
+        et l'envoi retenté une fois.
+        """
+        content_type, encoding = self._wire_format()
+        body, headers = encode_payload(data, content_type, encoding)
+        response = self._request("POST", path, data=body, headers=headers, timeout=timeout)
+        
+        if response.status_code == 415:
+            content_type, encoding = self._negotiate_wire_format()
+            body, headers = encode_payload(data, content_type, encoding)
+            response = self._request("POST", path, data=body, headers=headers, timeout=timeout)
+        
+        return response, len(body)
+    
     def register_probe(self):
         """Enregistre la sonde auprès du Nester"""
         try:
-            url = f"{self.nester_url}/api/probe/register"
             data = {
                 "franchise_id": self.config.get("franchise_id"),
                 "franchise_name": self.config.get("franchise_name")
             }
             
-            response = requests.post(url, json=data, timeout=10)
+            response = self._request("POST", "/api/probe/register", json=data, timeout=10)
             
             if response.status_code in [200, 201]:
                 self.logger.info(f"Sonde enregistrée avec succès: {self.franchise_id}")
@@ -61,46 +262,361 @@ class NesterUploader:
             return False
     
     def send_heartbeat(self):
-        """Envoie un heartbeat au Nester"""
+        """Envoie un heartbeat au Nester (via la file d'envoi, voir flush_outbox)"""
+        self.outbox.append("heartbeat", {"timestamp": datetime.now().isoformat()})
+        return self.flush_outbox()
+    
+    def _deliver_heartbeat(self, entry: dict):
+        """Envoie un heartbeat en attente; ceux devenus trop vieux sont ignorés"""
+        age = datetime.now() - datetime.fromisoformat(entry['created_at'])
+        if age.total_seconds() > self.HEARTBEAT_TTL:
+            return 200
+        
+        response = self._request(
+            "POST", f"/api/probe/{self.franchise_id}/heartbeat", timeout=10
+        )
+        
+        if response.status_code == 200:
+            self.logger.info("Heartbeat envoyé avec succès")
+        else:
+            self.logger.warning(f"Erreur heartbeat: {response.status_code}")
+        return response.status_code
+    
+    def _load_acknowledged_report(self):
+        """Charge le dernier rapport accepté par le Nester, s'il existe"""
+        if not self.ack_file.exists():
+            return None
+        
         try:
-            url = f"{self.nester_url}/api/probe/{self.franchise_id}/heartbeat"
-            response = requests.post(url, timeout=10)
-            
-            if response.status_code == 200:
-                self.logger.info("Heartbeat envoyé avec succès")
-                return True
+            with open(self.ack_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _save_acknowledged_report(self, report_data: dict):
+        """
+        Mémorise le rapport accepté par le Nester
+        
+        Le rapport est déjà livré: une erreur d'écriture est seulement
+        journalisée (le prochain envoi sera complet, sans base différentielle).
+        """
+        tmp_file = self.ack_file.with_suffix('.tmp')
+        try:
+            self.ack_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(report_data, f, ensure_ascii=False, separators=(',', ':'))
+            tmp_file.replace(self.ack_file)
+        except OSError as e:
+            self.logger.error(f"Base des rapports différentiels non enregistrée: {e}")
+    
+    def _upload_report_delta(self, base: dict, report_data: dict):
+        """
+        Envoie uniquement les changements depuis le dernier rapport accepté
+        
+        Returns:
+            Statut HTTP de la réponse
+        """
+        delta = compute_report_delta(base, report_data)
+        response, size = self._post_payload(
+            f"/api/probe/{self.franchise_id}/report/delta", delta
+        )
+        
+        if response.status_code in (201, 202):
+            self.logger.info(
+                f"Rapport différentiel uploadé: {len(delta['hosts_upserted'])} hôtes modifiés, "
+                f"{len(delta['hosts_removed'])} retirés ({size} octets)"
+            )
+        elif response.status_code in [404, 409]:
+            # 409: base différente côté Nester, 404: Nester sans support différentiel
+            self.logger.warning(
+                f"Rapport différentiel refusé ({response.status_code}), envoi complet"
+            )
+        return response.status_code
+    
+    def upload_report(self, report_path: str):
+        """
+        Upload un rapport de scan vers le Nester (via la file d'envoi)
+        
+        Returns:
+            True si le rapport et tout ce qui le précédait ont été envoyés;
+            sinon il reste en file et partira au retour du Nester
+        """
+        try:
+            if report_path.endswith('.ndjson'):
+                report_data = read_report_stream(Path(report_path))
             else:
-                self.logger.warning(f"Erreur heartbeat: {response.status_code}")
-                return False
-                
+                with open(report_path, 'r', encoding='utf-8') as f:
+                    report_data = json.load(f)
         except Exception as e:
-            self.logger.error(f"Erreur lors du heartbeat: {str(e)}")
+            self.logger.error(f"Erreur lors de la lecture du rapport: {str(e)}")
             return False
+        
+        if report_data is None or 'scan_progress' in report_data:
+            self.logger.warning(f"Rapport incomplet (scan en cours ou interrompu): {report_path}")
+            return False
+        
+        return self.upload_report_data(report_data)
     
-    def upload_report(self, report_path: str):
-        """Upload un rapport de scan vers le Nester"""
+    def upload_report_data(self, report_data: dict):
+        """Upload un rapport déjà en mémoire (service: rapport du scan qui vient de finir)"""
+        self.outbox.append("report", report_data)
+        return self.flush_outbox()
+    
+    def _deliver_report(self, entry: dict):
+        """Envoie un rapport en attente (différentiel si possible)"""
+        report_data = entry['payload']
+        
+        base = self._load_acknowledged_report() if self.delta_uploads else None
+        if base is not None:
+            if report_hash(base) == report_hash(report_data):
+                self.logger.info("Rapport inchangé depuis le dernier envoi")
+                return 200
+            status = self._upload_report_delta(base, report_data)
+            if status in (201, 202):
+                self._save_acknowledged_report(report_data)
+            if status not in [404, 409]:
+                return status
+        
+        response, size = self._post_payload(
+            f"/api/probe/{self.franchise_id}/report", report_data
+        )
+        
+        if response.status_code in (201, 202):
+            self.logger.info(
+                f"Rapport uploadé avec succès: {report_data.get('scan_id')} ({size} octets)"
+            )
+            if self.delta_uploads:
+                self._save_acknowledged_report(report_data)
+        else:
+            self.logger.error(f"Erreur upload rapport: {response.status_code}")
+        return response.status_code
+    
+    def _deliver(self, entry: dict):
+        """
+        Envoie une entrée de la file d'envoi
+        
+        Returns:
+            Statut HTTP, ou None si le Nester est injoignable
+        """
+        deliver = {
+            "heartbeat": self._deliver_heartbeat,
+            "report": self._deliver_report,
+            "logs": self._deliver_logs
+        }.get(entry['kind'])
+        
+        if deliver is None:
+            self.logger.error(f"Entrée inconnue dans la file d'envoi: {entry['kind']}")
+            return 400
+        
         try:
-            with open(report_path, 'r', encoding='utf-8') as f:
-                report_data = json.load(f)
+            return deliver(entry)
+        except requests.RequestException as e:
+            self.logger.warning(f"Nester injoignable: {str(e)}")
+            return None
+    
+    def _deliver_batch(self, entries: list):
+        """
+        Envoie plusieurs entrées en une requête POST /api/ingest/batch
+        
+        Les rapports sont envoyés en différentiels chaînés à partir du dernier
+        rapport accepté. Si un différentiel est refusé (409), l'envoi s'arrête
+        à cette entrée, qui est renvoyée seule (rapport complet).
+        
+        Returns:
+            Statuts des premières entrées traitées, dans l'ordre (None si le
+            Nester est injoignable); liste vide pour revenir à l'envoi unitaire
+        """
+        # Lot borné en taille (au moins une entrée)
+        size = 0
+        for count, entry in enumerate(entries):
+            size += entry['size']
+            if count and size > self.outbox_batch_max_bytes:
+                entries = entries[:count]
+                break
+        
+        base = self._load_acknowledged_report() if self.delta_uploads else None
+        base_hash = report_hash(base) if base is not None else None
+        items = []
+        plan = []  # Par entrée: (statut local, None) ou (None, indice de l'élément)
+        
+        for entry in entries:
+            kind = entry['kind']
+            if kind == "heartbeat":
+                age = datetime.now() - datetime.fromisoformat(entry['created_at'])
+                if age.total_seconds() > self.HEARTBEAT_TTL:
+                    plan.append((200, None))
+                    continue
+                item = {"type": "heartbeat"}
+            elif kind == "report":
+                report_data = entry['payload']
+                target_hash = report_hash(report_data)
+                if base is None:
+                    item = {"type": "report", "data": report_data}
+                elif target_hash == base_hash:
+                    plan.append((200, None))
+                    continue
+                else:
+                    item = {
+                        "type": "report_delta",
+                        "data": compute_report_delta(base, report_data, base_hash)
+                    }
+                if self.delta_uploads:
+                    base, base_hash = report_data, target_hash
+            elif kind == "logs":
+                item = {"type": "logs", "data": self._log_payload(entry['payload'])}
+            else:
+                plan.append((400, None))
+                continue
             
-            url = f"{self.nester_url}/api/probe/{self.franchise_id}/report"
-            response = requests.post(url, json=report_data, timeout=30)
+            item.update(id=entry['seq'], franchise_id=self.franchise_id)
+            plan.append((None, len(items)))
+            items.append(item)
+        
+        results = []
+        if items:
+            try:
+                response, size = self._post_payload("/api/ingest/batch", {"items": items})
+            except requests.RequestException as e:
+                self.logger.warning(f"Nester injoignable: {str(e)}")
+                return [None]
             
-            if response.status_code == 201:
-                self.logger.info(f"Rapport uploadé avec succès: {report_path}")
+            if response.status_code in (404, 405, 413):
+                # Nester sans ingestion groupée, ou lot trop gros: envoi unitaire
+                self.logger.warning(f"Ingestion groupée refusée ({response.status_code})")
+                self._batch_max_items = 0
+                return []
+            if response.status_code != 200:
+                return [response.status_code]
+            
+            results = response.json()['results']
+            self.logger.info(
+                f"Lot envoyé: {len(items)} éléments ({size} octets), "
+                f"{response.json()['accepted']} acceptés"
+            )
+        
+        statuses = []
+        accepted_report = None
+        for entry, (local_status, item_index) in zip(entries, plan):
+            if item_index is None:
+                statuses.append(local_status)
+                continue
+            
+            result = results[item_index]
+            if result['status'] == 409:
+                # Base désynchronisée: cette entrée repart seule, en rapport complet
+                if accepted_report is not None:
+                    self._save_acknowledged_report(accepted_report)
+                statuses.append(self._deliver(entry))
+                return statuses
+            
+            if result['status'] in (201, 202) and entry['kind'] == "report":
+                accepted_report = entry['payload']
+            statuses.append(result['status'])
+        
+        if accepted_report is not None and self.delta_uploads:
+            self._save_acknowledged_report(accepted_report)
+        return statuses
+    
+    def flush_outbox(self):
+        """
+        Vide la file d'envoi dans l'ordre, par lots et à débit limité
+        
+        Si le Nester l'annonce, chaque lot part en une seule requête
+        d'ingestion groupée; sinon les entrées sont envoyées une à une. Au
+        retour du Nester après une coupure, l'envoi démarre après un délai
+        aléatoire pour étaler la reprise des franchises. Une entrée refusée
+        définitivement (4xx) est retirée de la file; une erreur temporaire
+        (réseau, 408, 429, 5xx) interrompt l'envoi jusqu'au prochain appel,
+        seules les entrées concernées restant en file.
+        
+        Un seul envoi a lieu à la fois, sans bloquer les autres appelants
+        (délai de reprise et backoff compris): un appel pendant un envoi en
+        cours lui demande de repasser sur la file et rend la main aussitôt.
+        
+        Returns:
+            True si la file est vide, False si le Nester est indisponible,
+            None si l'envoi est laissé à celui déjà en cours
+        """
+        self._flush_requested.set()
+        flushed = None
+        while self._flush_requested.is_set() and flushed is not False:
+            if not self._flush_lock.acquire(blocking=False):
+                return flushed
+            try:
+                self._flush_requested.clear()
+                flushed = self._flush_outbox()
+            finally:
+                self._flush_lock.release()
+        return flushed
+    
+    def _flush_outbox(self):
+        if self._outbox_offline and self.outbox_resume_jitter > 0:
+            delay = random.uniform(0, self.outbox_resume_jitter)
+            self.logger.info(f"Reprise de l'envoi de la file dans {delay:.1f}s")
+            time.sleep(delay)
+        
+        min_interval = 1.0 / self.outbox_rate if self.outbox_rate > 0 else 0
+        last_sent = None
+        
+        while True:
+            self._wire_format()
+            
+            limit = min(self.outbox_batch_size, self._batch_max_items) or 1
+            batch = self.outbox.pending(limit=limit)
+            if not batch:
+                self._outbox_offline = False
                 return True
+            
+            if last_sent is not None:
+                wait = min_interval - (time.monotonic() - last_sent)
+                if wait > 0:
+                    time.sleep(wait)
+            last_sent = time.monotonic()
+            
+            if len(batch) > 1:
+                statuses = self._deliver_batch(batch)
             else:
-                self.logger.error(f"Erreur upload rapport: {response.status_code}")
-                return False
+                statuses = [self._deliver(batch[0])]
+            
+            # Toute entrée traitée est acquittée, même après une entrée à renvoyer
+            acked_seq = None
+            delivered = 0
+            later_seqs = []
+            later_delivered = 0
+            unavailable = False
+            for entry, status in zip(batch, statuses):
+                if status is None or status in (408, 429) or status >= 500:
+                    unavailable = True
+                    continue
                 
-        except Exception as e:
-            self.logger.error(f"Erreur lors de l'upload: {str(e)}")
-            return False
+                if status >= 400:
+                    self.logger.error(
+                        f"Entrée {entry['seq']} ({entry['kind']}) refusée ({status}), abandonnée"
+                    )
+                if unavailable:
+                    later_seqs.append(entry['seq'])
+                    later_delivered += status < 400
+                else:
+                    acked_seq = entry['seq']
+                    delivered += status < 400
+            
+            if acked_seq is not None:
+                self.outbox.ack(acked_seq, delivered)
+            if later_seqs:
+                self.outbox.ack_entries(later_seqs, later_delivered)
+            if unavailable:
+                self._outbox_offline = True
+                self.logger.warning(
+                    f"Nester indisponible, {self.outbox.size()} entrées en attente"
+                )
+                return False
     
     def sync_latest_report(self):
         """Synchronise le dernier rapport avec le Nester"""
         report_dir = Path(self.config.get("report_dir", "reports"))
-        latest_report = report_dir / "latest_report.json"
+        latest_report = report_dir / LATEST_REPORT
+        if not latest_report.exists():
+            latest_report = report_dir / LEGACY_LATEST_REPORT
         
         if not latest_report.exists():
             self.logger.warning("Aucun rapport à synchroniser")
@@ -108,41 +624,190 @@ class NesterUploader:
         
         return self.upload_report(str(latest_report))
     
-    def sync_logs(self, max_lines: int = 500):
-        """Upload les logs récents vers le Nester"""
+    LOG_HEAD_BYTES = 1024  # Début du fichier mémorisé pour détecter une troncature
+    
+    def _load_log_cursor(self):
+        """Charge le curseur du dernier octet de log accepté par le Nester"""
+        if not self.log_cursor_file.exists():
+            return None
+        
         try:
-            log_file = Path("logs/harvester_service.log")
-            
-            if not log_file.exists():
+            with open(self.log_cursor_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _save_log_cursor(self, path: Path, offset: int, generation: int):
+        """Mémorise le curseur (inode, génération, offset, empreinte du début du fichier)"""
+        head_length = min(offset, self.LOG_HEAD_BYTES)
+        cursor = {
+            "inode": path.stat().st_ino,
+            "generation": generation,
+            "offset": offset,
+            "head_length": head_length,
+            "head": self._file_head(path, head_length)
+        }
+        
+        tmp_file = self.log_cursor_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(cursor, f)
+        tmp_file.replace(self.log_cursor_file)
+    
+    @staticmethod
+    def _file_head(path: Path, length: int) -> str:
+        """Empreinte des premiers octets d'un fichier"""
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read(length)).hexdigest()
+    
+    def _find_rotated_log(self, inode: int):
+        """Retrouve le fichier renommé par la rotation (harvester_service.log.1...)"""
+        for candidate in self.log_file.parent.glob(f"{self.log_file.name}.*"):
+            try:
+                if candidate.is_file() and candidate.stat().st_ino == inode:
+                    return candidate
+            except OSError:
+                continue
+        return None
+    
+    def _pending_log_segments(self, cursor):
+        """
+        Segments de log restant à envoyer, dans l'ordre
+        
+        La génération change quand un fichier est tronqué sur place: le même
+        inode porte alors un nouveau contenu.
+        
+        Returns:
+            Liste de (fichier, génération, offset de départ, fichier terminé)
+        """
+        size = self.log_file.stat().st_size
+        
+        if cursor is None:
+            # Premier envoi: seulement la fin récente, à partir d'un début de ligne
+            offset = max(size - self.log_initial_backlog_bytes, 0)
+            if offset:
+                with open(self.log_file, 'rb') as f:
+                    f.seek(offset)
+                    offset += len(f.readline())
+            return [(self.log_file, 0, offset, False)]
+        
+        segments = []
+        generation = cursor.get('generation', 0)
+        if cursor['inode'] != self.log_file.stat().st_ino:
+            # Rotation par renommage: on termine l'ancien fichier s'il est retrouvé
+            rotated = self._find_rotated_log(cursor['inode'])
+            if rotated is not None:
+                segments.append((rotated, generation, cursor['offset'], True))
+            segments.append((self.log_file, 0, 0, False))
+        elif (size < cursor['offset']
+                or self._file_head(self.log_file, cursor['head_length']) != cursor['head']):
+            # Fichier tronqué (copytruncate) ou réécrit: on repart du début
+            segments.append((self.log_file, generation + 1, 0, False))
+        else:
+            segments.append((self.log_file, generation, cursor['offset'], False))
+        
+        return segments
+    
+    @staticmethod
+    def _read_log_chunks(path: Path, offset: int, chunk_bytes: int, complete: bool):
+        """
+        Lit un fichier de log par morceaux bornés, coupés en fin de ligne
+        
+        La dernière ligne, possiblement en cours d'écriture, n'est envoyée que
+        si le fichier est terminé (rotation).
+        
+        Yields:
+            (offset du morceau, octets)
+        """
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            while True:
+                data = f.read(chunk_bytes)
+                if not data:
+                    return
+                
+                cut = data.rfind(b'\n') + 1
+                if cut == 0:
+                    if len(data) < chunk_bytes and not complete:
+                        return
+                    cut = len(data)  # Ligne plus longue qu'un morceau, ou fin de fichier terminé
+                
+                yield offset, data[:cut]
+                offset += cut
+                f.seek(offset)
+    
+    def sync_logs(self, max_chunk_bytes: int = None):
+        """
+        Envoie au Nester les logs écrits depuis le dernier passage
+        
+        Chaque morceau est placé dans la file d'envoi avant que le curseur
+        n'avance: une coupure du Nester ou une rotation du fichier ne fait
+        rien perdre, et le Nester ignore les morceaux déjà reçus.
+        """
+        try:
+            if not self.log_file.exists():
                 self.logger.warning("Fichier de logs introuvable")
                 return False
             
-            # Lire les dernières lignes
-            with open(log_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                recent_logs = lines[-max_lines:] if len(lines) > max_lines else lines
-            
-            # Préparer les données
-            log_data = {
-                'timestamp': datetime.now().isoformat(),
-                'lines': ''.join(recent_logs),
-                'total_lines': len(lines),
-                'sent_lines': len(recent_logs)
-            }
-            
-            url = f"{self.nester_url}/api/probe/{self.franchise_id}/logs"
-            response = requests.post(url, json=log_data, timeout=30)
+            chunk_bytes = max_chunk_bytes or self.log_chunk_bytes
+            cursor = self._load_log_cursor()
+            queued_chunks = 0
+            queued_bytes = 0
             
-            if response.status_code in [200, 201]:
-                self.logger.info(f"Logs uploadés avec succès ({len(recent_logs)} lignes)")
-                return True
-            else:
-                self.logger.error(f"Erreur upload logs: {response.status_code}")
-                return False
+            for path, generation, offset, complete in self._pending_log_segments(cursor):
+                inode = path.stat().st_ino
+                end_offset = offset
                 
+                for chunk_offset, data in self._read_log_chunks(path, offset, chunk_bytes, complete):
+                    # Octets bruts: les offsets restent exacts même hors UTF-8 valide
+                    log_data = {
+                        'timestamp': datetime.now().isoformat(),
+                        'source': self.log_file.name,
+                        'inode': inode,
+                        'generation': generation,
+                        'offset': chunk_offset,
+                        'end_offset': chunk_offset + len(data),
+                        'data_b64': base64.b64encode(data).decode('ascii'),
+                        'sent_lines': data.count(b'\n')
+                    }
+                    
+                    self.outbox.append("logs", log_data)
+                    end_offset = log_data['end_offset']
+                    self._save_log_cursor(path, end_offset, generation)
+                    queued_chunks += 1
+                    queued_bytes += len(data)
+                
+                if not complete:
+                    # Le curseur suit le fichier courant, même sans nouveau log
+                    self._save_log_cursor(path, end_offset, generation)
+            
+            if queued_chunks:
+                self.logger.info(f"Logs mis en file ({queued_bytes} octets, {queued_chunks} morceaux)")
+            
         except Exception as e:
-            self.logger.error(f"Erreur lors de l'upload des logs: {str(e)}")
+            self.logger.error(f"Erreur lors de la lecture des logs: {str(e)}")
             return False
+        
+        return self.flush_outbox()
+    
+    def _log_payload(self, log_data: dict) -> dict:
+        """Morceau de logs tel qu'envoyé: en texte pour un Nester sans log_bytes"""
+        if 'data_b64' not in log_data or self._log_bytes:
+            return log_data
+        payload = {key: value for key, value in log_data.items() if key != 'data_b64'}
+        payload['lines'] = base64.b64decode(log_data['data_b64']).decode('utf-8', errors='replace')
+        return payload
+    
+    def _deliver_logs(self, entry: dict):
+        """Envoie un morceau de logs en attente"""
+        response, _ = self._post_payload(
+            f"/api/probe/{self.franchise_id}/logs", self._log_payload(entry['payload'])
+        )
+        
+        if response.status_code in [200, 201, 202]:
+            self.logger.info(f"Logs uploadés avec succès ({entry['payload']['sent_lines']} lignes)")
+        else:
+            self.logger.error(f"Erreur upload logs: {response.status_code}")
+        return response.status_code
 
 
 def main():
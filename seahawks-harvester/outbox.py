@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+File d'envoi persistante Harvester → Nester (store-and-forward)
+Journal append-only de rapports, heartbeats et morceaux de logs en attente
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+
+class Outbox:
+    """
+    File d'envoi sur disque, bornée en taille et en âge
+    
+    Les entrées sont ajoutées à des segments JSON Lines (<premier seq>.jsonl)
+    et jamais réécrites. Un curseur (ack.json) mémorise le dernier numéro de
+    séquence accepté par le Nester, et les entrées acceptées au-delà (après
+    une entrée encore en attente); les segments entièrement acquittés sont
+    supprimés. Au-delà de max_bytes, les plus anciens segments sont
+    abandonnés même s'ils n'ont pas été envoyés.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int = 200 * 1024 * 1024,
+                 max_age_days: float = 7, segment_bytes: int = 4 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ack_file = self.directory / "ack.json"
+        
+        self.max_bytes = max_bytes
+        self.max_age = timedelta(days=max_age_days)
+        self.segment_bytes = segment_bytes
+        
+        self._lock = threading.Lock()
+        self._acked, self._done = self._load_ack()
+        self._repair_tail()
+        self._next_seq = self._find_last_seq() + 1
+        # Position de lecture (premier seq du segment, offset): les entrées
+        # avant elle sont acquittées et ne sont plus relues par pending()
+        self._read_from = (0, 0)
+        
+        self.metrics = {"appended": 0, "delivered": 0, "expired": 0, "dropped": 0}
+    
+    def _segments(self) -> list:
+        """Segments triés par numéro de séquence de départ"""
+        segments = []
+        for path in self.directory.glob("*.jsonl"):
+            try:
+                segments.append((int(path.stem), path))
+            except ValueError:
+                continue
+        return [path for _, path in sorted(segments)]
+    
+    def _load_ack(self):
+        """Curseur et entrées acquittées au-delà: (seq, ensemble de seq)"""
+        if not self.ack_file.exists():
+            return 0, set()
+        try:
+            with open(self.ack_file, 'r', encoding='utf-8') as f:
+                ack = json.load(f)
+            return ack['seq'], set(ack.get('done', []))
+        except (OSError, ValueError, KeyError):
+            return 0, set()
+    
+    def _write_ack(self, seq: int):
+        # Le curseur franchit les entrées déjà acquittées qui le suivent
+        while seq + 1 in self._done:
+            seq += 1
+        self._acked = seq
+        self._done = {done for done in self._done if done > seq}
+        
+        tmp_file = self.ack_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"seq": seq, "done": sorted(self._done)}, f)
+        tmp_file.replace(self.ack_file)
+    
+    def _repair_tail(self):
+        """Tronque une dernière ligne incomplète (arrêt brutal pendant une écriture)"""
+        segments = self._segments()
+        if not segments:
+            return
+        
+        with open(segments[-1], 'rb+') as f:
+            data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end != len(data):
+                f.truncate(end)
+    
+    def _find_last_seq(self) -> int:
+        """Dernier numéro de séquence écrit (relu depuis le dernier segment non vide)"""
+        for path in reversed(self._segments()):
+            entries = [entry for _, entry in self._read_segment(path)]
+            if entries:
+                return max(self._acked, entries[-1]['seq'])
+        return self._acked
+    
+    @staticmethod
+    def _read_segment(path: Path, offset: int = 0) -> Iterator[Tuple[int, Dict]]:
+        """
+        Entrées d'un segment à partir de offset, avec leur taille en octets
+        
+        Yields:
+            (offset de fin de ligne, entrée); une ligne illisible est ignorée
+        """
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                offset += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                entry['size'] = len(line)
+                yield offset, entry
+    
+    def append(self, kind: str, payload: Dict) -> int:
+        """
+        Ajoute une entrée à la file (écriture synchronisée sur disque)
+        
+        Args:
+            kind: 'report', 'heartbeat' ou 'logs'
+            payload: Données à envoyer
+        
+        Returns:
+            Numéro de séquence de l'entrée
+        """
+        with self._lock:
+            seq = self._next_seq
+            line = json.dumps({
+                "seq": seq,
+                "kind": kind,
+                "created_at": datetime.now().isoformat(),
+                "payload": payload
+            }, ensure_ascii=False, separators=(',', ':')) + '\n'
+            
+            segments = self._segments()
+            segment = segments[-1] if segments else None
+            if segment is None or segment.stat().st_size >= self.segment_bytes:
+                segment = self.directory / f"{seq:012d}.jsonl"
+            
+            with open(segment, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            
+            self._next_seq += 1
+            self.metrics['appended'] += 1
+            self._enforce_size_limit()
+            return seq
+    
+    def _enforce_size_limit(self):
+        """Abandonne les plus anciens segments au-delà de max_bytes (le courant est gardé)"""
+        segments = self._segments()
+        total = sum(path.stat().st_size for path in segments)
+        
+        for path, following in zip(segments, segments[1:]):
+            if total <= self.max_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink()
+            
+            # Les entrées abandonnées sont considérées comme acquittées
+            last_seq = int(following.stem) - 1
+            if last_seq > self._acked:
+                first_seq = max(self._acked, int(path.stem) - 1)
+                already_done = sum(1 for done in self._done if first_seq < done <= last_seq)
+                self.metrics['dropped'] += last_seq - first_seq - already_done
+                self._write_ack(last_seq)
+    
+    def pending(self, limit: Optional[int] = None) -> list:
+        """
+        Entrées non acquittées, dans l'ordre
+        
+        Les entrées en tête de file plus anciennes que max_age sont acquittées
+        sans envoi. La lecture reprend après la dernière entrée acquittée
+        déjà lue: les segments ne sont pas relus depuis le début à chaque appel.
+        """
+        cutoff = (datetime.now() - self.max_age).isoformat()
+        entries = []
+        expired_seq = None
+        
+        with self._lock:
+            for path in self._segments():
+                first_seq = int(path.stem)
+                if first_seq < self._read_from[0]:
+                    continue
+                offset = self._read_from[1] if first_seq == self._read_from[0] else 0
+                for end, entry in self._read_segment(path, offset):
+                    if entry['seq'] <= self._acked:
+                        self._read_from = (first_seq, end)
+                        continue
+                    if entry['seq'] in self._done:
+                        continue
+                    if not entries and entry['created_at'] < cutoff:
+                        expired_seq = entry['seq']
+                        self.metrics['expired'] += 1
+                        continue
+                    entries.append(entry)
+                    if limit is not None and len(entries) >= limit:
+                        break
+                if limit is not None and len(entries) >= limit:
+                    break
+        
+        if expired_seq is not None:
+            self.ack(expired_seq, delivered=0)
+        return entries
+    
+    def ack(self, seq: int, delivered: int = 1):
+        """Acquitte toutes les entrées jusqu'à seq inclus et supprime les segments terminés"""
+        with self._lock:
+            if seq <= self._acked:
+                return
+            self.metrics['delivered'] += delivered
+            self._write_ack(seq)
+            self._delete_acked_segments()
+    
+    def ack_entries(self, seqs, delivered: int = 0):
+        """
+        Acquitte des entrées isolées, traitées après une entrée encore en attente
+        
+        pending() ne les renvoie plus; le curseur les franchit dès que les
+        entrées qui les précèdent sont acquittées.
+        """
+        with self._lock:
+            self._done.update(seq for seq in seqs if seq > self._acked)
+            self.metrics['delivered'] += delivered
+            self._write_ack(self._acked)
+            self._delete_acked_segments()
+    
+    def _delete_acked_segments(self):
+        # Un segment est terminé quand le suivant commence après le curseur
+        segments = self._segments()
+        for path, following in zip(segments, segments[1:]):
+            if int(following.stem) - 1 > self._acked:
+                break
+            path.unlink()
+        if segments and self._next_seq - 1 <= self._acked:
+            segments[-1].unlink()
+    
+    def size(self) -> int:
+        """Nombre d'entrées en attente"""
+        with self._lock:
+            return self._next_seq - 1 - self._acked - len(self._done)
+    
+    def stats(self) -> Dict:
+        """État de la file pour le log de service"""
+        with self._lock:
+            size = sum(path.stat().st_size for path in self._segments())
+        return {"pending": self.size(), "bytes": size, **self.metrics}
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Différentiel de rapports Harvester → Nester
+Calcule ce qui a changé depuis le dernier rapport accepté par le Nester
+"""
+
+import hashlib
+import json
+from typing import Dict, Optional
+
+
+def report_hash(report: Dict) -> str:
+    """
+    Empreinte SHA-256 d'un rapport, indépendante de l'ordre des clés et des hôtes
+    
+    Doit rester identique à report_hash() côté Nester (report_delta.py).
+    """
+    canonical = dict(report)
+    canonical['hosts'] = sorted(report.get('hosts', []), key=lambda h: h.get('ip', ''))
+    payload = json.dumps(canonical, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def compute_report_delta(base: Dict, report: Dict, base_hash: Optional[str] = None) -> Dict:
+    """
+    Calcule le différentiel entre le dernier rapport accepté et le nouveau
+    
+    Les hôtes sont indexés par IP; un hôte ajouté ou modifié (état, ports,
+    services...) est renvoyé en entier dans hosts_upserted.
+    
+    Args:
+        base: Dernier rapport accepté par le Nester
+        report: Nouveau rapport
+        base_hash: Empreinte de base si déjà connue
+    
+    Returns:
+        Différentiel {base_hash, target_hash, set, unset, hosts_upserted, hosts_removed}
+    """
+    set_fields = {
+        key: value for key, value in report.items()
+        if key != 'hosts' and base.get(key, object()) != value
+    }
+    unset_fields = [key for key in base if key != 'hosts' and key not in report]
+    
+    base_hosts = {h.get('ip'): h for h in base.get('hosts', [])}
+    new_hosts = {h.get('ip'): h for h in report.get('hosts', [])}
+    
+    upserted = [host for ip, host in new_hosts.items() if base_hosts.get(ip) != host]
+    removed = [ip for ip in base_hosts if ip not in new_hosts]
+    
+    return {
+        "base_hash": base_hash or report_hash(base),
+        "target_hash": report_hash(report),
+        "set": set_fields,
+        "unset": unset_fields,
+        "hosts_upserted": upserted,
+        "hosts_removed": removed
+    }
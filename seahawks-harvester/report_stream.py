@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Rapports de scan en flux (NDJSON)
+Chaque hôte est écrit dès qu'il est connu, le résumé en fin de fichier
+"""
+
+import ipaddress
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+
+# Scan en cours et dernier scan terminé: liens physiques vers scan_report_<ts>.ndjson
+CURRENT_SCAN = "current_scan.ndjson"
+LATEST_REPORT = "latest_report.ndjson"
+# Format des versions précédentes (un document JSON par rapport)
+LEGACY_LATEST_REPORT = "latest_report.json"
+
+
+def _ip_sort_key(address: str):
+    try:
+        parsed = ipaddress.ip_address(address)
+        return (parsed.version, int(parsed), address)
+    except ValueError:
+        return (0, 0, address)
+
+
+def _link(target: Path, link: Path, copy: bool = False):
+    """Fait pointer link sur target (remplacement atomique), copie si demandé à défaut de lien"""
+    tmp_link = link.with_name(link.name + '.tmp')
+    tmp_link.unlink(missing_ok=True)
+    try:
+        os.link(target, tmp_link)
+    except OSError:
+        if not copy:
+            return
+        shutil.copyfile(target, tmp_link)
+    os.replace(tmp_link, link)
+
+
+class ReportStreamWriter:
+    """
+    Écriture incrémentale d'un rapport de scan
+    
+    Le fichier commence par une ligne "header" (identité du scan), suivie
+    d'une ligne "host" par hôte dès qu'il est découvert ou scanné, et de
+    lignes "phase" à chaque étape; la ligne "summary" (résumé, durées) le
+    termine. Un même hôte peut être réécrit quand ses informations se
+    complètent: la dernière ligne d'une IP fait foi. Chaque ligne est
+    écrite d'un bloc, un lecteur voit donc le scan progresser.
+    
+    Sûr entre threads (les backends rappellent depuis leurs workers).
+    """
+    
+    def __init__(self, report_dir: Path, header: Dict):
+        self.report_dir = Path(report_dir)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.path = self.report_dir / f"scan_report_{timestamp}.ndjson"
+        self.hosts_written = 0
+        
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._write({"type": "header", **header})
+        _link(self.path, self.report_dir / CURRENT_SCAN)
+    
+    def _write(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+    
+    def host(self, host: Dict):
+        """Écrit (ou réécrit) un hôte"""
+        self._write({"type": "host", **host})
+        self.hosts_written += 1
+    
+    def phase(self, name: str, **info):
+        """Marque le début d'une étape du scan (lue comme progression)"""
+        self._write({"type": "phase", "phase": name, "at": datetime.now().isoformat(), **info})
+    
+    def close(self, summary: Dict, publish: bool = True) -> Path:
+        """
+        Termine le rapport par son résumé
+        
+        Args:
+            summary: Champs du rapport hors en-tête et hôtes
+            publish: En faire le dernier rapport (faux pour un scan en erreur)
+        
+        Returns:
+            Chemin du rapport
+        """
+        if self._file.closed:
+            return self.path
+        self._write({"type": "summary", **summary})
+        with self._lock:
+            os.fsync(self._file.fileno())
+            self._file.close()
+        
+        if publish:
+            _link(self.path, self.report_dir / LATEST_REPORT, copy=True)
+        (self.report_dir / CURRENT_SCAN).unlink(missing_ok=True)
+        return self.path
+
+
+def read_report_stream(path: Path) -> Optional[Dict]:
+    """
+    Relit un rapport en flux sous forme de rapport complet
+    
+    Les hôtes sont triés par adresse IP. Un rapport sans ligne "summary"
+    (scan en cours ou interrompu) porte un champ scan_progress (étape,
+    hôtes vus) à la place du résumé. Une dernière ligne incomplète, en
+    cours d'écriture, est ignorée.
+    
+    Returns:
+        Le rapport, ou None si le fichier n'existe pas ou n'a pas d'en-tête
+    """
+    try:
+        f = open(path, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        return None
+    
+    report = None
+    hosts = {}
+    summary = None
+    phase = None
+    with f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            record = json.loads(line)
+            kind = record.pop('type')
+            if kind == "header":
+                report = record
+            elif kind == "host":
+                hosts[record['ip']] = record
+            elif kind == "phase":
+                phase = record
+            elif kind == "summary":
+                summary = record
+    
+    if report is None:
+        return None
+    report['hosts'] = [hosts[ip] for ip in sorted(hosts, key=_ip_sort_key)]
+    if summary is not None:
+        report.update(summary)
+    else:
+        report['scan_progress'] = {
+            "phase": phase['phase'] if phase else None,
+            "phase_started_at": phase['at'] if phase else None,
+            "hosts_seen": len(hosts)
+        }
+    return report
+
+
+def load_latest_report(report_dir: Path) -> Optional[Dict]:
+    """Dernier rapport terminé (flux NDJSON, ou ancien latest_report.json)"""
+    report_dir = Path(report_dir)
+    report = read_report_stream(report_dir / LATEST_REPORT)
+    if report is not None:
+        return report
+    
+    legacy_report = report_dir / LEGACY_LATEST_REPORT
+    if legacy_report.exists():
+        with open(legacy_report, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return None
+
+
+def load_current_scan(report_dir: Path) -> Optional[Dict]:
+    """Rapport partiel du scan en cours, ou None si aucun scan ne tourne"""
+    return read_report_stream(Path(report_dir) / CURRENT_SCAN)
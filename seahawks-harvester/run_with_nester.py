@@ -1,32 +1,54 @@
 #!/usr/bin/env python3
 """
 Script pour lancer le Harvester avec intégration Nester
+Service de longue durée: scans, heartbeats et envois dans un seul processus
 """
 import time
-import subprocess
 import json
 import logging
-import psutil
+import signal
+import threading
+from collections import deque
 from datetime import datetime
 from pathlib import Path
+
+from async_scanner import AsyncProbeEngine
+from harvester import SeahawksHarvester
 from nester_integration import NesterUploader
+from scheduler import SCHEDULER_SETTINGS, ScanScheduler, franchise_phase
+from wan_monitor import WanMonitor
+
+try:
+    import psutil
+except ImportError:  # Métriques système optionnelles
+    psutil = None
 
-# Configuration du logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/harvester_service.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# Surcoûts de cycle gardés pour la moyenne affichée
+OVERHEAD_SAMPLES = 100
+
+
+def setup_logging():
+    """Configure le logging du service (console et logs/harvester_service.log)"""
+    Path('logs').mkdir(exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('logs/harvester_service.log'),
+            logging.StreamHandler()
+        ]
+    )
+
 def get_system_metrics():
     """Collecte les métriques système"""
+    if psutil is None:
+        return None
     try:
         return {
-            'cpu_percent': psutil.cpu_percent(interval=1),
+            # Charge CPU depuis l'appel précédent (le cycle précédent), sans attente
+            'cpu_percent': psutil.cpu_percent(interval=None),
             'memory_percent': psutil.virtual_memory().percent,
             'disk_percent': psutil.disk_usage('/').percent,
             'timestamp': datetime.now().isoformat()
@@ -35,86 +57,354 @@ def get_system_metrics():
         logger.error(f"Erreur collecte métriques: {e}")
         return None
 
-def main():
-    logger.info("=" * 60)
-    logger.info("Demarrage du service Seahawks Harvester")
-    logger.info("=" * 60)
+
+class HarvesterDaemon:
+    """
+    Service du Harvester: une seule instance de SeahawksHarvester et de
+    NesterUploader pour toute la durée de vie du processus
     
-    # Créer dossier logs
-    Path('logs').mkdir(exist_ok=True)
+    Les imports, la configuration, les loggers, le cache d'empreintes et la
+    session HTTP vers le Nester sont gardés d'un cycle à l'autre (l'ancien
+    service relançait « python harvester.py » à chaque scan). config.json est
+    relu entre deux cycles quand il change (ou sur SIGHUP); une configuration
+    invalide est ignorée et l'ancienne reste en service.
     
-    # Charger la config
-    with open('config.json', 'r') as f:
-        config = json.load(f)
+    Les scans suivent le ScanScheduler (échéances sans dérive, décalées par
+    franchise, intervalle adaptatif); les heartbeats partent d'un thread à
+    leur propre cadence, y compris pendant un scan. Le WanMonitor échantillonne
+    la latence WAN en continu entre les scans; chaque rapport en porte les
+    résumés.
+    """
     
-    nester_url = config.get('nester_url')
-    if not nester_url:
-        logger.error("nester_url non configuré dans config.json")
-        return
+    def __init__(self, config_path: str = "config.json", config_check_interval: float = 5):
+        self.config_path = Path(config_path)
+        self.config_check_interval = config_check_interval
+        self.config = None
+        self.harvester = None
+        self.uploader = None
+        self.scheduler = None
+        self._scheduler_settings = None
+        self.wan_monitor = None
+        self._wan_monitor_settings = None
+        self.cycles = 0
+        self.overheads = deque(maxlen=OVERHEAD_SAMPLES)
+        
+        self._config_mtime = None
+        self._stop = threading.Event()
+        self._reload = threading.Event()
+        self._heartbeats = None  # (thread, événement d'arrêt) des heartbeats
+        
+        if not self.load_config():
+            raise RuntimeError(f"Configuration illisible: {self.config_path}")
+    
+    def load_config(self) -> bool:
+        """
+        (Re)charge la configuration et recrée Harvester et uploader
+        
+        Le thread des heartbeats est arrêté pendant le remplacement (son
+        heartbeat en cours compris): la file d'envoi n'est jamais ouverte par
+        deux uploaders à la fois, et l'ancien est fermé quand plus personne
+        ne s'en sert.
+        
+        Returns:
+            Faux si la configuration est illisible (l'ancienne est gardée)
+        """
+        heartbeats = self.stop_heartbeats()
+        try:
+            return self._apply_config()
+        finally:
+            if heartbeats:
+                self.start_heartbeats()
     
-    logger.info(f"Connexion au Nester: {nester_url}")
+    def _apply_config(self) -> bool:
+        try:
+            mtime = self.config_path.stat().st_mtime
+            with open(self.config_path, 'r') as f:
+                config = json.load(f)
+            harvester = SeahawksHarvester(str(self.config_path))
+            uploader = NesterUploader(str(self.config_path)) if config.get('nester_url') else None
+        except (OSError, ValueError, TypeError, RuntimeError) as e:
+            logger.error(f"Configuration invalide, non appliquée: {e}")
+            self._config_mtime = self._current_mtime()
+            return False
+        
+        if uploader is None:
+            logger.warning("nester_url non configuré: scans locaux seulement")
+        if self.uploader is not None:
+            self.uploader.close()
+        self.config, self.harvester, self.uploader = config, harvester, uploader
+        self._configure_scheduler(config)
+        self._configure_wan_monitor(config)
+        harvester.wan_monitor = self.wan_monitor
+        self._config_mtime = mtime
+        return True
     
-    # Créer l'uploader (utilise config.json automatiquement)
-    uploader = NesterUploader()
+    def _configure_scheduler(self, config: dict):
+        """
+        Crée le ScanScheduler, ou lui applique les réglages de planification
+        s'ils ont changé: l'intervalle adaptatif et le compteur de scans
+        stables survivent aux rechargements
+        """
+        settings = tuple(config.get(key) for key in SCHEDULER_SETTINGS)
+        if self.scheduler is None:
+            self.scheduler = ScanScheduler(config)
+        elif settings != self._scheduler_settings:
+            self.scheduler.configure(config)
+        self._scheduler_settings = settings
     
-    # Enregistrer la sonde
-    logger.info("Enregistrement auprès du Nester...")
-    if uploader.register_probe():
-        logger.info("✅ Enregistrement réussi!")
-    else:
-        logger.warning("⚠️ Échec de l'enregistrement (le Nester est peut-être hors ligne)")
+    def _configure_wan_monitor(self, config: dict):
+        """(Re)crée le WanMonitor si ses réglages ont changé (les échantillons sont gardés sinon)"""
+        settings = (
+            tuple(config.get('wan_monitor_targets', [config.get('wan_test_host', '8.8.8.8')])),
+            config.get('wan_monitor_interval', 10),
+            config.get('wan_monitor_capacity', 32768),
+            config.get('wan_monitor_summary_seconds', 300),
+            config.get('wan_probe_timeout', 1.0),
+            config.get('wan_probe_tcp_port', 443),
+            config.get('probe_icmp', True),
+            config.get('franchise_id')
+        )
+        if settings == self._wan_monitor_settings:
+            return
+        if self.wan_monitor is not None:
+            self.wan_monitor.stop()
+        
+        self.wan_monitor = None
+        self._wan_monitor_settings = settings
+        targets, interval, capacity, summary_seconds, timeout, tcp_port, icmp, franchise_id = settings
+        if interval > 0 and targets:
+            self.wan_monitor = WanMonitor(
+                targets, interval=interval, capacity=capacity, summary_seconds=summary_seconds,
+                phase=franchise_phase(franchise_id or ""), tcp_port=tcp_port,
+                engine=AsyncProbeEngine(
+                    concurrency=16, timeout=timeout, retries=0, icmp=icmp, resolve_names=False
+                )
+            )
     
-    # Boucle principale
-    scan_count = 0
-    while True:
+    def _current_mtime(self):
         try:
-            scan_count += 1
-            logger.info(f"\n{'='*60}")
-            logger.info(f"SCAN #{scan_count} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            logger.info(f"{'='*60}")
-            
-            # Collecter métriques système
-            metrics = get_system_metrics()
-            if metrics:
-                logger.info(f"Metriques systeme: CPU {metrics['cpu_percent']}% | RAM {metrics['memory_percent']}% | Disque {metrics['disk_percent']}%")
-            
-            # Lancer un scan
-            logger.info("Lancement du scan reseau...")
-            scan_result = subprocess.run(['python', 'harvester.py'], capture_output=True)
-            if scan_result.returncode == 0:
-                logger.info("Scan termine avec succes")
-            else:
-                logger.error(f"Erreur scan: {scan_result.stderr.decode()}")
-            
-            # Envoyer heartbeat
-            logger.info("Envoi heartbeat...")
-            uploader.send_heartbeat()
-            
-            # Uploader le dernier rapport
-            logger.info("Upload du rapport...")
-            if uploader.sync_latest_report():
-                logger.info("Rapport envoye au Nester")
-            else:
-                logger.warning("Echec de l'upload (mode autonome)")
+            return self.config_path.stat().st_mtime
+        except OSError:
+            return None
+    
+    def config_changed(self) -> bool:
+        """Vrai si config.json a été modifié (ou si un rechargement est demandé)"""
+        return self._reload.is_set() or self._current_mtime() != self._config_mtime
+    
+    def request_reload(self, *_):
+        """Demande un rechargement de la configuration (SIGHUP)"""
+        self._reload.set()
+    
+    def stop(self, *_):
+        """Arrête le service à la fin du cycle en cours (SIGTERM)"""
+        self._stop.set()
+        heartbeats = self._heartbeats
+        if heartbeats is not None:
+            heartbeats[1].set()
+    
+    def register(self):
+        """Enregistre la sonde auprès du Nester"""
+        if self.uploader is None:
+            return
+        logger.info(f"Connexion au Nester: {self.uploader.nester_url}")
+        if self.uploader.register_probe():
+            logger.info("✅ Enregistrement réussi!")
+        else:
+            logger.warning("⚠️ Échec de l'enregistrement (le Nester est peut-être hors ligne)")
+    
+    def run_cycle(self) -> dict:
+        """
+        Un cycle: scan, envoi du rapport et des logs
+        
+        Returns:
+            Durées du cycle (secondes): total, scan, envois, et surcoût
+            (tout ce qui n'est ni le scan lui-même ni l'attente du Nester)
+        """
+        self.cycles += 1
+        started = time.perf_counter()
+        logger.info(f"\n{'='*60}")
+        logger.info(f"SCAN #{self.cycles} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        logger.info(f"{'='*60}")
+        
+        # Collecter métriques système
+        metrics = get_system_metrics()
+        if metrics:
+            logger.info(f"Metriques systeme: CPU {metrics['cpu_percent']}% | RAM {metrics['memory_percent']}% | Disque {metrics['disk_percent']}%")
+        
+        # Lancer un scan
+        logger.info("Lancement du scan reseau...")
+        results = self.harvester.scan_network()
+        if 'error' in results:
+            logger.error(f"Erreur scan: {results['error']}")
+        else:
+            logger.info("Scan termine avec succes")
+            changed = self.scheduler.observe(results)
+            if changed is not None:
+                logger.info(
+                    f"Inventaire {'modifié' if changed else 'inchangé'}: "
+                    f"intervalle de scan {self.scheduler.interval:.0f}s"
+                )
+        
+        upload_started = time.perf_counter()
+        if self.uploader is not None:
+            # Uploader le rapport du scan (pas de relecture sur disque)
+            if 'error' not in results:
+                logger.info("Upload du rapport...")
+                sent = self.uploader.upload_report_data(results)
+                if sent:
+                    logger.info("Rapport envoye au Nester")
+                elif sent is None:
+                    logger.info("Rapport en file d'envoi, envoi deja en cours")
+                else:
+                    logger.warning(f"Nester injoignable, rapport conserve dans la file d'envoi ({self.uploader.outbox.size()} en attente)")
             
             # Uploader les logs vers le Nester
             logger.info("Upload des logs...")
-            if uploader.sync_logs():
+            if self.uploader.sync_logs():
                 logger.info("Logs envoyes au Nester")
             else:
-                logger.warning("Echec upload logs")
-            
-            # Attendre avant le prochain scan
-            interval = config.get('scan_interval', 3600)
-            logger.info(f"Prochain scan dans {interval}s...")
-            time.sleep(interval)
+                logger.warning("Logs conserves dans la file d'envoi")
+        finished = time.perf_counter()
+        
+        timings = {
+            "total": finished - started,
+            "scan": results.get('scan_duration_seconds', upload_started - started),
+            "upload": finished - upload_started
+        }
+        timings['overhead'] = max(timings['total'] - timings['scan'] - timings['upload'], 0)
+        self.overheads.append(timings['overhead'])
+        logger.info(
+            f"Cycle #{self.cycles}: {timings['total']:.2f}s (scan {timings['scan']:.2f}s, "
+            f"envois {timings['upload']:.2f}s, surcoût {timings['overhead'] * 1000:.0f} ms, "
+            f"moyenne {sum(self.overheads) / len(self.overheads) * 1000:.0f} ms)"
+        )
+        return timings
+    
+    def wait(self, until: float) -> bool:
+        """
+        Attend le prochain cycle en surveillant config.json
+        
+        Un changement de configuration est appliqué pendant l'attente; le
+        prochain cycle n'est replanifié que si les réglages de planification
+        ont changé (sinon l'échéance prévue est gardée).
+        
+        Args:
+            until: Instant (timestamp) du prochain cycle
+        
+        Returns:
+            Faux si l'arrêt du service a été demandé
+        """
+        while not self._stop.is_set():
+            if self.config_changed():
+                self._reload.clear()
+                settings = self._scheduler_settings
+                if self.load_config():
+                    if self.wan_monitor is not None:
+                        self.wan_monitor.start()
+                    if self._scheduler_settings != settings:
+                        until = self.scheduler.next_scan()
+                    logger.info(f"Configuration rechargée, prochain scan à {self._format_time(until)}")
+            remaining = until - time.time()
+            if remaining <= 0:
+                return True
+            self._stop.wait(min(remaining, self.config_check_interval))
+        return False
+    
+    @staticmethod
+    def _format_time(timestamp: float) -> str:
+        return datetime.fromtimestamp(timestamp).strftime('%H:%M:%S')
+    
+    def _heartbeat_loop(self, stop: threading.Event):
+        """Thread des heartbeats: cadence propre, indépendante des scans"""
+        while not stop.wait(max(self.scheduler.next_heartbeat() - time.time(), 0)):
+            if self._stop.is_set():
+                break
+            uploader = self.uploader
+            if uploader is None:
+                continue
+            try:
+                uploader.send_heartbeat()
+            except Exception as e:
+                logger.error(f"Erreur heartbeat: {e}")
+    
+    def start_heartbeats(self) -> threading.Thread:
+        """Démarre le thread des heartbeats (arrêté avec le service)"""
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._heartbeat_loop, args=(stop,), name="heartbeats", daemon=True
+        )
+        thread.start()
+        self._heartbeats = (thread, stop)
+        return thread
+    
+    def stop_heartbeats(self) -> bool:
+        """
+        Arrête le thread des heartbeats et attend la fin du heartbeat en cours
+        
+        Returns:
+            Vrai si le thread tournait
+        """
+        heartbeats, self._heartbeats = self._heartbeats, None
+        if heartbeats is None:
+            return False
+        thread, stop = heartbeats
+        stop.set()
+        thread.join()
+        return True
+    
+    def run(self):
+        """Boucle principale du service, jusqu'à stop()"""
+        self.register()
+        self.start_heartbeats()
+        if self.wan_monitor is not None:
+            self.wan_monitor.start()
+        
+        # Premier scan à l'instant propre à la franchise, dans scan_start_spread
+        next_scan = self.scheduler.next_scan()
+        logger.info(f"Premier scan à {self._format_time(next_scan)}")
+        while self.wait(next_scan):
+            try:
+                self.run_cycle()
+            except Exception as e:
+                logger.error(f"Erreur: {e}", exc_info=True)
+                next_scan = time.time() + 60
+                continue
             
-        except KeyboardInterrupt:
-            logger.info("\nArret du Harvester demande")
-            break
-        except Exception as e:
-            logger.error(f"Erreur: {e}", exc_info=True)
-            time.sleep(60)
+            # Prochaine échéance, calée sur l'horloge (sans dérive)
+            next_scan = self.scheduler.next_scan()
+            logger.info(
+                f"Prochain scan à {self._format_time(next_scan)} "
+                f"(dans {max(next_scan - time.time(), 0):.0f}s)"
+            )
+        
+        logger.info("Arret du Harvester")
+        self.stop_heartbeats()
+        if self.wan_monitor is not None:
+            self.wan_monitor.stop()
+        if self.uploader is not None:
+            self.uploader.close()
+
+
+def main():
+    setup_logging()
+    logger.info("=" * 60)
+    logger.info("Demarrage du service Seahawks Harvester")
+    logger.info("=" * 60)
+    
+    daemon = HarvesterDaemon('config.json')
+    if daemon.uploader is None:
+        logger.error("nester_url non configuré dans config.json")
+        return
+    
+    # Arrêt propre (systemd, docker stop) et rechargement de la configuration
+    signal.signal(signal.SIGTERM, daemon.stop)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, daemon.request_reload)
+    
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        logger.info("\nArret du Harvester demande")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Backends de scan du Harvester
+Interchangeables : nmap (processus externe) ou moteur asyncio intégré
+"""
+
+from typing import Callable, Dict, List, Optional
+
+from async_scanner import AsyncProbeEngine, expand_targets, parse_ports, read_arp_table
+
+try:
+    import nmap
+except ImportError:  # python-nmap optionnel avec le backend asyncio
+    nmap = None
+
+
+def parse_nmap_host(scanner, host: str) -> Dict:
+    """Convertit le résultat nmap d'un hôte au format du rapport"""
+    addresses = scanner[host].get('addresses', {})
+    host_info = {
+        "ip": host,
+        "hostname": scanner[host].hostname() or "Unknown",
+        "state": scanner[host].state(),
+        "mac_address": addresses.get('mac', 'Unknown'),
+        "vendor": scanner[host].get('vendor', {}).get(addresses.get('mac', ''), 'Unknown'),
+        "os": _extract_os_info(scanner, host),
+        "ports": []
+    }
+    
+    # Ports ouverts
+    if 'tcp' in scanner[host]:
+        for port in scanner[host]['tcp'].keys():
+            port_info = scanner[host]['tcp'][port]
+            host_info['ports'].append({
+                "port": port,
+                "state": port_info['state'],
+                "service": port_info.get('name', 'unknown'),
+                "version": port_info.get('version', ''),
+                "product": port_info.get('product', '')
+            })
+    
+    return host_info
+
+
+def _extract_os_info(scanner, host: str) -> Dict:
+    """Extrait les informations OS détectées"""
+    os_info = {
+        "name": "Unknown",
+        "accuracy": 0
+    }
+    
+    if 'osmatch' in scanner[host] and len(scanner[host]['osmatch']) > 0:
+        best_match = scanner[host]['osmatch'][0]
+        os_info['name'] = best_match.get('name', 'Unknown')
+        os_info['accuracy'] = int(best_match.get('accuracy', 0))
+    
+    return os_info
+
+
+class ScannerBackend:
+    """Interface commune des backends de scan"""
+    
+    name = "base"
+    # Vrai si le backend identifie lui-même produits et versions des services
+    version_detection = False
+    # Vrai si la cible gagne à être découpée en parties scannées par des threads
+    shardable = True
+    
+    def discover(self, target: str, ports: str,
+                 on_host: Callable[[Dict], None] = None) -> List[Dict]:
+        """
+        Hôtes actifs d'une cible, sans relevé de ports
+        
+        Args:
+            target: CIDR, adresse, ou adresses séparées par des espaces
+            ports: Ports surveillés ("22,80,443"), sondés pour les hôtes sans ICMP
+            on_host: Appelé pour chaque hôte dès qu'il est trouvé
+        """
+        raise NotImplementedError
+    
+    def scan_ports(self, target: str, ports: str, detect_versions: bool = False,
+                   assume_up: bool = False, on_host: Callable[[Dict], None] = None) -> List[Dict]:
+        """
+        État des ports des hôtes d'une cible
+        
+        Args:
+            detect_versions: Identifier produits et versions (si le backend le sait)
+            assume_up: Hôtes déjà découverts, sondés même s'ils ne répondent pas
+        """
+        raise NotImplementedError
+
+
+class NmapBackend(ScannerBackend):
+    """Scan par nmap: découverte ARP/ICMP/SYN, ports et détection de version (-sV)"""
+    
+    name = "nmap"
+    version_detection = True
+    
+    PORT_STATE_ARGUMENTS = "--max-retries 2 --host-timeout 30s"
+    SCAN_ARGUMENTS = f"-sV {PORT_STATE_ARGUMENTS}"
+    
+    def __init__(self, discovery_arguments: str = None):
+        if nmap is None:
+            raise RuntimeError("Backend nmap indisponible (pip install python-nmap)")
+        self.discovery_arguments = discovery_arguments
+    
+    def _run(self, target: str, arguments: str, on_host) -> List[Dict]:
+        # Un processus nmap par appel: les appels parallèles ne partagent rien
+        scanner = nmap.PortScanner()
+        scanner.scan(hosts=target, arguments=arguments)
+        hosts = []
+        for host in scanner.all_hosts():
+            hosts.append(parse_nmap_host(scanner, host))
+            if on_host is not None:
+                on_host(hosts[-1])
+        return hosts
+    
+    def discover(self, target, ports, on_host=None):
+        # ARP sur le réseau local (en root), écho ICMP, et SYN sur les ports
+        # surveillés pour les hôtes qui filtrent l'ICMP
+        arguments = self.discovery_arguments or f"-sn -PE -PS{ports} -PA80 --max-retries 2"
+        return self._run(target, arguments, on_host)
+    
+    def scan_ports(self, target, ports, detect_versions=False, assume_up=False, on_host=None):
+        arguments = f"-p {ports} " + (
+            self.SCAN_ARGUMENTS if detect_versions else self.PORT_STATE_ARGUMENTS
+        )
+        # Découverte déjà faite: -Pn évite un second ping des hôtes actifs
+        if assume_up:
+            arguments = f"-Pn {arguments}"
+        return self._run(target, arguments, on_host)
+
+
+class AsyncioBackend(ScannerBackend):
+    """
+    Scan par connexions TCP et écho ICMP concurrents, sans processus externe
+    
+    Toute la cible est sondée dans une seule boucle asyncio: la concurrence
+    se règle par probe_concurrency et non par découpage en threads. Les
+    services sont nommés d'après le numéro de port; la détection de version
+    reste confiée à nmap.
+    """
+    
+    name = "asyncio"
+    shardable = False
+    
+    def __init__(self, engine: AsyncProbeEngine):
+        self.engine = engine
+    
+    def _run(self, target, ports, on_host, **options) -> List[Dict]:
+        arp_table = read_arp_table()
+        
+        def found(host):
+            # Adresse MAC connue du noyau après les sondes (réseau local seulement)
+            host['mac_address'] = arp_table.get(host['ip'], host['mac_address'])
+            if on_host is not None:
+                on_host(host)
+        
+        hosts = self.engine.run(expand_targets(target), parse_ports(ports), on_host=found, **options)
+        
+        # Les entrées ARP créées pendant le scan sont lues à la fin
+        arp_table.update(read_arp_table())
+        for host in hosts:
+            host['mac_address'] = arp_table.get(host['ip'], host['mac_address'])
+        return hosts
+    
+    def discover(self, target, ports, on_host=None):
+        return self._run(target, ports, on_host, discovery=True)
+    
+    def scan_ports(self, target, ports, detect_versions=False, assume_up=False, on_host=None):
+        return self._run(target, ports, on_host, assume_up=assume_up)
+
+
+def create_backend(name: str, config: Dict) -> ScannerBackend:
+    """Instancie le backend de scan demandé ('nmap' ou 'asyncio')"""
+    if name == "nmap":
+        return NmapBackend(config.get("discovery_arguments"))
+    if name == "asyncio":
+        return AsyncioBackend(AsyncProbeEngine(
+            concurrency=int(config.get("probe_concurrency", 256)),
+            host_concurrency=int(config.get("probe_host_concurrency", 4)),
+            host_rate=float(config.get("probe_host_rate", 0)),
+            timeout=float(config.get("probe_timeout", 1.0)),
+            retries=int(config.get("probe_retries", 1)),
+            icmp=bool(config.get("probe_icmp", True)),
+            resolve_names=bool(config.get("probe_resolve_names", True))
+        ))
+    raise ValueError(f"Backend de scan inconnu: {name}")
+
+
+def create_version_backend(scanner: ScannerBackend, config: Dict) -> Optional[ScannerBackend]:
+    """
+    Backend de la détection de version (-sV)
+    
+    Le backend de scan lui-même s'il en est capable, sinon nmap s'il est
+    installé; None si version_detection est désactivé ou nmap absent.
+    """
+    if not config.get("version_detection", True):
+        return None
+    if scanner.version_detection:
+        return scanner
+    if nmap is None:
+        return None
+    return NmapBackend(config.get("discovery_arguments"))
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Planification des scans et des heartbeats du service Harvester
+Échéances calées sur l'horloge, décalées par franchise, et intervalle de
+scan adaptatif selon l'évolution de l'inventaire
+"""
+
+import hashlib
+import math
+import random
+import time
+from typing import Dict, Optional
+
+# Clés de configuration lues par ScanScheduler
+SCHEDULER_SETTINGS = (
+    "scan_interval", "scan_interval_min", "scan_interval_max", "scan_backoff_after",
+    "scan_start_spread", "scan_jitter", "heartbeat_interval", "heartbeat_jitter",
+    "franchise_id"
+)
+
+
+def franchise_phase(franchise_id: str) -> float:
+    """
+    Décalage déterministe d'une franchise dans l'intervalle, entre 0 et 1
+    
+    Dérivé de franchise_id: stable d'un redémarrage à l'autre, et réparti
+    uniformément entre les franchises (elles ne scannent pas en même temps).
+    """
+    digest = hashlib.sha256(str(franchise_id).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+
+def inventory_signature(report: Dict) -> frozenset:
+    """Inventaire d'un rapport: hôtes et services ouverts (ni latences ni horodatages)"""
+    signature = set()
+    for host in report.get('hosts', []):
+        signature.add((host.get('ip'), None, None, None))
+        for port in host.get('ports', []):
+            if port.get('state') == 'open':
+                signature.add((
+                    host.get('ip'), port.get('port'),
+                    port.get('service'), port.get('version')
+                ))
+    return frozenset(signature)
+
+
+class Cadence:
+    """
+    Échéances régulières sans dérive
+    
+    Les échéances sont les instants phase * interval + k * interval depuis
+    l'epoch: elles ne dépendent ni de la durée des scans ni de l'heure de
+    démarrage. Un scan plus long que l'intervalle saute les échéances
+    dépassées au lieu de les enchaîner. Le jitter (retard aléatoire, en
+    fraction de l'intervalle) est tiré à chaque échéance et ne s'accumule pas.
+    """
+    
+    def __init__(self, interval: float, phase: float = 0.0, jitter: float = 0.0,
+                 rng: random.Random = None):
+        self.interval = interval
+        self.phase = phase
+        self.jitter = jitter
+        self._rng = rng or random.Random()
+        self._last_slot = None
+    
+    def next_after(self, now: float) -> float:
+        """Prochaine échéance (timestamp), strictement après now et après la précédente"""
+        after = max(now, self._last_slot) if self._last_slot is not None else now
+        offset = self.phase * self.interval
+        slot = offset + (math.floor((after - offset) / self.interval) + 1) * self.interval
+        self._last_slot = slot
+        return slot + self._rng.uniform(0, self.jitter * self.interval)
+
+
+class ScanScheduler:
+    """
+    Planificateur des scans et des heartbeats d'une franchise
+    
+    Les scans suivent l'intervalle courant, entre scan_interval_min et
+    scan_interval_max: il est divisé par deux dès que l'inventaire change
+    (hôte ou service apparu, disparu ou modifié) et doublé après
+    scan_backoff_after scans sans changement. Partant de scan_interval, il
+    reste une puissance de deux de celui-ci. Le premier scan a lieu dans
+    les scan_start_spread secondes suivant le démarrage, à l'instant propre
+    à la franchise (les sondes redémarrées ensemble ne scannent pas
+    ensemble). Les heartbeats, peu coûteux, ont leur propre cadence.
+    """
+    
+    def __init__(self, config: Dict, clock=time.time, rng: random.Random = None):
+        self.clock = clock
+        self._rng = rng or random.Random()
+        self.base_interval = None
+        self.interval = None
+        self.configure(config)
+        
+        self.stable_scans = 0
+        self._signature = None
+        self._started_at = self.clock()
+        self._first_scan = True
+    
+    def configure(self, config: Dict):
+        """
+        Applique les réglages de planification (au démarrage et au rechargement)
+        
+        L'intervalle courant, le compteur de scans stables et l'inventaire de
+        référence sont gardés: l'intervalle ne repart de scan_interval que si
+        celui-ci a changé, sinon il est seulement borné par les nouvelles limites.
+        Les cadences repartent de l'instant courant.
+        """
+        base_interval = config.get("scan_interval", 3600)
+        if self.interval is None or base_interval != self.base_interval:
+            self.interval = base_interval
+        self.base_interval = base_interval
+        self.min_interval = config.get("scan_interval_min", self.base_interval / 4)
+        self.max_interval = config.get("scan_interval_max", self.base_interval * 4)
+        self.backoff_after = config.get("scan_backoff_after", 3)
+        self.start_spread = config.get("scan_start_spread", 60)
+        self.phase = franchise_phase(config.get("franchise_id", ""))
+        
+        self.interval = min(max(self.interval, self.min_interval), self.max_interval)
+        self.scans = Cadence(self.interval, self.phase, config.get("scan_jitter", 0.05), self._rng)
+        self.heartbeats = Cadence(
+            config.get("heartbeat_interval", 60), self.phase,
+            config.get("heartbeat_jitter", 0.1), self._rng
+        )
+    
+    def next_scan(self) -> float:
+        """Instant (timestamp) du prochain scan"""
+        if self._first_scan:
+            self._first_scan = False
+            return self._started_at + self.phase * self.start_spread
+        return self.scans.next_after(self.clock())
+    
+    def next_heartbeat(self) -> float:
+        """Instant (timestamp) du prochain heartbeat"""
+        return self.heartbeats.next_after(self.clock())
+    
+    def observe(self, report: Dict) -> Optional[bool]:
+        """
+        Adapte l'intervalle de scan au rapport qui vient d'être produit
+        
+        Returns:
+            True si l'inventaire a changé depuis le scan précédent, False
+            sinon, None pour le premier scan (pas de référence)
+        """
+        signature = inventory_signature(report)
+        previous, self._signature = self._signature, signature
+        if previous is None:
+            return None
+        
+        changed = signature != previous
+        if changed:
+            self.stable_scans = 0
+            self._set_interval(self.interval / 2)
+        else:
+            self.stable_scans += 1
+            if self.stable_scans >= self.backoff_after:
+                self.stable_scans = 0
+                self._set_interval(self.interval * 2)
+        return changed
+    
+    def _set_interval(self, interval: float):
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        self.scans.interval = self.interval
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests du Seahawks Harvester
+Les modules de l'application sont à plat dans le répertoire parent
+"""
+
+from pathlib import Path
+import socket
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def open_port():
+    """Port local qui accepte les connexions"""
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(16)
+    yield server.getsockname()[1]
+    server.close()
+
+
+@pytest.fixture
+def closed_port():
+    """Port local sans écoute: connexion refusée"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@pytest.fixture
+def silent_port():
+    """
+    Port local qui ne répond plus: file d'attente saturée
+    
+    Une écoute sans accept() garde une connexion en attente; les SYN
+    suivants sont ignorés par le noyau, comme un port filtré.
+    """
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(0)
+    port = server.getsockname()[1]
+    waiting = socket.create_connection(('127.0.0.1', port), timeout=1)
+    yield port
+    waiting.close()
+    server.close()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests du moteur de sondes asyncio contre des ports locaux: ouvert, fermé
+et sans réponse
+"""
+
+import asyncio
+import time
+
+from async_scanner import AsyncProbeEngine, service_name
+
+
+def make_engine(**options) -> AsyncProbeEngine:
+    return AsyncProbeEngine(**{
+        "timeout": 0.2, "retries": 0, "icmp": False, "resolve_names": False, **options
+    })
+
+
+def test_tcp_connect_open(open_port):
+    state, rtt = asyncio.run(make_engine().tcp_connect('127.0.0.1', open_port))
+    assert state == 'open'
+    assert isinstance(rtt, float) and rtt >= 0
+
+
+def test_tcp_connect_closed(closed_port):
+    state, rtt = asyncio.run(make_engine().tcp_connect('127.0.0.1', closed_port))
+    assert state == 'closed'
+    assert isinstance(rtt, float) and rtt >= 0
+
+
+def test_tcp_connect_timeout_is_filtered_after_retries(silent_port):
+    started = time.monotonic()
+    state, rtt = asyncio.run(make_engine(retries=1).tcp_connect('127.0.0.1', silent_port))
+    assert (state, rtt) == ('filtered', None)
+    # Une tentative initiale et une nouvelle tentative, chacune jusqu'au délai
+    assert time.monotonic() - started >= 2 * 0.2
+
+
+def test_probe_host_reports_every_port(open_port, closed_port, silent_port):
+    host = asyncio.run(make_engine().probe_host(
+        '127.0.0.1', [silent_port, closed_port, open_port]
+    ))
+    
+    assert host['ip'] == '127.0.0.1'
+    assert host['state'] == 'up'
+    assert host['hostname'] == 'Unknown'
+    assert host['ports'] == sorted([
+        {"port": open_port, "state": "open", "service": service_name(open_port),
+         "version": "", "product": ""},
+        {"port": closed_port, "state": "closed", "service": service_name(closed_port),
+         "version": "", "product": ""},
+        {"port": silent_port, "state": "filtered", "service": service_name(silent_port),
+         "version": "", "product": ""}
+    ], key=lambda port: port['port'])
+
+
+def test_probe_host_without_answer(silent_port):
+    engine = make_engine()
+    assert asyncio.run(engine.probe_host('127.0.0.1', [silent_port])) is None
+    assert asyncio.run(engine.probe_host('127.0.0.1', [silent_port], discovery=True)) is None
+    
+    # Hôte déjà découvert: relevé même sans réponse
+    host = asyncio.run(engine.probe_host('127.0.0.1', [silent_port], assume_up=True))
+    assert [port['state'] for port in host['ports']] == ['filtered']
+
+
+def test_discovery_stops_at_first_answer(closed_port, silent_port):
+    started = time.monotonic()
+    host = asyncio.run(make_engine(timeout=5).probe_host(
+        '127.0.0.1', [silent_port, closed_port], discovery=True
+    ))
+    # Le port fermé répond: l'hôte est actif sans attendre le port muet
+    assert host['ip'] == '127.0.0.1'
+    assert host['ports'] == []
+    assert time.monotonic() - started < 1
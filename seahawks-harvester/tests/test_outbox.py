@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests de la file d'envoi: réparation, segments, acquittements et redémarrage
+"""
+
+from outbox import Outbox
+
+
+def fill(outbox, count, kind="heartbeat"):
+    return [outbox.append(kind, {"n": n}) for n in range(count)]
+
+
+def test_torn_last_line_is_repaired(tmp_path):
+    outbox = Outbox(str(tmp_path))
+    fill(outbox, 2)
+    
+    # Arrêt brutal pendant l'écriture de la troisième entrée
+    segment = outbox._segments()[-1]
+    with open(segment, 'ab') as f:
+        f.write(b'{"seq":3,"kind":"heartbe')
+    
+    outbox = Outbox(str(tmp_path))
+    assert [entry['seq'] for entry in outbox.pending()] == [1, 2]
+    
+    # La ligne tronquée a été coupée: la suivante n'y est pas collée
+    assert outbox.append("heartbeat", {"n": 3}) == 3
+    assert [entry['seq'] for entry in outbox.pending()] == [1, 2, 3]
+
+
+def test_segments_roll_over(tmp_path):
+    outbox = Outbox(str(tmp_path), segment_bytes=150)
+    fill(outbox, 10)
+    
+    segments = outbox._segments()
+    assert len(segments) > 1
+    assert int(segments[0].stem) == 1
+    assert [entry['seq'] for entry in outbox.pending()] == list(range(1, 11))
+
+
+def test_ack_deletes_finished_segments(tmp_path):
+    outbox = Outbox(str(tmp_path), segment_bytes=150)
+    fill(outbox, 10)
+    first, second = outbox._segments()[:2]
+    
+    # Le premier segment s'arrête juste avant le début du second
+    outbox.ack(int(second.stem) - 2)
+    assert first.exists()
+    outbox.ack(int(second.stem) - 1)
+    assert not first.exists()
+    assert second.exists()
+    
+    outbox.ack(10)
+    assert outbox._segments() == []
+    assert outbox.size() == 0
+    assert outbox.pending() == []
+
+
+def test_pending_after_restart(tmp_path):
+    outbox = Outbox(str(tmp_path), segment_bytes=150)
+    fill(outbox, 10)
+    outbox.ack(3)
+    outbox.ack_entries([6, 7])
+    
+    outbox = Outbox(str(tmp_path), segment_bytes=150)
+    assert outbox.size() == 5
+    assert [entry['seq'] for entry in outbox.pending()] == [4, 5, 8, 9, 10]
+    assert outbox.append("heartbeat", {"n": 10}) == 11
+    
+    # Les entrées isolées sont franchies dès que celles qui précèdent le sont
+    outbox.ack(5)
+    assert outbox.size() == 4
+    assert [entry['seq'] for entry in outbox.pending()] == [8, 9, 10, 11]
+
+
+def test_pending_resumes_after_acked_entries(tmp_path, monkeypatch):
+    outbox = Outbox(str(tmp_path))
+    fill(outbox, 5)
+    outbox.pending()
+    outbox.ack(3)
+    outbox.pending()
+    
+    reads = []
+    read_segment = Outbox._read_segment
+    
+    def spy(path, offset=0):
+        reads.append(offset)
+        return read_segment(path, offset)
+    
+    monkeypatch.setattr(Outbox, '_read_segment', staticmethod(spy))
+    
+    # Les entrées 1 à 3 ne sont plus relues
+    acked_bytes = sum(entry['size'] for _, entry in read_segment(outbox._segments()[0])
+                      if entry['seq'] <= 3)
+    assert [entry['seq'] for entry in outbox.pending()] == [4, 5]
+    assert reads == [acked_bytes]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests des backends de scan: nmap et asyncio produisent des hôtes de même forme
+"""
+
+import shutil
+
+import pytest
+
+import scanner_backends
+from async_scanner import AsyncProbeEngine
+from scanner_backends import AsyncioBackend, NmapBackend
+
+
+nmap = pytest.importorskip("nmap")
+
+
+class FakePortScanner:
+    """nmap.PortScanner rejouant le résultat qu'aurait nmap sur les ports locaux"""
+    
+    ports = {}
+    
+    def __init__(self):
+        self._hosts = {}
+    
+    def scan(self, hosts, arguments):
+        self.arguments = arguments
+        self._hosts[hosts] = nmap.PortScannerHostDict({
+            "hostnames": [{"name": "", "type": ""}],
+            "addresses": {"ipv4": hosts},
+            "vendor": {},
+            "status": {"state": "up", "reason": "conn-refused"},
+            "tcp": {
+                port: {"state": state, "reason": "", "name": name, "product": "",
+                       "version": "", "extrainfo": "", "conf": "3", "cpe": ""}
+                for port, (state, name) in self.ports.items()
+            }
+        })
+    
+    def all_hosts(self):
+        return sorted(self._hosts)
+    
+    def __getitem__(self, host):
+        return self._hosts[host]
+
+
+def asyncio_backend() -> AsyncioBackend:
+    return AsyncioBackend(AsyncProbeEngine(timeout=0.5, retries=0, icmp=False, resolve_names=False))
+
+
+def shape(hosts: list) -> list:
+    """Clés et types de chaque hôte et de ses ports, triés par adresse"""
+    def types(record: dict) -> dict:
+        return {key: type(value).__name__ for key, value in record.items()}
+    
+    return [
+        (types(host), types(host['os']), [types(port) for port in host['ports']])
+        for host in sorted(hosts, key=lambda h: h['ip'])
+    ]
+
+
+def states(hosts: list) -> dict:
+    return {
+        host['ip']: sorted((port['port'], port['state']) for port in host['ports'])
+        for host in hosts
+    }
+
+
+def test_backends_return_the_same_shape(open_port, closed_port, monkeypatch):
+    ports = f"{open_port},{closed_port}"
+    from_asyncio = asyncio_backend().scan_ports('127.0.0.1', ports)
+    
+    FakePortScanner.ports = {
+        open_port: ("open", "unknown"), closed_port: ("closed", "unknown")
+    }
+    monkeypatch.setattr(scanner_backends.nmap, 'PortScanner', FakePortScanner)
+    from_nmap = NmapBackend().scan_ports('127.0.0.1', ports)
+    
+    assert shape(from_nmap) == shape(from_asyncio)
+    assert states(from_nmap) == states(from_asyncio) == {
+        '127.0.0.1': sorted([(open_port, 'open'), (closed_port, 'closed')])
+    }
+
+
+@pytest.mark.skipif(shutil.which("nmap") is None, reason="binaire nmap absent")
+def test_backends_agree_on_local_ports(open_port, closed_port):
+    ports = f"{open_port},{closed_port}"
+    from_asyncio = asyncio_backend().scan_ports('127.0.0.1', ports)
+    from_nmap = NmapBackend().scan_ports('127.0.0.1', ports, assume_up=True)
+    
+    assert shape(from_nmap) == shape(from_asyncio)
+    assert states(from_nmap) == states(from_asyncio)
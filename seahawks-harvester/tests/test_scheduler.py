@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests du planificateur: l'état adaptatif survit aux rechargements de configuration
+"""
+
+import json
+import time
+
+from run_with_nester import HarvesterDaemon
+
+
+def write_config(path, **overrides):
+    config = {
+        "franchise_id": "franchise_01",
+        "scan_network": "127.0.0.1/32",
+        "scan_ports": "9",
+        "scanner_backend": "asyncio",
+        "probe_icmp": False,
+        "wan_monitor_interval": 0,
+        "scan_interval": 600,
+        "report_dir": str(path.parent / "reports"),
+        "log_dir": str(path.parent / "logs")
+    }
+    config.update(overrides)
+    with open(path, 'w') as f:
+        json.dump(config, f)
+
+
+def stable_report():
+    return {"hosts": [{"ip": "192.168.1.10", "ports": [{"port": 22, "state": "open"}]}]}
+
+
+def test_reload_keeps_adaptive_interval(tmp_path):
+    config_path = tmp_path / "config.json"
+    write_config(config_path)
+    daemon = HarvesterDaemon(str(config_path))
+    scheduler = daemon.scheduler
+    
+    # Inventaire stable: l'intervalle double après scan_backoff_after scans
+    scheduler.next_scan()
+    for _ in range(5):
+        scheduler.observe(stable_report())
+    assert scheduler.interval == 1200
+    assert scheduler.stable_scans == 1
+    
+    # Réglage sans rapport avec la planification: rien ne change
+    write_config(config_path, scan_timeout=120)
+    assert daemon.load_config()
+    assert daemon.scheduler is scheduler
+    assert scheduler.interval == 1200
+    assert scheduler.stable_scans == 1
+    # Pas de premier scan immédiat: le prochain créneau suit l'intervalle adaptatif
+    delay = scheduler.next_scan() - time.time()
+    assert 0 < delay <= 1200 * 1.05
+    
+    # Nouvelles bornes: l'intervalle courant est seulement borné
+    write_config(config_path, scan_interval_max=900)
+    assert daemon.load_config()
+    assert daemon.scheduler is scheduler
+    assert scheduler.interval == 900
+    assert scheduler.stable_scans == 1
+    assert scheduler.observe(stable_report()) is False
+    
+    # Nouvel intervalle de base: l'intervalle adaptatif en repart
+    write_config(config_path, scan_interval=300)
+    assert daemon.load_config()
+    assert scheduler.interval == 300
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Tests de l'uploader: envoi de la file d'envoi vers le Nester
+"""
+
+import base64
+import json
+import threading
+
+import pytest
+import requests
+
+from nester_integration import NesterUploader
+from outbox import Outbox
+
+
+class FakeNester:
+    """Remplace session.request: Nester joignable ou non, requêtes enregistrées"""
+    
+    def __init__(self):
+        self.reachable = True
+        self.batch_max_items = 0
+        self.log_bytes = True
+        self.batch_statuses = {}  # Statut imposé par id d'élément
+        self.calls = []
+        self.items = []
+        self.posted = {}  # Dernier corps reçu par chemin
+    
+    def request(self, method, url, **kwargs):
+        path = url.split("127.0.0.1:9", 1)[1]
+        self.calls.append((method, path))
+        if not self.reachable:
+            raise requests.ConnectionError("Connexion refusée")
+        
+        if path == "/api/wire":
+            return self.response(200, {
+                "content_types": ["application/json"],
+                "content_encodings": ["identity"],
+                "batch_max_items": self.batch_max_items,
+                "log_bytes": self.log_bytes
+            })
+        if kwargs.get('data'):
+            self.posted[path] = json.loads(kwargs['data'])
+        if path == "/api/ingest/batch":
+            items = json.loads(kwargs['data'])['items']
+            self.items.extend(items)
+            results = [
+                {"index": index, "id": item['id'], "status": self.batch_statuses.get(
+                    item['id'], 200 if item['type'] == "heartbeat" else 202
+                )}
+                for index, item in enumerate(items)
+            ]
+            accepted = sum(1 for result in results if result['status'] < 300)
+            return self.response(200, {
+                "accepted": accepted, "rejected": len(results) - accepted, "results": results
+            })
+        return self.response(200, {"status": "ok"})
+    
+    @staticmethod
+    def response(status: int, body: dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode('utf-8')
+        return response
+    
+    def count(self, path: str) -> int:
+        return sum(1 for _, called in self.calls if called == path)
+
+
+@pytest.fixture
+def make_uploader(tmp_path):
+    uploaders = []
+    
+    def make(**overrides):
+        config = {
+            "franchise_id": "franchise_01",
+            "nester_url": "http://127.0.0.1:9",
+            "report_dir": str(tmp_path / "reports"),
+            "outbox_dir": str(tmp_path / "outbox"),
+            "log_file": str(tmp_path / "logs" / "harvester_service.log"),
+            "outbox_resume_jitter": 0,
+            "http_retries": 0
+        }
+        config.update(overrides)
+        config_path = tmp_path / "config.json"
+        with open(config_path, 'w') as f:
+            json.dump(config, f)
+        uploader = NesterUploader(str(config_path))
+        uploader.logger.disabled = True
+        uploader.nester = FakeNester()
+        uploader.session.request = uploader.nester.request
+        uploaders.append(uploader)
+        return uploader
+    
+    yield make
+    for uploader in uploaders:
+        uploader.close()
+
+
+def test_concurrent_flush_does_not_wait(make_uploader):
+    uploader = make_uploader()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+    
+    def slow_flush():
+        # Délai de reprise ou backoff en cours pendant le premier envoi
+        calls.append(threading.current_thread().name)
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+        return True
+    
+    uploader._flush_outbox = slow_flush
+    first = {}
+    thread = threading.Thread(
+        target=lambda: first.update(result=uploader.flush_outbox()), name="scan"
+    )
+    thread.start()
+    assert started.wait(5)
+    
+    # Le heartbeat pendant l'envoi en cours rend la main sans attendre
+    assert uploader.send_heartbeat() is None
+    assert calls == ["scan"]
+    
+    # L'envoi en cours repasse sur la file pour l'entrée ajoutée entre-temps
+    release.set()
+    thread.join(5)
+    assert first['result'] is True
+    assert calls == ["scan", "scan"]
+
+
+def test_flush_stops_when_nester_unavailable(make_uploader):
+    uploader = make_uploader()
+    calls = []
+    
+    def unavailable():
+        calls.append(None)
+        uploader._flush_requested.set()  # Demande arrivée pendant l'envoi
+        return False
+    
+    uploader._flush_outbox = unavailable
+    assert uploader.flush_outbox() is False
+    assert len(calls) == 1
+
+
+def test_failed_negotiation_is_remembered(make_uploader, monkeypatch):
+    uploader = make_uploader(wire_retry_seconds=300)
+    nester = uploader.nester
+    clock = [1000.0]
+    monkeypatch.setattr("nester_integration.time.monotonic", lambda: clock[0])
+    
+    # Nester injoignable: une seule négociation pour plusieurs envois
+    nester.reachable = False
+    assert uploader.send_heartbeat() is False
+    assert uploader.send_heartbeat() is False
+    assert nester.count("/api/wire") == 1
+    assert uploader._wire == ("application/json", "identity")
+    
+    # Repli expiré: nouvelle tentative
+    clock[0] += 301
+    assert uploader.send_heartbeat() is False
+    assert nester.count("/api/wire") == 2
+    
+    # Retour du Nester: le premier envoi réussi déclenche la renégociation
+    nester.reachable = True
+    nester.batch_max_items = 100
+    assert uploader.send_heartbeat() is True
+    assert nester.count("/api/wire") == 3
+    assert uploader._batch_max_items == 100
+    assert uploader._wire_fallback_until is None
+
+
+def test_accepted_items_after_a_failure_are_acked(make_uploader):
+    uploader = make_uploader()
+    nester = uploader.nester
+    nester.batch_max_items = 100
+    seqs = [
+        uploader.outbox.append("heartbeat", {"timestamp": "2026-10-18T12:00:00"})
+        for _ in range(4)
+    ]
+    
+    # Deuxième élément en erreur temporaire: lui seul reste en file
+    nester.batch_statuses = {seqs[1]: 503}
+    assert uploader.flush_outbox() is False
+    assert [entry['seq'] for entry in uploader.outbox.pending()] == [seqs[1]]
+    assert uploader.outbox.size() == 1
+    assert uploader.outbox.metrics['delivered'] == 3
+    # Acquittements persistés: rien n'est renvoyé après un redémarrage
+    reopened = Outbox(uploader.outbox.directory)
+    assert [entry['seq'] for entry in reopened.pending()] == [seqs[1]]
+    assert reopened.size() == 1
+    
+    # Seule l'entrée restante est renvoyée (seule: envoi unitaire)
+    nester.batch_statuses = {}
+    nester.calls.clear()
+    assert uploader.flush_outbox() is True
+    assert nester.calls == [("POST", "/api/probe/franchise_01/heartbeat")]
+    assert uploader.outbox.size() == 0
+
+
+@pytest.mark.parametrize("log_bytes", [True, False])
+def test_logs_are_queued_as_raw_bytes(make_uploader, tmp_path, log_bytes):
+    uploader = make_uploader()
+    uploader.nester.log_bytes = log_bytes
+    source = b"ligne 1 \xff\n" + "ligne 2 é\n".encode('utf-8')
+    uploader.log_file.parent.mkdir(parents=True)
+    uploader.log_file.write_bytes(source)
+    
+    assert uploader.sync_logs() is True
+    posted = uploader.nester.posted["/api/probe/franchise_01/logs"]
+    assert posted['offset'] == 0
+    assert posted['end_offset'] == len(source)
+    assert posted['sent_lines'] == 2
+    if log_bytes:
+        assert base64.b64decode(posted['data_b64']) == source
+        assert 'lines' not in posted
+    else:
+        # Nester sans log_bytes: texte, comme avant
+        assert posted['lines'] == "ligne 1 \ufffd\nligne 2 é\n"
+        assert 'data_b64' not in posted
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests des statistiques de latence WAN (échantillons fixes) et de la mesure
+par connexions TCP locales
+"""
+
+from async_scanner import AsyncProbeEngine
+from wan_latency import WanLatencyProber, latency_stats, percentile
+
+
+def test_latency_stats_on_fixed_samples():
+    samples = [10.0, 20.0, None, 30.0, 40.0, None, 50.0, 60.0, 70.0, 80.0, 90.0, 100.0]
+    assert latency_stats(samples) == {
+        "sent": 12,
+        "received": 10,
+        "loss_percent": 16.7,
+        "min_ms": 10.0,
+        "mean_ms": 55.0,
+        "p50_ms": 55.0,
+        "p95_ms": 95.5,
+        "p99_ms": 99.1,
+        "max_ms": 100.0,
+        "jitter_ms": 10.0
+    }
+
+
+def test_jitter_follows_reply_order():
+    # Écarts entre réponses consécutives (les pertes sont sautées): |30-10|, |20-30|
+    stats = latency_stats([10.0, None, 30.0, 20.0])
+    assert stats['jitter_ms'] == 15.0
+    assert stats['p50_ms'] == 20.0
+    assert stats['loss_percent'] == 25.0
+
+
+def test_latency_stats_all_lost():
+    assert latency_stats([None] * 5) == {
+        "sent": 5, "received": 0, "loss_percent": 100.0,
+        "min_ms": None, "mean_ms": None, "p50_ms": None, "p95_ms": None,
+        "p99_ms": None, "max_ms": None, "jitter_ms": None
+    }
+
+
+def test_latency_stats_edge_cases():
+    single = latency_stats([12.345])
+    assert single['p50_ms'] == single['p95_ms'] == single['max_ms'] == 12.35
+    assert single['jitter_ms'] is None
+    assert latency_stats([])['loss_percent'] is None
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([], 95) is None
+
+
+def make_prober(tcp_port: int) -> WanLatencyProber:
+    engine = AsyncProbeEngine(timeout=0.2, retries=0, icmp=False, resolve_names=False)
+    return WanLatencyProber(engine, count=3, interval=0, tcp_port=tcp_port)
+
+
+def test_prober_measures_tcp_connections(open_port, closed_port):
+    for port in (open_port, closed_port):
+        # Connexion refusée comprise: le RST mesure l'aller-retour
+        stats = make_prober(port).run('127.0.0.1')
+        assert stats['method'] == f"tcp:{port}"
+        assert stats['address'] == '127.0.0.1'
+        assert (stats['sent'], stats['received'], stats['loss_percent']) == (3, 3, 0.0)
+        assert 0 <= stats['min_ms'] <= stats['p50_ms'] <= stats['max_ms']
+
+
+def test_prober_without_answer(silent_port):
+    stats = make_prober(silent_port).run('127.0.0.1')
+    assert (stats['sent'], stats['received'], stats['loss_percent']) == (3, 0, 100.0)
+    assert stats['p95_ms'] is None
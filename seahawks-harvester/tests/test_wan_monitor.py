@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests de l'échantillonnage WAN: tampon circulaire et résumés par intervalle
+"""
+
+from datetime import datetime
+
+from wan_monitor import SampleRing, WanMonitor
+
+
+def test_ring_keeps_samples_in_order():
+    ring = SampleRing(8)
+    ring.append(100.0, 0, 12.5)
+    ring.append(110.0, 1, None)
+    ring.append(120.0, 0, 13.5)
+    
+    assert ring.count == 3
+    assert list(ring.since(0)) == [(100.0, 0, 12.5), (110.0, 1, None), (120.0, 0, 13.5)]
+    assert list(ring.since(110.0)) == [(110.0, 1, None), (120.0, 0, 13.5)]
+    assert ring.nbytes == 17 * 8
+
+
+def test_wrapped_ring_keeps_the_most_recent():
+    ring = SampleRing(4)
+    for second in range(10):
+        ring.append(float(second), second % 2, None if second == 8 else float(second))
+    
+    # Les six plus anciens ont été écrasés, l'ordre reste chronologique
+    assert ring.count == 4
+    assert list(ring.since(0)) == [
+        (6.0, 0, 6.0), (7.0, 1, 7.0), (8.0, 0, None), (9.0, 1, 9.0)
+    ]
+    assert list(ring.since(8.5)) == [(9.0, 1, 9.0)]
+
+
+def make_monitor(capacity: int = 64) -> WanMonitor:
+    return WanMonitor(["wan-a.example", "wan-b.example"], capacity=capacity, summary_seconds=300)
+
+
+def test_summaries_per_window_and_target():
+    monitor = make_monitor()
+    start = 1_800_000_000.0  # Multiple de 300: début d'intervalle
+    samples = {0: [10.0, 20.0, None, 30.0], 1: [None, None, None, None]}
+    for offset in range(4):
+        for target, latencies in samples.items():
+            monitor.samples.append(start + 60 * offset, target, latencies[offset])
+    monitor.samples.append(start + 300, 0, 40.0)
+    
+    windows = monitor.summaries(start, start + 400)
+    assert [window['start'] for window in windows] == [
+        datetime.fromtimestamp(start).isoformat(),
+        datetime.fromtimestamp(start + 300).isoformat()
+    ]
+    assert windows[1]['end'] == datetime.fromtimestamp(start + 400).isoformat()
+    
+    first = windows[0]['targets']
+    assert first["wan-a.example"]['method'] == "icmp"
+    assert (first["wan-a.example"]['received'], first["wan-a.example"]['loss_percent']) == (3, 25.0)
+    assert first["wan-a.example"]['p50_ms'] == 20.0
+    assert first["wan-a.example"]['jitter_ms'] == 10.0
+    assert first["wan-b.example"]['loss_percent'] == 100.0
+    assert first["wan-b.example"]['p95_ms'] is None
+    assert list(windows[1]['targets']) == ["wan-a.example"]
+
+
+def test_summaries_after_wrap_only_cover_kept_samples():
+    monitor = make_monitor(capacity=6)
+    start = 1_800_000_000.0
+    for offset in range(12):
+        monitor.samples.append(start + 60 * offset, 0, float(offset))
+    
+    windows = monitor.summaries(start, start + 720)
+    stats = [window['targets']["wan-a.example"] for window in windows]
+    # Restent les échantillons 6 à 11: fin du 2e intervalle et tout le 3e
+    assert [window['start'] for window in windows] == [
+        datetime.fromtimestamp(start + 300).isoformat(),
+        datetime.fromtimestamp(start + 600).isoformat()
+    ]
+    assert [(s['sent'], s['min_ms'], s['max_ms']) for s in stats] == [(4, 6.0, 9.0), (2, 10.0, 11.0)]
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Mesure de la latence WAN sans processus externe
+Série d'échos ICMP (ou de connexions TCP à défaut) et statistiques:
+moyenne, percentiles, gigue et perte
+"""
+
+import asyncio
+import math
+import socket
+from typing import Dict, List, Optional
+
+from async_scanner import AsyncProbeEngine
+
+
+def percentile(sorted_samples: List[float], rank: float) -> Optional[float]:
+    """Percentile (0-100) d'une série triée, par interpolation linéaire"""
+    if not sorted_samples:
+        return None
+    position = (len(sorted_samples) - 1) * rank / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+
+def latency_stats(samples: List[Optional[float]]) -> Dict:
+    """
+    Statistiques d'une série de mesures (ms, None pour une sonde perdue)
+    
+    La gigue est l'écart moyen entre deux réponses consécutives (comme
+    l'interarrival jitter de RTP, sans lissage).
+    
+    Returns:
+        {sent, received, loss_percent, min_ms, mean_ms, p50_ms, p95_ms,
+        p99_ms, max_ms, jitter_ms}; les latences sont None sans réponse
+    """
+    replies = [sample for sample in samples if sample is not None]
+    ordered = sorted(replies)
+    
+    def rounded(value):
+        return round(value, 2) if value is not None else None
+    
+    jitter = None
+    if len(replies) > 1:
+        jitter = sum(abs(b - a) for a, b in zip(replies, replies[1:])) / (len(replies) - 1)
+    
+    return {
+        "sent": len(samples),
+        "received": len(replies),
+        "loss_percent": round(100 * (len(samples) - len(replies)) / len(samples), 1) if samples else None,
+        "min_ms": rounded(ordered[0] if ordered else None),
+        "mean_ms": rounded(sum(replies) / len(replies) if replies else None),
+        "p50_ms": rounded(percentile(ordered, 50)),
+        "p95_ms": rounded(percentile(ordered, 95)),
+        "p99_ms": rounded(percentile(ordered, 99)),
+        "max_ms": rounded(ordered[-1] if ordered else None),
+        "jitter_ms": rounded(jitter)
+    }
+
+
+class WanLatencyProber:
+    """
+    Mesure de latence vers un hôte de test, dans le processus
+    
+    Échos ICMP quand le système le permet (socket ICMP sans privilège ou
+    brute); sinon, ou si aucun écho ne revient (ICMP filtré en sortie),
+    temps de connexion TCP vers tcp_port. Une connexion refusée (RST)
+    compte comme une réponse: seul l'aller-retour est mesuré.
+    """
+    
+    def __init__(self, engine: AsyncProbeEngine = None, count: int = 10,
+                 interval: float = 0.2, tcp_port: int = 443):
+        self.engine = engine or AsyncProbeEngine(concurrency=8, retries=0, resolve_names=False)
+        self.count = count
+        self.interval = interval
+        self.tcp_port = tcp_port
+    
+    async def _resolve(self, host: str) -> str:
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(host, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+        return infos[0][4][0]
+    
+    async def measure(self, host: str) -> Dict:
+        """
+        Série de mesures vers host (adresse ou nom)
+        
+        Returns:
+            Statistiques de latency_stats, avec target, address et method
+            ('icmp' ou 'tcp:<port>')
+        
+        Raises:
+            OSError: nom d'hôte non résolu
+        """
+        address = await self._resolve(host)
+        
+        method = "icmp"
+        samples = []
+        if self.engine.icmp and self.engine.icmp_available:
+            samples = await self.engine.measure_rtt(address, count=self.count, interval=self.interval)
+        if not any(sample is not None for sample in samples):
+            method = f"tcp:{self.tcp_port}"
+            samples = await self.engine.measure_rtt(
+                address, port=self.tcp_port, count=self.count, interval=self.interval
+            )
+        
+        return {"target": host, "address": address, "method": method, **latency_stats(samples)}
+    
+    def run(self, host: str) -> Dict:
+        """Version bloquante de measure (nouvelle boucle asyncio)"""
+        return asyncio.run(self.measure(host))
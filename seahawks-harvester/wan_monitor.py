@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Surveillance continue des chemins WAN
+Échantillons de latence vers plusieurs cibles, en tâche de fond, dans un
+tampon circulaire de taille fixe résumé par intervalle dans les rapports
+"""
+
+import asyncio
+import math
+import socket
+import threading
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from async_scanner import AsyncProbeEngine
+from scheduler import Cadence
+from wan_latency import latency_stats
+
+
+class SampleRing:
+    """
+    Tampon circulaire d'échantillons (instant, cible, latence)
+    
+    Trois tableaux typés préalloués (array), pas un objet par échantillon:
+    17 octets par place, quelle que soit la durée de fonctionnement. Une
+    sonde perdue est enregistrée avec une latence NaN. Les plus anciens
+    échantillons sont écrasés une fois le tampon plein.
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = max(capacity, 1)
+        self.timestamps = array('d', bytes(8 * self.capacity))
+        self.latencies = array('d', bytes(8 * self.capacity))
+        self.targets = array('B', bytes(self.capacity))
+        self.count = 0
+        self._next = 0
+        self._lock = threading.Lock()
+    
+    def append(self, timestamp: float, target: int, latency: Optional[float]):
+        with self._lock:
+            index = self._next
+            self.timestamps[index] = timestamp
+            self.latencies[index] = math.nan if latency is None else latency
+            self.targets[index] = target
+            self._next = (index + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+    
+    def since(self, start: float) -> Iterator[Tuple[float, int, Optional[float]]]:
+        """Échantillons à partir de start, du plus ancien au plus récent"""
+        with self._lock:
+            first = (self._next - self.count) % self.capacity
+            indexes = [(first + offset) % self.capacity for offset in range(self.count)]
+            samples = [
+                (self.timestamps[i], self.targets[i], self.latencies[i])
+                for i in indexes if self.timestamps[i] >= start
+            ]
+        for timestamp, target, latency in samples:
+            yield timestamp, target, None if math.isnan(latency) else latency
+    
+    @property
+    def nbytes(self) -> int:
+        """Mémoire occupée par les échantillons (octets)"""
+        return sum(a.itemsize * len(a) for a in (self.timestamps, self.latencies, self.targets))
+
+
+class WanMonitor:
+    """
+    Échantillonnage de fond de la latence vers plusieurs cibles WAN
+    
+    Toutes les interval secondes (échéances calées sur l'horloge, décalées
+    par franchise), chaque cible reçoit une sonde: écho ICMP si possible,
+    connexion TCP vers tcp_port sinon, ou dès qu'une cible ne répond qu'en
+    TCP (ICMP filtré). Le thread a sa propre boucle asyncio et son propre
+    moteur de sondes: il tourne aussi pendant les scans.
+    """
+    
+    MAX_TARGETS = 255  # Index de cible sur un octet
+    
+    def __init__(self, targets: List[str], interval: float = 10, capacity: int = 32768,
+                 summary_seconds: float = 300, phase: float = 0.0,
+                 engine: AsyncProbeEngine = None, tcp_port: int = 443):
+        self.targets = list(targets)[:self.MAX_TARGETS]
+        self.interval = interval
+        self.summary_seconds = summary_seconds
+        self.tcp_port = tcp_port
+        self.engine = engine or AsyncProbeEngine(concurrency=16, retries=0, resolve_names=False)
+        self.samples = SampleRing(capacity)
+        self.started_at = None
+        
+        self._cadence = Cadence(interval, phase)
+        self._addresses = [None] * len(self.targets)
+        self._use_tcp = [False] * len(self.targets)
+        self._reported_until = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Démarre l'échantillonnage en tâche de fond"""
+        if self._thread is not None:
+            return
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="wan-monitor", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = None):
+        """Arrête l'échantillonnage (attend la fin du tour en cours)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        try:
+            while not self._stop.wait(max(self._cadence.next_after(time.time()) - time.time(), 0)):
+                loop.run_until_complete(self.sample_once())
+        finally:
+            loop.close()
+    
+    async def _resolve(self, index: int) -> Optional[str]:
+        if self._addresses[index] is None:
+            loop = asyncio.get_running_loop()
+            try:
+                infos = await loop.getaddrinfo(
+                    self.targets[index], None, family=socket.AF_INET, type=socket.SOCK_STREAM
+                )
+            except OSError:
+                return None  # Nouvel essai au tour suivant
+            self._addresses[index] = infos[0][4][0]
+        return self._addresses[index]
+    
+    async def _probe(self, index: int) -> Optional[float]:
+        address = await self._resolve(index)
+        if address is None:
+            return None
+        if not self._use_tcp[index]:
+            latency = await self.engine.icmp_echo(address)
+            if latency is not None:
+                return latency
+        state, latency = await self.engine.tcp_connect(address, self.tcp_port)
+        if state == 'filtered':
+            return None
+        # Répond en TCP mais pas en ICMP: connexions TCP désormais
+        self._use_tcp[index] = True
+        return latency
+    
+    async def sample_once(self):
+        """Un tour: une sonde par cible, en parallèle"""
+        timestamp = time.time()
+        latencies = await asyncio.gather(*(self._probe(i) for i in range(len(self.targets))))
+        for index, latency in enumerate(latencies):
+            self.samples.append(timestamp, index, latency)
+    
+    def summaries(self, start: float, end: float = None) -> List[Dict]:
+        """
+        Résumés par intervalle de summary_seconds (calés sur l'horloge)
+        
+        Returns:
+            [{start, end, targets: {cible: statistiques de latency_stats}}]
+        """
+        end = end or time.time()
+        windows = {}
+        for timestamp, target, latency in self.samples.since(start):
+            if timestamp >= end:
+                break
+            window = math.floor(timestamp / self.summary_seconds) * self.summary_seconds
+            windows.setdefault(window, {}).setdefault(target, []).append(latency)
+        
+        return [
+            {
+                "start": datetime.fromtimestamp(max(window, start)).isoformat(),
+                "end": datetime.fromtimestamp(min(window + self.summary_seconds, end)).isoformat(),
+                "targets": {
+                    self.targets[target]: {
+                        "method": f"tcp:{self.tcp_port}" if self._use_tcp[target] else "icmp",
+                        **latency_stats(latencies)
+                    }
+                    for target, latencies in sorted(targets.items())
+                }
+            }
+            for window, targets in sorted(windows.items())
+        ]
+    
+    def report(self) -> Dict:
+        """
+        Section wan_monitor d'un rapport: résumés depuis le rapport précédent
+        (ou depuis le démarrage)
+        """
+        end = time.time()
+        start = self._reported_until or self.started_at or end
+        self._reported_until = end
+        return {
+            "targets": self.targets,
+            "interval_seconds": self.interval,
+            "summary_seconds": self.summary_seconds,
+            "windows": self.summaries(start, end)
+        }
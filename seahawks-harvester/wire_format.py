@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Format de transport Harvester → Nester
+Encodage compact (JSON sans espaces ou MessagePack) et compression (gzip, zstd)
+"""
+
+import gzip
+import json
+import zlib
+from typing import Dict, Iterable, Tuple
+
+try:
+    import zstandard
+except ImportError:  # Compression zstd optionnelle
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:  # Encodage MessagePack optionnel
+    msgpack = None
+
+
+JSON_TYPE = "application/json"
+MSGPACK_TYPE = "application/msgpack"
+
+# En dessous de cette taille, la compression coûte plus qu'elle ne rapporte
+COMPRESSION_MIN_BYTES = 1024
+
+# Format utilisé face à un Nester qui n'annonce rien (ancienne version)
+LEGACY_WIRE = (JSON_TYPE, "identity")
+
+
+def local_encodings() -> list:
+    """Compressions disponibles localement, de la plus efficace à la plus simple"""
+    encodings = ["gzip", "identity"]
+    if zstandard is not None:
+        encodings.insert(0, "zstd")
+    return encodings
+
+
+def local_content_types() -> list:
+    """Encodages disponibles localement, du plus compact au plus simple"""
+    content_types = [JSON_TYPE]
+    if msgpack is not None:
+        content_types.insert(0, MSGPACK_TYPE)
+    return content_types
+
+
+def choose_wire_format(capabilities: Dict, compression: str = "auto",
+                       content_format: str = "auto") -> Tuple[str, str]:
+    """
+    Choisit le format d'upload commun au Harvester et au Nester
+    
+    Args:
+        capabilities: Réponse de GET /api/wire (None si indisponible)
+        compression: 'auto', 'zstd', 'gzip' ou 'none'
+        content_format: 'auto', 'msgpack' ou 'json'
+    
+    Returns:
+        (Content-Type, Content-Encoding)
+    """
+    if not capabilities:
+        return LEGACY_WIRE
+    
+    remote_encodings = capabilities.get("content_encodings", ["identity"])
+    remote_types = capabilities.get("content_types", [JSON_TYPE])
+    
+    if compression == "none":
+        wanted_encodings = ["identity"]
+    elif compression == "auto":
+        wanted_encodings = local_encodings()
+    else:
+        wanted_encodings = [compression, "identity"]
+    
+    if content_format == "json":
+        wanted_types = [JSON_TYPE]
+    elif content_format == "msgpack":
+        wanted_types = [MSGPACK_TYPE, JSON_TYPE]
+    else:
+        wanted_types = local_content_types()
+    
+    encoding = _first_common(wanted_encodings, local_encodings(), remote_encodings, "identity")
+    content_type = _first_common(wanted_types, local_content_types(), remote_types, JSON_TYPE)
+    return content_type, encoding
+
+
+def _first_common(wanted: Iterable, local: list, remote: list, default: str) -> str:
+    for value in wanted:
+        if value in local and value in remote:
+            return value
+    return default
+
+
+def encode_payload(data, content_type: str = JSON_TYPE, encoding: str = "identity",
+                   min_size: int = COMPRESSION_MIN_BYTES) -> Tuple[bytes, Dict]:
+    """
+    Sérialise et compresse un objet pour l'upload
+    
+    Returns:
+        (corps, en-têtes HTTP à envoyer)
+    """
+    if content_type == MSGPACK_TYPE:
+        body = msgpack.packb(data, use_bin_type=True)
+    else:
+        content_type = JSON_TYPE
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    
+    headers = {'Content-Type': content_type}
+    
+    if encoding == "identity" or len(body) < min_size:
+        return body, headers
+    
+    if encoding == "zstd":
+        body = zstandard.ZstdCompressor(level=3).compress(body)
+    else:
+        encoding = "gzip"
+        body = gzip.compress(body, compresslevel=6)
+    
+    headers['Content-Encoding'] = encoding
+    return body, headers
+
+
+def decode_payload(body: bytes, content_type: str = JSON_TYPE, encoding: str = "identity"):
+    """Inverse de encode_payload (benchmarks et vérifications)"""
+    if encoding == "zstd":
+        body = zstandard.ZstdDecompressor().decompress(body)
+    elif encoding == "gzip":
+        body = zlib.decompress(body, wbits=47)
+    
+    if content_type == MSGPACK_TYPE:
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark du Nester
+Mesure la latence des endpoints de lecture avec un parc de sondes simulé
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def make_report(franchise_id: str, hosts_count: int = 12) -> dict:
+    """Génère un rapport de scan synthétique"""
+    hosts = []
+    for i in range(hosts_count):
+        hosts.append({
+            "ip": f"192.168.1.{i + 1}",
+            "hostname": f"host-{i + 1}",
+            "state": "up",
+            "mac_address": f"00:11:22:33:44:{i:02x}",
+            "vendor": "Unknown",
+            "os": {"name": "Unknown", "accuracy": 0},
+            "ports": [
+                {"port": 22, "state": "open", "service": "ssh", "version": "8.9", "product": "OpenSSH"},
+                {"port": 443, "state": "open", "service": "https", "version": "", "product": "nginx"}
+            ]
+        })
+    
+    return {
+        "scan_id": "scan_bench",
+        "franchise_id": franchise_id,
+        "timestamp": "2026-01-26T10:30:00",
+        "hosts": hosts,
+        "summary": {
+            "total_hosts": hosts_count,
+            "hosts_up": hosts_count,
+            "hosts_down": 0,
+            "total_ports_open": hosts_count * 2
+        },
+        "wan_latency_ms": 15.2,
+        "scan_duration_seconds": 42.0
+    }
+
+
+def populate(manager, probe_count: int):
+    """Enregistre les sondes et leur premier rapport"""
+    for i in range(probe_count):
+        franchise_id = f"franchise_{i:05d}"
+        manager.register_probe(franchise_id, f"Franchise {i:05d}")
+        manager.save_report(franchise_id, make_report(franchise_id))
+
+
+def measure(client, url: str, iterations: int, headers: dict = None, before=None) -> dict:
+    """
+    Mesure la latence d'un endpoint GET
+    
+    Args:
+        headers: En-têtes de chaque requête (If-None-Match...)
+        before: Appelée avant chaque requête, hors mesure (invalidation du cache)
+    """
+    timings = []
+    size = 0
+    for _ in range(iterations):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+        size = len(response.data)
+    
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 2),
+        "bytes": size
+    }
+
+
+def measure_payload(manager, include_hosts: bool, iterations: int) -> dict:
+    """Mesure taille et temps de sérialisation de la liste des sondes"""
+    timings = []
+    size = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        payload = json.dumps(manager.get_all_probes(include_hosts=include_hosts))
+        timings.append((time.perf_counter() - start) * 1000)
+        size = len(payload)
+    
+    return {"median_ms": round(statistics.median(timings), 2), "bytes": size}
+
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark des endpoints du Nester")
+    parser.add_argument("--probes", default="32,500,5000", help="Tailles de parc à tester")
+    parser.add_argument("--iterations", type=int, default=20, help="Requêtes par mesure")
+    parser.add_argument(
+        "--urls", nargs='+',
+        default=["/api/probes", "/api/probes?limit=50&fields=franchise_id,status"],
+        help="Endpoints à mesurer"
+    )
+    args = parser.parse_args()
+    
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Le module instancie un gestionnaire global dans ./data
+        os.chdir(tmp_dir)
+        import nester as nester_module
+        nester_module.nester.logger.disabled = True
+        
+        for probe_count in [int(p) for p in args.probes.split(',')]:
+            manager = nester_module.NesterManager(f"{tmp_dir}/data_{probe_count}")
+            manager.logger.disabled = True
+            manager.ingestion.start()
+            populate(manager, probe_count)
+            manager.ingestion.flush()
+            
+            nester_module.nester = manager
+            client = nester_module.app.test_client()
+            
+            # Charge complète (ancien format, avec les hôtes) contre résumé
+            for label, include_hosts in (("avec hôtes", True), ("résumé", False)):
+                result = measure_payload(manager, include_hosts, args.iterations)
+                print(
+                    f"{probe_count:>6} sondes  {'payload ' + label:<56} "
+                    f"médiane {result['median_ms']:>9.2f} ms  "
+                    f"{'':>18}{result['bytes']:>11} octets"
+                )
+            
+            # Corps reconstruit (après une écriture), servi depuis le cache, puis 304
+            for url in args.urls:
+                modes = (
+                    ("", lambda: {}, lambda: manager.responses.bump('probes')),
+                    (" [cache]", lambda: {}, None),
+                    (" [304]", lambda: {"If-None-Match": client.get(url).headers['ETag']}, None)
+                )
+                for label, headers, before in modes:
+                    result = measure(client, url, args.iterations, headers(), before)
+                    print(
+                        f"{probe_count:>6} sondes  {url + label:<56} "
+                        f"médiane {result['median_ms']:>9.2f} ms  "
+                        f"p95 {result['p95_ms']:>9.2f} ms  "
+                        f"{result['bytes']:>11} octets"
+                    )
+
+
+if __name__ == "__main__":
+    main()
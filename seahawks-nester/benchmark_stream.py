@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Banc de charge des mises à jour en direct (/api/stream)
+Mesure le temps CPU du serveur avec de nombreux navigateurs abonnés, sous
+un flux de heartbeats et de rapports, et le compare à l'actualisation
+périodique (/api/status + /api/probes toutes les 30 secondes)
+"""
+
+import argparse
+import http.client
+import logging
+import multiprocessing
+import os
+import selectors
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+def serve(conn, probe_count: int, viewers: int):
+    """Processus serveur: Nester sur un port local, piloté par conn"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    os.environ['NESTER_STREAM_MAX_CLIENTS'] = str(viewers)
+    os.chdir(tempfile.mkdtemp())
+    from werkzeug.serving import make_server
+    from benchmark import make_report, populate
+    import nester as nester_module
+    
+    manager = nester_module.nester
+    manager.logger.disabled = True
+    populate(manager, probe_count)
+    manager.ingestion.flush()
+    franchise_ids = sorted(manager._probes)
+    
+    server = make_server("127.0.0.1", 0, nester_module.app, threaded=True)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conn.send(server.server_port)
+    
+    while True:
+        command, *args = conn.recv()
+        if command == 'stop':
+            break
+        if command == 'stats':
+            conn.send((time.process_time(), manager.live.get_stats()))
+        elif command == 'load':
+            # Heartbeats à rythme fixe; un sur report_every est un rapport complet
+            seconds, rate, report_every = args
+            started = time.perf_counter()
+            cpu = time.process_time()
+            count = 0
+            while time.perf_counter() - started < seconds:
+                franchise_id = franchise_ids[count % len(franchise_ids)]
+                if count % report_every == 0:
+                    manager.save_report(franchise_id, make_report(franchise_id))
+                else:
+                    manager.update_probe_heartbeat(franchise_id)
+                count += 1
+                delay = started + count / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            manager.ingestion.flush()
+            conn.send((time.process_time() - cpu, count))
+    
+    manager.live.close()
+    server.shutdown()
+
+
+class Viewers:
+    """Navigateurs abonnés à /api/stream, lus par un seul thread (selectors)"""
+    
+    def __init__(self, port: int, count: int):
+        self.selector = selectors.DefaultSelector()
+        self.events = {}
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        for _ in range(count):
+            sock = socket.create_connection(("127.0.0.1", port))
+            sock.sendall(b"GET /api/stream HTTP/1.0\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+            sock.setblocking(False)
+            self.events[sock] = 0
+            self.selector.register(sock, selectors.EVENT_READ)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        pending = {sock: b"" for sock in self.events}
+        while not self._stop.is_set():
+            for key, _ in self.selector.select(timeout=0.1):
+                sock = key.fileobj
+                try:
+                    data = sock.recv(65536)
+                except BlockingIOError:
+                    continue
+                if not data:
+                    self.selector.unregister(sock)
+                    continue
+                # Messages SSE complets (terminés par une ligne vide); keepalives non comptés
+                *messages, pending[sock] = (pending[sock] + data).split(b"\n\n")
+                with self._lock:
+                    self.events[sock] += sum(1 for message in messages if b"event: " in message)
+                    self.bytes += len(data)
+    
+    def counts(self) -> list:
+        with self._lock:
+            return list(self.events.values())
+    
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        for sock in self.events:
+            sock.close()
+
+
+def poll_round(port: int, viewers: int) -> int:
+    """Une actualisation de chaque navigateur (ancien fonctionnement), en octets reçus"""
+    def poll(_):
+        size = 0
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        for url in ("/api/status", "/api/probes"):
+            connection.request("GET", url)
+            size += len(connection.getresponse().read())
+        connection.close()
+        return size
+    
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        return sum(pool.map(poll, range(viewers)))
+
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Banc de charge des mises à jour en direct du Nester")
+    parser.add_argument("--viewers", type=int, default=200, help="Navigateurs abonnés")
+    parser.add_argument("--probes", type=int, default=32, help="Sondes simulées")
+    parser.add_argument("--rate", type=float, default=50, help="Heartbeats par seconde")
+    parser.add_argument("--report-every", type=int, default=10, help="Un rapport tous les N heartbeats")
+    parser.add_argument("--seconds", type=float, default=10, help="Durée de chaque mesure")
+    args = parser.parse_args()
+    
+    context = multiprocessing.get_context('spawn')
+    conn, child_conn = context.Pipe()
+    server = context.Process(target=serve, args=(child_conn, args.probes, args.viewers))
+    server.start()
+    port = conn.recv()
+    
+    def server_stats():
+        conn.send(('stats',))
+        return conn.recv()
+    
+    def load():
+        conn.send(('load', args.seconds, args.rate, args.report_every))
+        return conn.recv()
+    
+    try:
+        # Charge seule: coût des heartbeats et rapports, sans abonné
+        cpu_alone, count = load()
+        
+        viewers = Viewers(port, args.viewers)
+        time.sleep(1)
+        cpu, stats = server_stats()
+        time.sleep(args.seconds)
+        cpu_idle = server_stats()[0] - cpu
+        connected = stats['subscribers']
+        
+        # Même charge, diffusée à tous les abonnés
+        published = server_stats()[1]['published']
+        cpu_with_viewers, _ = load()
+        time.sleep(1)
+        stats = server_stats()[1]
+        events = stats['published'] - published
+        counts = viewers.counts()
+        viewers.close()
+        
+        cpu = server_stats()[0]
+        poll_bytes = poll_round(port, args.viewers)
+        cpu_poll = server_stats()[0] - cpu
+    finally:
+        conn.send(('stop',))
+        server.join()
+    
+    received = sum(counts)
+    per_event_us = (cpu_with_viewers - cpu_alone) / max(events * connected, 1) * 1e6
+    print(f"{connected} navigateurs abonnés ({args.probes} sondes, {count / args.seconds:.0f} écritures/s)")
+    print(f"  inactifs (keepalive)          CPU serveur {cpu_idle / args.seconds * 1000:8.2f} ms/s")
+    print(f"  charge sans abonné            CPU serveur {cpu_alone / args.seconds * 1000:8.2f} ms/s")
+    print(f"  charge avec abonnés           CPU serveur {cpu_with_viewers / args.seconds * 1000:8.2f} ms/s"
+          f"  ({per_event_us:.1f} µs par événement et par navigateur)")
+    print(f"  événements diffusés {events}, sérialisés une fois: {stats['bytes_published']} octets au total")
+    print(f"  reçus: {received}/{events * connected}"
+          f" (min {min(counts)}, max {max(counts)} par navigateur), {stats['resyncs']} resync")
+    print(f"Actualisation périodique: {args.viewers} navigateurs × (/api/status + /api/probes)")
+    print(f"  un tour                       CPU serveur {cpu_poll * 1000:8.2f} ms, {poll_bytes} octets"
+          f"  (soit {cpu_poll / 30 * 1000:.2f} ms/s et {poll_bytes / 30:.0f} octets/s toutes les 30 s)")
+    raise SystemExit(0 if received == events * connected and connected == args.viewers else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -45,13 +45,65 @@ function App() {
     }
   }
 
+  // Événement en direct concernant une sonde
+  const applyProbeEvent = (type, data) => {
+    setProbes(current => {
+      const index = current.findIndex(p => p.franchise_id === data.franchise_id)
+      if (type === 'probe') {
+        if (index === -1) {
+          return [...current, data].sort((a, b) => a.franchise_name.localeCompare(b.franchise_name))
+        }
+        return current.map((p, i) => (i === index ? { ...p, ...data } : p))
+      }
+      if (index === -1) return current
+      
+      const update = {
+        heartbeat: { last_seen: data.last_seen, last_seen_ago_seconds: 0 },
+        status: { status: data.status },
+        report: { last_report: data.last_report }
+      }[type]
+      return current.map((p, i) => (i === index ? { ...p, ...update } : p))
+    })
+    setLastUpdate(new Date())
+  }
+
   useEffect(() => {
     fetchData()
     
-    if (autoRefresh) {
+    if (!autoRefresh) return
+    
+    // Mises à jour en direct (Server-Sent Events); actualisation toutes les 30 secondes en secours
+    if (!window.EventSource) {
       const interval = setInterval(fetchData, 30000)
       return () => clearInterval(interval)
     }
+    
+    const source = new EventSource('/api/stream')
+    let interval = null
+    let reconnecting = false
+    
+    ;['probe', 'heartbeat', 'status', 'report'].forEach(type => {
+      source.addEventListener(type, event => applyProbeEvent(type, JSON.parse(event.data)))
+    })
+    source.addEventListener('statistics', event => setStats(JSON.parse(event.data)))
+    // Trop d'événements manqués: état complet
+    source.addEventListener('resync', fetchData)
+    
+    source.onopen = () => {
+      if (reconnecting) fetchData()
+      reconnecting = false
+    }
+    source.onerror = () => {
+      reconnecting = true
+      if (source.readyState === EventSource.CLOSED && interval === null) {
+        interval = setInterval(fetchData, 30000)
+      }
+    }
+    
+    return () => {
+      source.close()
+      if (interval !== null) clearInterval(interval)
+    }
   }, [autoRefresh])
 
   // Filtrage des sondes
@@ -1,7 +1,22 @@
-import { PieChart, Pie, Cell, ResponsiveContainer, Legend, Tooltip, BarChart, Bar, XAxis, YAxis, CartesianGrid } from 'recharts'
+import { useState, useEffect } from 'react'
+import axios from 'axios'
+import { PieChart, Pie, Cell, ResponsiveContainer, Legend, Tooltip, BarChart, Bar, XAxis, YAxis, CartesianGrid, LineChart, Line } from 'recharts'
 import { BarChart3, Activity } from 'lucide-react'
 
 function GlobalChart({ probes, stats }) {
+  const [history, setHistory] = useState([])
+
+  // Historique de latence sur 7 jours (agrégats précalculés côté Nester)
+  useEffect(() => {
+    axios.get('/api/history?range=7d&step=6h')
+      .then(response => setHistory(response.data.points.map(p => ({
+        time: new Date(p.timestamp).toLocaleDateString('fr-FR', { day: '2-digit', month: '2-digit', hour: '2-digit' }),
+        avg: p.latency_avg_ms,
+        p95: p.latency_p95_ms
+      }))))
+      .catch(error => console.error('Erreur chargement historique:', error))
+  }, [stats])
+
   // Données pour le graphique des états
   const connectedCount = probes.filter(p => p.status === 'connected').length
   const disconnectedCount = probes.length - connectedCount
@@ -81,6 +96,26 @@ function GlobalChart({ probes, stats }) {
         </div>
       </div>
 
+      {/* Tendance de latence WAN */}
+      {history.length > 0 && (
+        <div className="mt-6 pt-6 border-t border-gray-200">
+          <h3 className="text-lg font-semibold text-gray-700 mb-4 text-center">
+            Latence WAN sur 7 jours (ms)
+          </h3>
+          <ResponsiveContainer width="100%" height={250}>
+            <LineChart data={history}>
+              <CartesianGrid strokeDasharray="3 3" />
+              <XAxis dataKey="time" tick={{ fontSize: 11 }} />
+              <YAxis />
+              <Tooltip />
+              <Legend />
+              <Line type="monotone" dataKey="avg" name="Moyenne" stroke="#002244" dot={false} />
+              <Line type="monotone" dataKey="p95" name="p95" stroke="#69BE28" dot={false} />
+            </LineChart>
+          </ResponsiveContainer>
+        </div>
+      )}
+
       {/* Global Stats */}
       <div className="mt-6 pt-6 border-t border-gray-200">
         <div className="grid grid-cols-2 md:grid-cols-4 gap-4 text-center">
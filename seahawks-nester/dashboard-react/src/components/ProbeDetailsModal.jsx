@@ -6,13 +6,27 @@ function ProbeDetailsModal({ probe, onClose }) {
   const [activeTab, setActiveTab] = useState('overview')
   const [logs, setLogs] = useState(null)
   const [loadingLogs, setLoadingLogs] = useState(false)
+  const [hosts, setHosts] = useState(null)
 
   useEffect(() => {
     if (activeTab === 'logs' && !logs) {
       loadLogs()
     }
+    if (activeTab === 'equipment' && !hosts) {
+      loadHosts()
+    }
   }, [activeTab])
 
+  const loadHosts = async () => {
+    try {
+      const response = await axios.get(`/api/probe/${probe.franchise_id}/hosts`)
+      setHosts(response.data)
+    } catch (error) {
+      console.error('Erreur chargement équipements:', error)
+      setHosts([])
+    }
+  }
+
   const loadLogs = async () => {
     setLoadingLogs(true)
     try {
@@ -134,6 +148,11 @@ function ProbeDetailsModal({ probe, onClose }) {
                       ? `${probe.last_report.wan_latency_ms}ms` 
                       : 'N/A'}
                   </p>
+                  {probe.last_report?.wan_latency?.received > 0 && (
+                    <p className="text-xs text-gray-500 mt-1">
+                      p95 {probe.last_report.wan_latency.p95_ms}ms · gigue {probe.last_report.wan_latency.jitter_ms ?? '--'}ms · perte {probe.last_report.wan_latency.loss_percent}%
+                    </p>
+                  )}
                 </div>
               </div>
 
@@ -164,8 +183,8 @@ function ProbeDetailsModal({ probe, onClose }) {
 
           {activeTab === 'equipment' && (
             <div className="space-y-4">
-              {probe.last_report?.hosts && probe.last_report.hosts.length > 0 ? (
-                probe.last_report.hosts.map((host, idx) => (
+              {hosts && hosts.length > 0 ? (
+                hosts.map((host, idx) => (
                   <div key={idx} className="border border-gray-200 rounded-lg p-4 hover:border-seahawks-blue transition-colors">
                     <div className="flex items-center justify-between mb-2">
                       <h4 className="font-semibold text-gray-900">{host.ip}</h4>
@@ -215,7 +234,7 @@ function ProbeDetailsModal({ probe, onClose }) {
                 <div className="space-y-4">
                   <div className="flex items-center justify-between text-sm text-gray-600 mb-4">
                     <span>Dernière mise à jour: {new Date(logs.timestamp).toLocaleString('fr-FR')}</span>
-                    <span>{logs.sent_lines} lignes (sur {logs.total_lines})</span>
+                    <span>{logs.lines_returned ?? logs.sent_lines} dernières lignes (sur {logs.total_lines} reçues)</span>
                   </div>
                   <div className="bg-gray-900 text-green-400 p-4 rounded-lg font-mono text-xs overflow-x-auto">
                     <pre className="whitespace-pre-wrap">{logs.content}</pre>
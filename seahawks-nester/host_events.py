@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Seahawks Nester - Événements de changement des hôtes
+Comparaison indexée de chaque rapport avec l'inventaire précédent de la
+franchise, et journal des événements paginé par curseur
+"""
+
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+import ipaddress
+import json
+import os
+import threading
+
+
+EVENT_TYPES = ('host_up', 'host_down', 'port_opened', 'port_closed', 'service_changed')
+
+# Champs qui identifient un service (détection de version)
+SERVICE_FIELDS = ('service', 'product', 'version')
+
+
+def host_key(host: dict) -> str:
+    """Clé d'un équipement: adresse MAC si connue, sinon IP"""
+    mac = host.get('mac_address')
+    if mac and mac != 'Unknown':
+        return mac.upper()
+    return host.get('ip')
+
+
+def _open_ports(host: dict) -> dict:
+    return {
+        port_info['port']: port_info
+        for port_info in host.get('ports', []) if port_info.get('state') == 'open'
+    }
+
+
+def _unscanned_networks(report: dict) -> list:
+    """Sous-réseaux et adresses en erreur pendant le scan (scan_shards.failed)"""
+    networks = []
+    for target in (report.get('scan_shards') or {}).get('failed', []):
+        try:
+            networks.append(ipaddress.ip_network(target, strict=False))
+        except ValueError:
+            continue
+    return networks
+
+
+class HostInventory:
+    """
+    Inventaire indexé d'une franchise: {clé: hôte} et {ip: clé}
+    
+    Chaque rapport est comparé à l'inventaire en O(hôtes + ports), par
+    tables de hachage. Un équipement est retrouvé par sa MAC, ou par son IP
+    quand la MAC manque d'un côté. Les hôtes d'un sous-réseau en erreur
+    (scan_shards.failed) gardent leur état précédent: aucun événement
+    n'est déduit d'une partie du réseau qui n'a pas été scannée.
+    """
+    
+    def __init__(self):
+        self.hosts = {}
+        self.by_ip = {}
+    
+    def update(self, report: dict, franchise_id: str = None) -> list:
+        """
+        Remplace l'inventaire par celui du rapport
+        
+        Returns:
+            Événements {type, franchise_id, ip, mac_address, hostname[,
+            port, service, previous]} dans l'ordre des hôtes du rapport
+        """
+        unscanned = _unscanned_networks(report)
+        
+        def skipped(ip):
+            if not unscanned or not ip:
+                return False
+            try:
+                address = ipaddress.ip_address(ip)
+            except ValueError:
+                return False
+            return any(address in network for network in unscanned)
+        
+        context = {
+            "franchise_id": franchise_id or report.get('franchise_id'),
+            "scan_id": report.get('scan_id'),
+            "timestamp": report.get('timestamp')
+        }
+        
+        def event(kind, host, **fields):
+            return {
+                "type": kind, **context,
+                "ip": host.get('ip'),
+                "mac_address": host.get('mac_address', 'Unknown'),
+                "hostname": host.get('hostname', 'Unknown'),
+                **fields
+            }
+        
+        events = []
+        hosts = {}
+        matched = set()
+        for host in report.get('hosts', []):
+            if host.get('state', 'up') != 'up':
+                continue
+            key = host_key(host)
+            previous_key = key if key in self.hosts else self.by_ip.get(host.get('ip'))
+            previous = self.hosts.get(previous_key)
+            if previous is not None:
+                matched.add(previous_key)
+            
+            if skipped(host.get('ip')) and previous is not None:
+                hosts[previous_key] = previous
+                continue
+            hosts[key] = host
+            
+            if previous is None:
+                events.append(event('host_up', host, ports=sorted(_open_ports(host))))
+                continue
+            
+            before, after = _open_ports(previous), _open_ports(host)
+            for port in sorted(after.keys() - before.keys()):
+                events.append(event(
+                    'port_opened', host, port=port,
+                    **{field: after[port].get(field, '') for field in SERVICE_FIELDS}
+                ))
+            for port in sorted(before.keys() - after.keys()):
+                events.append(event(
+                    'port_closed', host, port=port,
+                    **{field: before[port].get(field, '') for field in SERVICE_FIELDS}
+                ))
+            for port in sorted(before.keys() & after.keys()):
+                old = {field: before[port].get(field, '') for field in SERVICE_FIELDS}
+                new = {field: after[port].get(field, '') for field in SERVICE_FIELDS}
+                if old != new:
+                    events.append(event('service_changed', host, port=port, previous=old, **new))
+        
+        for key, previous in self.hosts.items():
+            if key in matched:
+                continue
+            if skipped(previous.get('ip')):
+                hosts[key] = previous
+                continue
+            events.append(event('host_down', previous, ports=sorted(_open_ports(previous))))
+        
+        self.hosts = hosts
+        self.by_ip = {host.get('ip'): key for key, host in hosts.items()}
+        return events
+
+
+class EventLog:
+    """
+    Journal des événements, paginé par curseur
+    
+    Chaque événement reçoit un identifiant croissant (le curseur): un client
+    demande les événements après le dernier identifiant reçu, trouvés par
+    dichotomie. Les max_events derniers événements sont gardés en mémoire;
+    sur disque, events.jsonl (ajouts en fin de fichier) passe en
+    events.jsonl.1 au-delà de segment_bytes. Au démarrage, les deux segments
+    sont relus et la numérotation reprend où elle s'était arrêtée.
+    """
+    
+    def __init__(self, events_dir: Path, max_events: int = 100000,
+                 segment_bytes: int = 16 * 1024 * 1024):
+        self.events_dir = Path(events_dir)
+        self.events_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.events_dir / "events.jsonl"
+        self.max_events = max(max_events, 1)
+        self.segment_bytes = segment_bytes
+        
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._events = []
+        self._ids = []
+        self._next_id = 1
+        self._load()
+    
+    def _load(self):
+        events = []
+        for path in (self.path.with_name(self.path.name + '.1'), self.path):
+            if not path.exists():
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        break  # Dernière ligne incomplète (arrêt pendant l'écriture)
+                    events.append(json.loads(line))
+        # Les écrivains de la file d'ingestion écrivent en parallèle: l'ordre
+        # du fichier n'est pas forcément celui des identifiants
+        events.sort(key=lambda event: event['id'])
+        self._events = events[-self.max_events:]
+        self._ids = [event['id'] for event in self._events]
+        if events:
+            self._next_id = events[-1]['id'] + 1
+    
+    def record(self, events: list) -> list:
+        """Numérote et garde en mémoire de nouveaux événements (à écrire avec write)"""
+        detected_at = datetime.now().isoformat()
+        with self._lock:
+            for event in events:
+                event['id'] = self._next_id
+                event['detected_at'] = detected_at
+                self._next_id += 1
+                self._events.append(event)
+                self._ids.append(event['id'])
+            
+            excess = len(self._events) - self.max_events
+            if excess > self.max_events // 4:
+                del self._events[:excess]
+                del self._ids[:excess]
+        return events
+    
+    def write(self, events: list):
+        """Ajoute des événements déjà numérotés au journal sur disque"""
+        lines = ''.join(
+            json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n' for event in events
+        )
+        with self._write_lock:
+            if self.path.exists() and self.path.stat().st_size >= self.segment_bytes:
+                os.replace(self.path, self.path.with_name(self.path.name + '.1'))
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+    
+    @property
+    def last_id(self) -> int:
+        with self._lock:
+            return self._next_id - 1
+    
+    def page(self, cursor: int = 0, limit: int = 100, franchise_ids=None, types=None) -> dict:
+        """
+        Événements postérieurs au curseur
+        
+        Args:
+            cursor: Identifiant du dernier événement déjà reçu (0: le plus ancien gardé)
+            limit: Nombre maximum d'événements
+            franchise_ids / types: Filtres optionnels
+        
+        Returns:
+            {events, next_cursor, has_more, truncated}; next_cursor est à
+            repasser tel quel, truncated signale des événements perdus (plus
+            anciens que ceux gardés en mémoire)
+        """
+        franchise_ids = set(franchise_ids) if franchise_ids else None
+        types = set(types) if types else None
+        
+        with self._lock:
+            start = bisect_right(self._ids, cursor)
+            truncated = cursor > 0 and bool(self._ids) and cursor + 1 < self._ids[0]
+            events = []
+            next_cursor = cursor
+            index = start
+            while index < len(self._events) and len(events) < limit:
+                event = self._events[index]
+                next_cursor = event['id']
+                index += 1
+                if franchise_ids is not None and event.get('franchise_id') not in franchise_ids:
+                    continue
+                if types is not None and event['type'] not in types:
+                    continue
+                events.append(event)
+            has_more = index < len(self._events)
+        
+        return {
+            "events": events,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+            "truncated": truncated
+        }
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Seahawks Nester - File d'ingestion asynchrone
+Les uploads sont acquittés dès la mise à jour du registre en mémoire, les
+écritures disque sont regroupées par lots et faites par un pool d'écrivains
+"""
+
+from collections import OrderedDict, deque
+import logging
+import math
+import os
+import threading
+import time
+
+
+# Configuration par défaut, surchargée par NESTER_INGEST_<CLÉ EN MAJUSCULES>
+DEFAULT_CONFIG = {
+    # Écrivains en arrière-plan (0: écritures synchrones, réponses 201)
+    "workers": 2,
+    # Écritures en attente au-delà desquelles les uploads sont refusés (429)
+    "queue_size": 2000,
+    # Écritures regroupées au maximum par un écrivain
+    "batch_size": 200
+}
+
+# Échantillons gardés pour les percentiles de latence
+LATENCY_SAMPLES = 1024
+
+# Nouvel essai des écritures en échec: délai doublé à chaque échec (secondes)
+RETRY_DELAY = 0.5
+RETRY_MAX_DELAY = 60
+
+
+def load_config(environ=None) -> dict:
+    """Configuration de la file: valeurs par défaut surchargées par l'environnement"""
+    environ = os.environ if environ is None else environ
+    config = dict(DEFAULT_CONFIG)
+    
+    for key, default in DEFAULT_CONFIG.items():
+        value = environ.get(f"NESTER_INGEST_{key.upper()}")
+        if value is None:
+            continue
+        config[key] = max(int(value), 0 if key == "workers" else 1)
+    
+    return config
+
+
+def _percentile(samples: list, percent: float):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(int(len(ordered) * percent / 100), len(ordered) - 1)], 2)
+
+
+class IngestionQueue:
+    """
+    File bornée d'écritures, ordonnée par clé (franchise)
+    
+    Les tâches d'une même clé sont écrites dans l'ordre et jamais par deux
+    écrivains à la fois; des clés différentes sont écrites en parallèle. Un
+    écrivain prend toutes les tâches en attente de plusieurs clés (jusqu'à
+    batch_size) et les passe d'un coup à la fonction d'écriture. Pour les
+    types déclarés « fusionnables », seule la dernière tâche d'une clé est
+    gardée.
+    
+    Les uploads sont déjà acquittés: une tâche en échec n'est jamais
+    abandonnée. Elle reste dans la file, devant les tâches suivantes de sa
+    clé, et est réessayée après un délai doublé à chaque échec (jusqu'à
+    RETRY_MAX_DELAY); les autres clés continuent d'être écrites.
+    """
+    
+    def __init__(self, writer, config: dict = None, coalesce_kinds=()):
+        """
+        Args:
+            writer: Fonction appelée avec une liste [(clé, [tâche, ...]), ...];
+                une tâche est un dict {kind, payload, enqueued_at}. Retourne
+                {clé: (tâches non écrites, erreur)} pour les clés en échec
+                (None ou {} si tout est écrit); une exception fait réessayer
+                tout le lot
+            config: workers, queue_size, batch_size (voir DEFAULT_CONFIG)
+            coalesce_kinds: Types dont seule la dernière version compte
+        """
+        self.writer = writer
+        self.config = config or load_config()
+        self.coalesce_kinds = set(coalesce_kinds)
+        
+        self.logger = logging.getLogger('SeahawksNester')
+        
+        self._cond = threading.Condition()
+        self._tasks = OrderedDict()  # clé -> tâches en attente, dans l'ordre
+        self._busy = set()  # Clés en cours d'écriture
+        self._retry_at = {}  # Clé en échec -> instant (monotonic) du prochain essai
+        self._attempts = {}  # Clé en échec -> échecs consécutifs
+        self._depth = 0  # Tâches en attente ou en cours d'écriture
+        self._stopping = False
+        self._threads = []
+        
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)  # Attente + écriture, par tâche
+        self._write_times = deque(maxlen=LATENCY_SAMPLES)  # Durée d'écriture, par lot
+        self.metrics = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "written": 0,
+            "rejected": 0,
+            "errors": 0,
+            "retried": 0,
+            "batches": 0,
+            "max_depth_seen": 0
+        }
+    
+    @property
+    def asynchronous(self) -> bool:
+        """Vrai si les écritures sont faites en arrière-plan (réponses 202)"""
+        return self.config['workers'] > 0
+    
+    def start(self):
+        """Démarre les écrivains"""
+        if not self.asynchronous or self._threads:
+            return
+        
+        self._stopping = False
+        for number in range(self.config['workers']):
+            thread = threading.Thread(
+                target=self._work, name=f"nester-ingest-{number}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+    
+    def stop(self, timeout: float = 30):
+        """Arrête les écrivains après avoir vidé la file"""
+        if not self.flush(timeout):
+            self.logger.error(f"Arrêt avec {self._depth} écritures non faites (échecs répétés)")
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+    
+    def flush(self, timeout: float = None) -> bool:
+        """Attend que toutes les écritures soient faites (faux si le délai expire)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._depth and self._threads:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+    
+    def accepting(self, count: int = 1) -> bool:
+        """
+        Vrai si la file peut prendre count écritures de plus
+        
+        La borne est souple: les requêtes acceptées en même temps peuvent la
+        dépasser du nombre de threads du serveur.
+        """
+        with self._cond:
+            if not self.asynchronous or self._depth + count <= self.config['queue_size']:
+                return True
+            self.metrics['rejected'] += 1
+            return False
+    
+    def retry_after(self) -> int:
+        """Délai conseillé (secondes) avant un nouvel essai, d'après le débit récent"""
+        with self._cond:
+            depth = self._depth
+            written = sum(count for _, count in self._write_times)
+            seconds = sum(duration for duration, _ in self._write_times)
+        
+        if not written:
+            return 1
+        per_task = seconds / written / max(self.config['workers'], 1)
+        return min(max(math.ceil(depth * per_task), 1), 60)
+    
+    def submit(self, key: str, kind: str, payload):
+        """Ajoute une écriture à la file (ou l'exécute tout de suite en mode synchrone)"""
+        self.submit_many([(key, kind, payload)])
+    
+    def submit_many(self, tasks: list):
+        """
+        Ajoute plusieurs écritures [(clé, type, données), ...], dans l'ordre
+        
+        En mode synchrone, elles sont écrites en un seul appel et une erreur
+        d'écriture est propagée.
+        """
+        now = time.monotonic()
+        
+        if not self.asynchronous:
+            batch = OrderedDict()
+            for key, kind, payload in tasks:
+                self._add_task(batch, key, kind, payload, now)
+            failures = self.writer(list(batch.items()))
+            if failures:
+                raise next(iter(failures.values()))[1]
+            return
+        
+        with self._cond:
+            for key, kind, payload in tasks:
+                if self._add_task(self._tasks, key, kind, payload, now):
+                    self._depth += 1
+                    self.metrics['enqueued'] += 1
+                else:
+                    self.metrics['coalesced'] += 1
+            self.metrics['max_depth_seen'] = max(self.metrics['max_depth_seen'], self._depth)
+            self._cond.notify_all()
+    
+    def _add_task(self, pending: OrderedDict, key: str, kind: str, payload, now: float) -> bool:
+        """Ajoute ou fusionne une tâche; faux si elle remplace une tâche en attente"""
+        key_tasks = pending.setdefault(key, [])
+        if kind in self.coalesce_kinds:
+            for task in key_tasks:
+                if task['kind'] == kind:
+                    task['payload'] = payload
+                    return False
+        key_tasks.append({"kind": kind, "payload": payload, "enqueued_at": now})
+        return True
+    
+    def _take_batch(self) -> list:
+        """Prend les tâches des clés libres, jusqu'à batch_size (appelé sous verrou)"""
+        batch = []
+        count = 0
+        now = time.monotonic()
+        for key in list(self._tasks):
+            if key in self._busy or self._retry_at.get(key, now) > now:
+                continue
+            tasks = self._tasks.pop(key)
+            self._busy.add(key)
+            batch.append((key, tasks))
+            count += len(tasks)
+            if count >= self.config['batch_size']:
+                break
+        return batch
+    
+    def _next_retry_delay(self):
+        """Délai avant le prochain essai d'une clé en attente, None sans essai prévu (sous verrou)"""
+        retries = [self._retry_at[key] for key in self._tasks if key in self._retry_at]
+        if not retries:
+            return None
+        return max(min(retries) - time.monotonic(), 0)
+    
+    def _requeue(self, key: str, tasks: list) -> int:
+        """
+        Remet des tâches en échec en tête de leur clé (appelé sous verrou)
+        
+        Une tâche fusionnable déjà remplacée par une plus récente est
+        abandonnée. Retourne le nombre de tâches abandonnées.
+        """
+        pending = self._tasks.get(key, [])
+        newer_kinds = {task['kind'] for task in pending} & self.coalesce_kinds
+        kept = [task for task in tasks if task['kind'] not in newer_kinds]
+        self._tasks[key] = kept + pending
+        return len(tasks) - len(kept)
+    
+    def _work(self):
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+                while not batch:
+                    if self._stopping:
+                        return
+                    self._cond.wait(self._next_retry_delay())
+                    batch = self._take_batch()
+            
+            count = sum(len(tasks) for _, tasks in batch)
+            started = time.monotonic()
+            try:
+                failures = self.writer(batch) or {}
+            except Exception as e:
+                failures = {key: (tasks, e) for key, tasks in batch}
+            finished = time.monotonic()
+            
+            with self._cond:
+                written = 0
+                dropped = 0
+                for key, tasks in batch:
+                    self._busy.discard(key)
+                    retry_tasks, error = failures.get(key, ((), None))
+                    retry_ids = {id(task) for task in retry_tasks}
+                    for task in tasks:
+                        if id(task) not in retry_ids:
+                            self._latencies.append((finished - task['enqueued_at']) * 1000)
+                    written += len(tasks) - len(retry_tasks)
+                    
+                    if not retry_tasks:
+                        self._retry_at.pop(key, None)
+                        self._attempts.pop(key, None)
+                        continue
+                    
+                    superseded = self._requeue(key, list(retry_tasks))
+                    dropped += superseded
+                    self.metrics['errors'] += len(retry_tasks)
+                    self.metrics['retried'] += len(retry_tasks) - superseded
+                    attempts = self._attempts.get(key, 0) + 1
+                    self._attempts[key] = attempts
+                    delay = min(RETRY_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+                    self._retry_at[key] = finished + delay
+                    self.logger.error(
+                        f"Écriture en échec pour {key} ({len(retry_tasks)} tâches, "
+                        f"essai {attempts}, nouvel essai dans {delay:.1f}s): {error}"
+                    )
+                
+                self._write_times.append((finished - started, count))
+                self._depth -= written + dropped
+                self.metrics['written'] += written
+                self.metrics['coalesced'] += dropped
+                self.metrics['batches'] += 1
+                self._cond.notify_all()
+    
+    def stats(self) -> dict:
+        """Profondeur de la file, débit et latences d'écriture"""
+        with self._cond:
+            latencies = list(self._latencies)
+            write_ms = [duration * 1000 for duration, _ in self._write_times]
+            batch_sizes = [count for _, count in self._write_times]
+            return {
+                "mode": "async" if self.asynchronous else "sync",
+                "workers": self.config['workers'],
+                "depth": self._depth,
+                "queue_size": self.config['queue_size'],
+                "in_flight_keys": len(self._busy),
+                "retrying_keys": len(self._retry_at),
+                **self.metrics,
+                "latency_ms": {
+                    "p50": _percentile(latencies, 50),
+                    "p95": _percentile(latencies, 95),
+                    "p99": _percentile(latencies, 99),
+                    "max": round(max(latencies), 2) if latencies else None
+                },
+                "write_ms": {
+                    "p50": _percentile(write_ms, 50),
+                    "p95": _percentile(write_ms, 95)
+                },
+                "mean_batch_size": (
+                    round(sum(batch_sizes) / len(batch_sizes), 1) if batch_sizes else None
+                )
+            }
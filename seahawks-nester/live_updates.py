@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Seahawks Nester - Mises à jour en direct des dashboards (Server-Sent Events)
+Chaque événement est sérialisé une seule fois et diffusé tel quel à tous
+les navigateurs abonnés
+
+Même code que seahawks-harvester/live_updates.py: chaque image Docker ne
+copie que le répertoire de son application. Les tests sont dans
+seahawks-nester/tests.
+"""
+
+from collections import deque
+from itertools import islice
+import json
+import threading
+import time
+
+
+def encode_event(event: str, data, event_id: int = None) -> bytes:
+    """Message SSE prêt à envoyer (JSON compact: jamais de saut de ligne)"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str)
+    header = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{header}event: {event}\ndata: {payload}\n\n".encode('utf-8')
+
+
+class Subscription:
+    """
+    Flux d'un abonné: itérateur de blocs d'octets à renvoyer dans la réponse
+    
+    Le serveur WSGI appelle close() quand le navigateur se déconnecte (ou
+    que l'écriture échoue), ce qui libère la place de l'abonné.
+    """
+    
+    def __init__(self, broadcaster: 'Broadcaster', cursor: int, on_idle=None):
+        self._broadcaster = broadcaster
+        self.cursor = cursor
+        self.on_idle = on_idle
+        self.closed = False
+        self.next_flush = 0.0
+        self._greeted = False
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self) -> bytes:
+        if self.closed:
+            raise StopIteration
+        if not self._greeted:
+            # Délai de reconnexion du navigateur, et premier octet tout de suite
+            self._greeted = True
+            return f"retry: {self._broadcaster.retry_ms}\n\n".encode('ascii')
+        return self._broadcaster._next_chunk(self)
+    
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._broadcaster._release()
+
+
+class Broadcaster:
+    """
+    Diffusion d'événements à tous les abonnés d'un flux SSE
+    
+    publish() sérialise l'événement une fois (encode_event) et le range dans
+    un tampon circulaire numéroté; chaque abonné garde seulement sa position
+    et reçoit les messages suivants en un seul bloc, tels quels: le coût par
+    abonné est une copie d'octets, pas une sérialisation. Un abonné écrit au
+    plus une fois par flush_interval: une rafale d'événements (heartbeats de
+    tout le parc) part en un seul envoi, sans réveiller chaque thread à
+    chaque événement.
+    
+    Un navigateur qui se reconnecte (en-tête Last-Event-ID) reprend où il
+    s'était arrêté; s'il a pris plus de backlog messages de retard, il reçoit
+    un événement resync et recharge l'état complet. Sans événement pendant
+    keepalive secondes, un commentaire garde la connexion ouverte (proxies,
+    navigateurs).
+    """
+    
+    def __init__(self, backlog: int = 1024, keepalive: float = 15.0,
+                 max_subscribers: int = 200, retry_ms: int = 5000,
+                 flush_interval: float = 0.25):
+        self.backlog = max(backlog, 1)
+        self.keepalive = keepalive
+        self.flush_interval = flush_interval
+        self.max_subscribers = max_subscribers
+        self.retry_ms = retry_ms
+        
+        self._cond = threading.Condition()
+        self._messages = deque(maxlen=self.backlog)
+        self._last_id = 0
+        self._closed = False
+        self.subscribers = 0
+        self.published = 0
+        self.bytes_published = 0
+        self.resyncs = 0
+    
+    @property
+    def last_id(self) -> int:
+        with self._cond:
+            return self._last_id
+    
+    def publish(self, event: str, data) -> int:
+        """Diffuse un événement à tous les abonnés (retourne son identifiant)"""
+        with self._cond:
+            self._last_id += 1
+            message = encode_event(event, data, self._last_id)
+            self._messages.append(message)
+            self.published += 1
+            self.bytes_published += len(message)
+            self._cond.notify_all()
+            return self._last_id
+    
+    def subscribe(self, last_event_id: str = None, on_idle=None):
+        """
+        Nouvel abonné
+        
+        Args:
+            last_event_id: En-tête Last-Event-ID d'une reconnexion
+            on_idle: Appelé (hors verrou) à chaque keepalive de cet abonné
+        
+        Returns:
+            Subscription, ou None si max_subscribers abonnés sont déjà connectés
+        """
+        with self._cond:
+            if self._closed or self.subscribers >= self.max_subscribers:
+                return None
+            self.subscribers += 1
+            cursor = self._last_id
+            try:
+                if last_event_id is not None and 0 <= int(last_event_id) <= self._last_id:
+                    cursor = int(last_event_id)
+            except ValueError:
+                pass
+        return Subscription(self, cursor, on_idle)
+    
+    def _release(self):
+        with self._cond:
+            self.subscribers -= 1
+    
+    def _next_chunk(self, subscription: Subscription) -> bytes:
+        # Les événements publiés pendant cette attente partiront ensemble
+        delay = subscription.next_flush - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        
+        with self._cond:
+            ready = self._cond.wait_for(
+                lambda: self._closed or self._last_id > subscription.cursor, self.keepalive
+            )
+            if self._closed:
+                raise StopIteration
+            if ready:
+                oldest = self._last_id - len(self._messages) + 1
+                if subscription.cursor + 1 < oldest:
+                    # Trop de retard: les messages manquants sont sortis du tampon
+                    self.resyncs += 1
+                    subscription.cursor = self._last_id
+                    return encode_event('resync', {"last_id": self._last_id}, self._last_id)
+                pending = islice(self._messages, subscription.cursor + 1 - oldest, None)
+                subscription.cursor = self._last_id
+                subscription.next_flush = time.monotonic() + self.flush_interval
+                return b''.join(pending)
+        
+        if subscription.on_idle is not None:
+            subscription.on_idle()
+        return b": keepalive\n\n"
+    
+    def close(self):
+        """Termine tous les flux (arrêt du processus)"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+    
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                "subscribers": self.subscribers,
+                "max_subscribers": self.max_subscribers,
+                "published": self.published,
+                "bytes_published": self.bytes_published,
+                "backlog": len(self._messages),
+                "resyncs": self.resyncs,
+                "last_id": self._last_id
+            }
@@ -5,24 +5,51 @@ Version: 1.0.0
 Description: Supervision centralisée des 32 franchises
 """
 
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, Response, render_template, jsonify, request, send_file
+from collections import OrderedDict
+from contextlib import ExitStack
 from datetime import datetime, timedelta
+from fractions import Fraction
 from pathlib import Path
+import atexit
+import base64
 import json
 import logging
 import os
+import threading
+import time
+
+from host_events import EVENT_TYPES, EventLog, HostInventory
+from ingestion import IngestionQueue
+from live_updates import Broadcaster
+import rollups
+from report_delta import apply_report_delta, report_hash
+from response_cache import ResponseCache
+from retention import RetentionManager
+from storage import create_storage
+import wire_format
 
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 
+# Taille maximale d'un upload une fois décompressé
+MAX_PAYLOAD_BYTES = int(os.environ.get(
+    'NESTER_MAX_PAYLOAD_BYTES', wire_format.DEFAULT_MAX_PAYLOAD_BYTES
+))
+
 
 class NesterManager:
     """Gestionnaire de la supervision centralisée"""
     
     VERSION = "1.0.0"
+    HEARTBEAT_TIMEOUT = 300  # Secondes sans heartbeat avant déconnexion
+    LOG_SEGMENT_BYTES = 8 * 1024 * 1024  # Taille du journal d'une sonde avant rotation
+    LOG_TAIL_BYTES = 256 * 1024  # Fin du journal renvoyée par l'API
+    MAX_BATCH_ITEMS = 5000  # Éléments maximum par requête d'ingestion groupée
+    INGEST_TYPES = ('report', 'report_delta', 'heartbeat', 'logs')
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", storage_backend: str = None):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         
@@ -35,8 +62,60 @@ class NesterManager:
         self.logs_dir = self.data_dir / "probe_logs"
         self.logs_dir.mkdir(exist_ok=True)
         
+        # Backend de stockage des rapports: 'json' (défaut) ou 'sqlite'
+        backend = storage_backend or os.environ.get('NESTER_STORAGE', 'json')
+        self.storage = create_storage(backend, self.data_dir)
+        self.retention = RetentionManager(self.reports_dir, self.logs_dir, self.storage)
+        
+        # Registre en mémoire (write-through) : chargé une fois au démarrage,
+        # mis à jour à chaque écriture, les lectures ne touchent plus au disque
+        self._lock = threading.RLock()
+        self._probes = {}
+        self._latest_reports = {}
+        self._latest_hashes = {}  # Empreintes calculées à la demande (rapports différentiels)
+        # Un verrou par franchise: vérification de la base d'un différentiel,
+        # enregistrement et empreinte du rapport forment une seule section
+        # critique (pris avant self._lock, jamais après)
+        self._report_locks = {}
+        
+        # Agrégats globaux maintenus en O(1) à chaque écriture
+        self._contributions = {}
+        self._totals = {"hosts_up": 0, "ports_open": 0}
+        self._latency_sum = Fraction(0)
+        self._latency_count = 0
+        # Sondes connectées, triées par last_seen croissant
+        self._connected = OrderedDict()
+        
+        # Journaux des sondes (ajouts en fin de fichier)
+        self._logs_lock = threading.Lock()
+        
+        # Événements de changement des hôtes (rapport comparé au précédent)
+        self.events = EventLog(
+            self.data_dir / "events",
+            max_events=int(os.environ.get('NESTER_EVENTS_MAX', 100000))
+        )
+        self._inventories = {}  # Inventaire indexé par franchise, construit au premier rapport
+        
+        # Mises à jour en direct des dashboards (/api/stream): heartbeats,
+        # changements de statut, résumés des nouveaux rapports
+        self.live = Broadcaster(
+            backlog=int(os.environ.get('NESTER_STREAM_BACKLOG', 1024)),
+            max_subscribers=int(os.environ.get('NESTER_STREAM_MAX_CLIENTS', 200))
+        )
+        
+        # Réponses de l'API de lecture, sérialisées une fois par version:
+        # chaque écriture incrémente la version des ressources touchées
+        self.responses = ResponseCache(int(os.environ.get('NESTER_RESPONSE_CACHE_ENTRIES', 256)))
+        
+        # Écritures disque (rapports, fichiers des sondes, logs) faites en
+        # arrière-plan; seul le dernier état d'une sonde est écrit
+        self.ingestion = IngestionQueue(self._write_batch, coalesce_kinds=('probe',))
+        
         self._setup_logging()
-        self.logger.info(f"Seahawks Nester v{self.VERSION} démarré")
+        self._load_registry()
+        self.logger.info(
+            f"Seahawks Nester v{self.VERSION} démarré (stockage: {self.storage.name})"
+        )
     
     def _setup_logging(self):
         """Configure le système de logging"""
@@ -64,10 +143,169 @@ class NesterManager:
         self.logger.addHandler(file_handler)
         self.logger.addHandler(console_handler)
     
+    def _load_registry(self):
+        """Charge les sondes et les derniers rapports en mémoire"""
+        with self._lock:
+            self._probes.clear()
+            self._latest_reports.clear()
+            
+            for probe_file in self.probes_dir.glob("*.json"):
+                try:
+                    with open(probe_file, 'r') as f:
+                        probe_data = json.load(f)
+                    self._probes[probe_data['franchise_id']] = probe_data
+                except (OSError, ValueError, KeyError) as e:
+                    self.logger.error(f"Fichier sonde illisible {probe_file.name}: {e}")
+            
+            try:
+                self._latest_reports.update(self.storage.load_latest_reports())
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Chargement des derniers rapports impossible: {e}")
+            
+            self._rebuild_statistics()
+        
+        self.logger.info(
+            f"Registre chargé: {len(self._probes)} sondes, "
+            f"{len(self._latest_reports)} rapports"
+        )
+    
+    def _write_probe_file(self, probe_data: dict):
+        """Persiste une sonde sur disque"""
+        probe_file = self.probes_dir / f"{probe_data['franchise_id']}.json"
+        with open(probe_file, 'w') as f:
+            json.dump(probe_data, f, indent=2)
+    
+    @classmethod
+    def _probe_view(cls, probe_data: dict, now: datetime) -> dict:
+        """Copie d'une sonde avec son statut de connexion calculé"""
+        view = dict(probe_data)
+        
+        # Vérifier si la sonde est connectée (heartbeat < 5 minutes)
+        last_seen = datetime.fromisoformat(view['last_seen'])
+        time_diff = (now - last_seen).total_seconds()
+        
+        if time_diff > cls.HEARTBEAT_TIMEOUT:
+            view['status'] = 'disconnected'
+        else:
+            view['status'] = 'connected'
+        
+        view['last_seen_ago_seconds'] = int(time_diff)
+        return view
+    
+    @staticmethod
+    def _report_summary(report: dict) -> dict:
+        """Résumé d'un rapport (liste des sondes, mises à jour en direct)"""
+        return {
+            'timestamp': report.get('timestamp'),
+            'summary': report.get('summary', {}),
+            'wan_latency_ms': report.get('wan_latency_ms'),
+            'wan_latency': report.get('wan_latency'),
+            'scan_duration_seconds': report.get('scan_duration_seconds')
+        }
+    
+    @staticmethod
+    def _report_contribution(report: dict):
+        """Part d'un rapport dans les agrégats: (hosts_up, ports ouverts, latence)"""
+        summary = report.get('summary') or {}
+        return (
+            summary.get('hosts_up', 0),
+            summary.get('total_ports_open', 0),
+            report.get('wan_latency_ms') or None
+        )
+    
+    def _update_contribution(self, franchise_id: str):
+        """Remplace la part d'une franchise dans les agrégats (appelé sous verrou)"""
+        old = self._contributions.pop(franchise_id, None)
+        if old is not None:
+            self._totals['hosts_up'] -= old[0]
+            self._totals['ports_open'] -= old[1]
+            if old[2] is not None:
+                self._latency_sum -= Fraction(old[2])
+                self._latency_count -= 1
+        
+        # Seules les sondes enregistrées comptent dans les statistiques
+        report = self._latest_reports.get(franchise_id)
+        if franchise_id not in self._probes or report is None:
+            return
+        
+        new = self._report_contribution(report)
+        self._contributions[franchise_id] = new
+        self._totals['hosts_up'] += new[0]
+        self._totals['ports_open'] += new[1]
+        if new[2] is not None:
+            self._latency_sum += Fraction(new[2])
+            self._latency_count += 1
+    
+    def _mark_seen(self, franchise_id: str, last_seen: datetime):
+        """Place une sonde en fin de file des sondes connectées (appelé sous verrou)"""
+        self._connected.pop(franchise_id, None)
+        self._connected[franchise_id] = last_seen
+    
+    def _expire_connected(self, now: datetime) -> list:
+        """
+        Retire les sondes dont le heartbeat a expiré (appelé sous verrou)
+        
+        Returns:
+            [(franchise_id, last_seen)] des sondes retirées
+        """
+        expired = []
+        while self._connected:
+            franchise_id, last_seen = next(iter(self._connected.items()))
+            if (now - last_seen).total_seconds() <= self.HEARTBEAT_TIMEOUT:
+                break
+            self._connected.popitem(last=False)
+            expired.append((franchise_id, last_seen))
+        return expired
+    
+    def _publish_status(self, changes: list):
+        """Diffuse des changements de statut [(franchise_id, statut, last_seen)] et les statistiques"""
+        if not changes:
+            return
+        self.responses.bump(
+            'statistics', 'probes', *(f"probe:{franchise_id}" for franchise_id, _, _ in changes)
+        )
+        for franchise_id, status, last_seen in changes:
+            self.live.publish('status', {
+                "franchise_id": franchise_id,
+                "status": status,
+                "last_seen": last_seen.isoformat()
+            })
+        self.live.publish('statistics', self._statistics())
+    
+    def check_connections(self):
+        """
+        Passe en déconnectées les sondes dont le heartbeat a expiré
+        
+        Appelé par les statistiques, chaque heartbeat et les flux en direct
+        inactifs: une déconnexion est diffusée au plus tard un keepalive
+        après l'expiration.
+        """
+        with self._lock:
+            expired = self._expire_connected(datetime.now())
+        self._publish_status([
+            (franchise_id, 'disconnected', last_seen) for franchise_id, last_seen in expired
+        ])
+    
+    def _rebuild_statistics(self):
+        """Reconstruit tous les agrégats depuis le registre (appelé sous verrou)"""
+        self._contributions.clear()
+        self._totals = {"hosts_up": 0, "ports_open": 0}
+        self._latency_sum = Fraction(0)
+        self._latency_count = 0
+        self._connected.clear()
+        
+        for franchise_id in self._probes:
+            self._update_contribution(franchise_id)
+        
+        by_last_seen = sorted(
+            (datetime.fromisoformat(probe['last_seen']), franchise_id)
+            for franchise_id, probe in self._probes.items()
+        )
+        for last_seen, franchise_id in by_last_seen:
+            self._connected[franchise_id] = last_seen
+    
     def register_probe(self, franchise_id: str, franchise_name: str):
         """Enregistre ou met à jour une sonde"""
-        probe_file = self.probes_dir / f"{franchise_id}.json"
-        
         probe_data = {
             "franchise_id": franchise_id,
             "franchise_name": franchise_name,
@@ -76,126 +314,274 @@ class NesterManager:
             "status": "connected"
         }
         
-        if probe_file.exists():
-            with open(probe_file, 'r') as f:
-                existing_data = json.load(f)
+        with self._lock:
+            existing_data = self._probes.get(franchise_id)
+            if existing_data:
                 probe_data['registered_at'] = existing_data.get('registered_at')
+            
+            self.ingestion.submit(franchise_id, 'probe', probe_data)
+            self._probes[franchise_id] = probe_data
+            self._mark_seen(franchise_id, datetime.fromisoformat(probe_data['last_seen']))
+            if existing_data is None:
+                self._update_contribution(franchise_id)
+            
+            probe_view = self._probe_view(probe_data, datetime.now())
+            report = self._latest_reports.get(franchise_id)
+            if report is not None:
+                probe_view['last_report'] = self._report_summary(report)
         
-        with open(probe_file, 'w') as f:
-            json.dump(probe_data, f, indent=2)
-        
+        self.responses.bump('statistics', 'probes', f"probe:{franchise_id}")
+        self.live.publish('probe', probe_view)
+        self.live.publish('statistics', self._statistics())
         self.logger.info(f"Sonde enregistrée: {franchise_id} - {franchise_name}")
-        return probe_data
+        return dict(probe_data)
     
     def update_probe_heartbeat(self, franchise_id: str):
         """Met à jour le heartbeat d'une sonde"""
-        probe_file = self.probes_dir / f"{franchise_id}.json"
-        
-        if not probe_file.exists():
-            return None
-        
-        with open(probe_file, 'r') as f:
-            probe_data = json.load(f)
+        now = datetime.now()
+        with self._lock:
+            if franchise_id not in self._probes:
+                return None
+            
+            probe_data = dict(self._probes[franchise_id])
+            probe_data['last_seen'] = now.isoformat()
+            probe_data['status'] = 'connected'
+            
+            self.ingestion.submit(franchise_id, 'probe', probe_data)
+            self._probes[franchise_id] = probe_data
+            expired = self._expire_connected(now)
+            reconnected = franchise_id not in self._connected
+            self._mark_seen(franchise_id, now)
         
-        probe_data['last_seen'] = datetime.now().isoformat()
-        probe_data['status'] = 'connected'
+        self.responses.bump('probes', f"probe:{franchise_id}")
+        self.live.publish('heartbeat', {"franchise_id": franchise_id, "last_seen": probe_data['last_seen']})
+        changes = [
+            (expired_id, 'disconnected', last_seen)
+            for expired_id, last_seen in expired if expired_id != franchise_id
+        ]
+        if reconnected:
+            changes.append((franchise_id, 'connected', now))
+        self._publish_status(changes)
+        return dict(probe_data)
+    
+    def get_all_probes(self, include_hosts: bool = False, status: str = None,
+                       franchise_ids=None):
+        """
+        Récupère les sondes enregistrées (depuis le registre en mémoire)
         
-        with open(probe_file, 'w') as f:
-            json.dump(probe_data, f, indent=2)
+        Args:
+            include_hosts: Inclure la liste complète des hôtes du dernier rapport
+            status: Ne garder que les sondes 'connected' ou 'disconnected'
+            franchise_ids: Ne garder que ces franchises
         
-        return probe_data
-    
-    def get_all_probes(self):
-        """Récupère toutes les sondes enregistrées"""
+        Returns:
+            Liste des sondes triée par nom de franchise
+        """
+        now = datetime.now()
         probes = []
         
-        for probe_file in self.probes_dir.glob("*.json"):
-            with open(probe_file, 'r') as f:
-                probe_data = json.load(f)
-                
-                # Vérifier si la sonde est connectée (heartbeat < 5 minutes)
-                last_seen = datetime.fromisoformat(probe_data['last_seen'])
-                time_diff = (datetime.now() - last_seen).total_seconds()
-                
-                if time_diff > 300:  # 5 minutes
-                    probe_data['status'] = 'disconnected'
-                else:
-                    probe_data['status'] = 'connected'
+        with self._lock:
+            if franchise_ids is None:
+                candidates = self._probes.items()
+            else:
+                candidates = [
+                    (franchise_id, self._probes[franchise_id])
+                    for franchise_id in franchise_ids if franchise_id in self._probes
+                ]
+            
+            for franchise_id, probe_data in candidates:
+                probe_view = self._probe_view(probe_data, now)
                 
-                probe_data['last_seen_ago_seconds'] = int(time_diff)
+                if status and probe_view['status'] != status:
+                    continue
                 
                 # Récupérer le dernier rapport
-                report_file = self.reports_dir / f"{probe_data['franchise_id']}_latest.json"
-                if report_file.exists():
-                    with open(report_file, 'r') as rf:
-                        report = json.load(rf)
-                        probe_data['last_report'] = {
-                            'timestamp': report.get('timestamp'),
-                            'summary': report.get('summary', {}),
-                            'wan_latency_ms': report.get('wan_latency_ms'),
-                            'scan_duration_seconds': report.get('scan_duration_seconds'),
-                            'hosts': report.get('hosts', [])
-                        }
+                report = self._latest_reports.get(franchise_id)
+                if report is not None:
+                    probe_view['last_report'] = self._report_summary(report)
+                    if include_hosts:
+                        probe_view['last_report']['hosts'] = report.get('hosts', [])
                 
-                probes.append(probe_data)
+                probes.append(probe_view)
         
         return sorted(probes, key=lambda x: x['franchise_name'])
     
     def get_probe(self, franchise_id: str):
         """Récupère les informations d'une sonde spécifique"""
-        probe_file = self.probes_dir / f"{franchise_id}.json"
-        
-        if not probe_file.exists():
-            return None
-        
-        with open(probe_file, 'r') as f:
-            probe_data = json.load(f)
+        with self._lock:
+            probe_data = self._probes.get(franchise_id)
+            
+            if probe_data is None:
+                return None
+            
+            return self._probe_view(probe_data, datetime.now())
+    
+    def _report_lock(self, franchise_id: str) -> threading.Lock:
+        """Verrou des rapports d'une franchise (créé au premier usage)"""
+        with self._lock:
+            return self._report_locks.setdefault(franchise_id, threading.Lock())
+    
+    def save_report(self, franchise_id: str, report_data: dict, digest: str = None) -> str:
+        """
+        Sauvegarde un rapport de scan (registre tout de suite, disque via la file)
         
-        # Statut de connexion
-        last_seen = datetime.fromisoformat(probe_data['last_seen'])
-        time_diff = (datetime.now() - last_seen).total_seconds()
+        Returns:
+            Empreinte du rapport enregistré (digest s'il est déjà connu)
+        """
+        with self._report_lock(franchise_id):
+            return self._save_report(franchise_id, report_data, digest)
+    
+    def _save_report(self, franchise_id: str, report_data: dict, digest: str = None) -> str:
+        # Appelé sous le verrou des rapports de la franchise
+        if digest is None:
+            digest = report_hash(report_data)
         
-        if time_diff > 300:
-            probe_data['status'] = 'disconnected'
-        else:
-            probe_data['status'] = 'connected'
+        with self._lock:
+            tasks = [(franchise_id, 'report', (report_data, datetime.now()))]
+            events = self._detect_events(franchise_id, report_data)
+            if events:
+                tasks.append((franchise_id, 'events', events))
+            self.ingestion.submit_many(tasks)
+            self._latest_reports[franchise_id] = report_data
+            self._latest_hashes[franchise_id] = (report_data, digest)
+            self._update_contribution(franchise_id)
         
-        probe_data['last_seen_ago_seconds'] = int(time_diff)
+        self.responses.bump(f"report:{franchise_id}", 'statistics', 'probes')
+        self.live.publish('report', {
+            "franchise_id": franchise_id,
+            "last_report": self._report_summary(report_data)
+        })
+        self.live.publish('statistics', self._statistics())
+        self.logger.info(f"Rapport reçu pour {franchise_id}")
         
-        return probe_data
+        # Mettre à jour le heartbeat
+        self.update_probe_heartbeat(franchise_id)
+        return digest
     
-    def save_report(self, franchise_id: str, report_data: dict):
-        """Sauvegarde un rapport de scan"""
-        # Rapport avec timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        report_file = self.reports_dir / f"{franchise_id}_{timestamp}.json"
+    def _detect_events(self, franchise_id: str, report_data: dict) -> list:
+        """
+        Compare un nouveau rapport à l'inventaire de la franchise (appelé sous verrou)
         
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, indent=2, ensure_ascii=False)
+        L'inventaire est construit à partir du dernier rapport connu au
+        premier appel: le premier rapport après un démarrage ne produit pas
+        d'événements pour des hôtes déjà connus.
         
-        # Dernier rapport
-        latest_file = self.reports_dir / f"{franchise_id}_latest.json"
-        with open(latest_file, 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, indent=2, ensure_ascii=False)
+        Returns:
+            Événements numérotés (à écrire par la file d'ingestion)
+        """
+        inventory = self._inventories.get(franchise_id)
+        if inventory is None:
+            inventory = self._inventories[franchise_id] = HostInventory()
+            previous = self._latest_reports.get(franchise_id)
+            if previous is not None:
+                inventory.update(previous, franchise_id)
         
-        self.logger.info(f"Rapport sauvegardé pour {franchise_id}")
-        
-        # Mettre à jour le heartbeat
-        self.update_probe_heartbeat(franchise_id)
+        events = inventory.update(report_data, franchise_id)
+        if events:
+            self.events.record(events)
+            self.logger.info(
+                f"{len(events)} événements pour {franchise_id}: "
+                + ", ".join(f"{event['type']} {event['ip']}" + (f":{event['port']}" if 'port' in event else '')
+                            for event in events[:5])
+                + (" ..." if len(events) > 5 else "")
+            )
+        return events
+    
+    def get_events(self, cursor: int = 0, limit: int = 100, franchise_ids=None, types=None):
+        """Événements postérieurs au curseur (voir EventLog.page)"""
+        return self.events.page(cursor, limit, franchise_ids, types)
     
     def get_report(self, franchise_id: str):
         """Récupère le dernier rapport d'une franchise"""
-        report_file = self.reports_dir / f"{franchise_id}_latest.json"
+        with self._lock:
+            return self._latest_reports.get(franchise_id)
+    
+    def get_report_hash(self, franchise_id: str):
+        """Empreinte du dernier rapport d'une franchise (None si aucun rapport)"""
+        with self._lock:
+            report = self._latest_reports.get(franchise_id)
+            cached = self._latest_hashes.get(franchise_id)
         
-        if not report_file.exists():
+        if report is None:
             return None
+        if cached is not None and cached[0] is report:
+            return cached[1]
         
-        with open(report_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        digest = report_hash(report)
+        with self._lock:
+            self._latest_hashes[franchise_id] = (report, digest)
+        return digest
+    
+    def save_report_delta(self, franchise_id: str, delta: dict):
+        """
+        Applique un rapport différentiel au dernier rapport de la franchise
+        
+        Sous le verrou des rapports de la franchise: un rapport reçu en même
+        temps ne peut pas remplacer la base entre sa vérification et
+        l'enregistrement du résultat.
+        
+        Returns:
+            Empreinte du nouveau rapport, ou None si le rapport de base ne
+            correspond pas (la sonde doit renvoyer un rapport complet)
+        """
+        with self._report_lock(franchise_id):
+            base = self.get_report(franchise_id)
+            if base is None or self.get_report_hash(franchise_id) != delta.get('base_hash'):
+                return None
+            
+            report_data = apply_report_delta(base, delta)
+            if report_hash(report_data) != delta.get('target_hash'):
+                self.logger.warning(f"Rapport différentiel incohérent pour {franchise_id}")
+                return None
+            
+            return self._save_report(franchise_id, report_data, delta['target_hash'])
+    
+    def get_report_history(self, franchise_id: str, since: str = None, until: str = None):
+        """Historique résumé (latence, hôtes, ports) des rapports d'une franchise"""
+        return self.storage.get_report_history(franchise_id, since, until)
+    
+    def find_franchises_with_open_port(self, port: int):
+        """Franchises dont le dernier rapport expose un port ouvert donné"""
+        return self.storage.find_franchises_with_open_port(port)
+    
+    def get_history(self, franchise_id: str, since: int, until: int, step: int):
+        """Série temporelle agrégée d'une franchise (bornes en secondes)"""
+        return self.storage.get_history(franchise_id, since, until, step)
+    
+    def get_global_history(self, since: int, until: int, step: int, franchise_ids=None):
+        """Série temporelle agrégée de tout le parc (bornes en secondes)"""
+        return self.storage.get_global_history(since, until, step, franchise_ids)
     
     def get_statistics(self):
-        """Calcule les statistiques globales"""
-        probes = self.get_all_probes()
+        """Retourne les statistiques globales depuis les agrégats incrémentaux"""
+        self.check_connections()
+        return self._statistics()
+    
+    def _statistics(self) -> dict:
+        """Statistiques globales, sans expirer les heartbeats"""
+        with self._lock:
+            total_probes = len(self._probes)
+            connected = len(self._connected)
+            
+            stats = {
+                "total_probes": total_probes,
+                "connected_probes": connected,
+                "disconnected_probes": total_probes - connected,
+                "total_hosts": self._totals['hosts_up'],
+                "total_ports_open": self._totals['ports_open'],
+                "average_latency_ms": 0
+            }
+            
+            if self._latency_count:
+                stats['average_latency_ms'] = round(
+                    float(self._latency_sum / self._latency_count), 2
+                )
+        
+        return stats
+    
+    def compute_statistics(self):
+        """Recalcule les statistiques globales à partir de toutes les sondes"""
+        probes = self.get_all_probes(include_hosts=False)
         
         stats = {
             "total_probes": len(probes),
@@ -220,47 +606,391 @@ class NesterManager:
         
         return stats
     
-    def save_probe_logs(self, franchise_id: str, log_data: dict):
-        """Sauvegarde les logs d'une sonde"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        log_file = self.logs_dir / f"{franchise_id}_{timestamp}.log"
+    def _load_logs_metadata(self, franchise_id: str) -> dict:
+        """Métadonnées du journal d'une sonde (<franchise>_latest.json)"""
+        metadata_file = self.logs_dir / f"{franchise_id}_latest.json"
         
-        # Sauvegarder les logs
-        with open(log_file, 'w', encoding='utf-8') as f:
-            f.write(log_data.get('lines', ''))
+        if not metadata_file.exists():
+            return {}
         
-        # Sauvegarder les métadonnées
-        metadata_file = self.logs_dir / f"{franchise_id}_latest.json"
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump({
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    @staticmethod
+    def parse_log_chunk(log_data) -> dict:
+        """
+        Lot de logs reçu, avec ses octets bruts sous la clé data
+        
+        data_b64 porte les octets exacts du fichier source, sur lesquels les
+        offsets du curseur sont comptés. Le texte lines des anciens Harvesters
+        est ré-encodé en UTF-8 (identique à la source si elle était valide).
+        
+        Raises:
+            ValueError: Lot invalide
+        """
+        if not log_data or not isinstance(log_data, dict):
+            raise ValueError("Invalid log data")
+        
+        chunk = {key: value for key, value in log_data.items() if key not in ('lines', 'data_b64')}
+        if 'data_b64' in log_data:
+            if not isinstance(log_data['data_b64'], str):
+                raise ValueError("Invalid log data")
+            chunk['data'] = base64.b64decode(log_data['data_b64'], validate=True)
+        else:
+            if not isinstance(log_data.get('lines', ''), str):
+                raise ValueError("Invalid log data")
+            chunk['data'] = log_data.get('lines', '').encode('utf-8')
+        return chunk
+    
+    def save_probe_logs(self, franchise_id: str, log_chunk: dict):
+        """Ajoute un lot de logs (parse_log_chunk) au journal de la sonde, via la file d'ingestion"""
+        self.ingestion.submit(franchise_id, 'logs', log_chunk)
+    
+    def _append_probe_logs(self, franchise_id: str, log_data: dict) -> dict:
+        """
+        Écrit un lot de logs à la fin du journal de la sonde (<franchise>.log)
+        
+        Les octets dont le curseur (source, inode, génération, offset) est déjà
+        couvert sont ignorés, ce qui rend les renvois du Harvester idempotents.
+        Au-delà de LOG_SEGMENT_BYTES, le journal est renommé en
+        <franchise>_<horodatage>.log et pris en charge par la rétention.
+        
+        Returns:
+            Curseur du dernier octet reçu
+        """
+        data = log_data['data']
+        source = log_data.get('source')
+        inode = log_data.get('inode')
+        generation = log_data.get('generation', 0)
+        offset = log_data.get('offset')
+        
+        with self._logs_lock:
+            metadata = self._load_logs_metadata(franchise_id)
+            cursor = metadata.get('cursor') or {}
+            
+            if (offset is not None and inode is not None
+                    and cursor.get('source') == source and cursor.get('inode') == inode
+                    and cursor.get('generation', 0) == generation):
+                # Renvoi d'un lot (acquittement perdu): on ne garde que la partie nouvelle
+                already_received = cursor['offset'] - offset
+                if already_received >= len(data):
+                    return cursor
+                if already_received > 0:
+                    data = data[already_received:]
+            
+            log_file = self.logs_dir / f"{franchise_id}.log"
+            if log_file.exists() and log_file.stat().st_size + len(data) > self.LOG_SEGMENT_BYTES:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                log_file.replace(self.logs_dir / f"{franchise_id}_{timestamp}.log")
+            
+            with open(log_file, 'ab') as f:
+                f.write(data)
+            
+            sent_lines = data.count(b'\n')
+            if offset is not None and inode is not None:
+                cursor = {
+                    'source': source,
+                    'inode': inode,
+                    'generation': generation,
+                    'offset': log_data.get('end_offset', offset + len(data))
+                }
+            
+            # Les anciennes métadonnées (un fichier par upload) ne comptaient pas le cumul
+            total_lines = metadata.get('total_lines', 0) if 'cursor' in metadata else 0
+            metadata = {
                 'timestamp': log_data.get('timestamp'),
-                'total_lines': log_data.get('total_lines'),
-                'sent_lines': log_data.get('sent_lines'),
-                'log_file': str(log_file.name)
-            }, f, indent=2)
+                'total_lines': total_lines + sent_lines,
+                'sent_lines': sent_lines,
+                'log_file': log_file.name,
+                'cursor': cursor
+            }
+            
+            metadata_file = self.logs_dir / f"{franchise_id}_latest.json"
+            tmp_file = metadata_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, indent=2)
+            tmp_file.replace(metadata_file)
         
-        self.logger.info(f"Logs sauvegardés pour {franchise_id} ({log_data.get('sent_lines')} lignes)")
+        self.logger.info(f"Logs sauvegardés pour {franchise_id} ({sent_lines} lignes)")
+        return cursor
     
-    def get_probe_logs(self, franchise_id: str):
-        """Récupère les logs d'une sonde"""
-        metadata_file = self.logs_dir / f"{franchise_id}_latest.json"
+    @staticmethod
+    def _log_chunk_end(log_data: dict):
+        """Offset de fin d'un lot de logs dans le fichier source (None sans curseur)"""
+        if log_data.get('offset') is None or log_data.get('inode') is None:
+            return None
+        return log_data.get('end_offset', log_data['offset'] + len(log_data['data']))
+    
+    @classmethod
+    def _merge_log_chunks(cls, chunks: list) -> list:
+        """Fusionne les lots de logs consécutifs d'une sonde (une seule écriture)"""
+        merged = []
+        for chunk in chunks:
+            if merged:
+                previous = merged[-1]
+                end = cls._log_chunk_end(previous)
+                if end is None:
+                    contiguous = chunk.get('offset') is None
+                else:
+                    contiguous = chunk.get('offset') == end and all(
+                        chunk.get(key) == previous.get(key) for key in ('source', 'inode', 'generation')
+                    )
+                
+                if contiguous:
+                    merged[-1] = {
+                        **previous,
+                        'data': previous['data'] + chunk['data'],
+                        'timestamp': chunk.get('timestamp')
+                    }
+                    if end is not None:
+                        merged[-1]['end_offset'] = cls._log_chunk_end(chunk)
+                    continue
+            
+            merged.append(chunk)
+        return merged
+    
+    def _write_batch(self, batch: list) -> dict:
+        """
+        Écrit un lot de la file d'ingestion
         
-        if not metadata_file.exists():
+        Tous les rapports du lot sont écrits en une seule transaction (la copie
+        « dernier rapport » une fois par sonde), puis les fichiers des sondes et
+        les logs, fusionnés quand ils se suivent. Une sonde en erreur n'empêche
+        pas l'écriture des autres.
+        
+        Returns:
+            {franchise_id: (tâches non écrites, erreur)} pour la file d'ingestion
+        """
+        reports = {}
+        for franchise_id, tasks in batch:
+            report_tasks = [task for task in tasks if task['kind'] == 'report']
+            reports[franchise_id] = [
+                (franchise_id, *task['payload'], task is report_tasks[-1]) for task in report_tasks
+            ]
+        
+        failures = {}
+        saved = False
+        if self.storage.atomic_batches and sum(map(len, reports.values())) > 1:
+            try:
+                self.storage.save_reports([item for items in reports.values() for item in items])
+                saved = True
+            except Exception as e:
+                # Transaction annulée: chaque sonde séparément, pour isoler l'erreur
+                self.logger.warning(f"Lot de rapports en échec, écriture sonde par sonde: {e}")
+        
+        for franchise_id, tasks in batch:
+            if reports[franchise_id] and not saved:
+                try:
+                    self.storage.save_reports(reports[franchise_id])
+                except Exception as e:
+                    failures[franchise_id] = (tasks, e)
+                    continue
+            
+            # Fichier de la sonde et événements dans l'ordre, puis les logs fusionnés
+            remaining = [task for task in tasks if task['kind'] != 'report']
+            try:
+                for task in [task for task in remaining if task['kind'] != 'logs']:
+                    if task['kind'] == 'probe':
+                        self._write_probe_file(task['payload'])
+                    elif task['kind'] == 'events':
+                        self.events.write(task['payload'])
+                    remaining = [other for other in remaining if other is not task]
+                for log_data in self._merge_log_chunks([task['payload'] for task in remaining]):
+                    self._append_probe_logs(franchise_id, log_data)
+            except Exception as e:
+                failures[franchise_id] = (remaining, e)
+        
+        return failures
+    
+    def _validate_ingest_item(self, item) -> str:
+        """Message d'erreur si un élément d'ingestion est invalide, sinon None"""
+        if not isinstance(item, dict):
+            return "Invalid item"
+        if item.get('type') not in self.INGEST_TYPES:
+            return "Unknown item type"
+        if not item.get('franchise_id') or not isinstance(item['franchise_id'], str):
+            return "Missing franchise_id"
+        
+        data = item.get('data')
+        if item['type'] == 'heartbeat':
             return None
+        if not data or not isinstance(data, dict):
+            return "Missing data"
+        if item['type'] == 'report' and not isinstance(data.get('hosts', []), list):
+            return "Invalid report data"
+        if item['type'] == 'report_delta' and ('base_hash' not in data or 'target_hash' not in data):
+            return "Invalid delta"
+        return None
+    
+    def ingest_batch(self, items: list) -> list:
+        """
+        Ingère un lot de rapports, rapports différentiels, heartbeats et logs
         
-        with open(metadata_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+        Les éléments sont validés et traités dans l'ordre (un différentiel peut
+        s'appuyer sur un rapport du même lot). Les écritures acceptées sont
+        confiées d'un bloc à la file d'ingestion (une seule transaction de
+        stockage); le registre en mémoire et le fichier de chaque sonde ne sont
+        mis à jour qu'une fois par franchise.
+        
+        Les verrous des rapports des franchises du lot sont tenus pendant tout
+        le traitement (bases des différentiels vérifiées puis remplacées sans
+        qu'un upload concurrent s'intercale).
+        
+        Returns:
+            Un résultat {index, id, status[, error, hash]} par élément
+        """
+        franchise_ids = sorted({
+            item['franchise_id'] for item in items
+            if isinstance(item, dict) and item.get('type') in ('report', 'report_delta')
+            and isinstance(item.get('franchise_id'), str)
+        })
+        with ExitStack() as stack:
+            for franchise_id in franchise_ids:
+                stack.enter_context(self._report_lock(franchise_id))
+            return self._ingest_batch(items)
+    
+    def _ingest_batch(self, items: list) -> list:
+        results = []
+        written_results = []
+        tasks = []  # Écritures confiées à la file d'ingestion, dans l'ordre du lot
+        report_count = 0
+        received_at = datetime.now()
+        accepted_status = 202 if self.ingestion.asynchronous else 201
+        latest = {}  # franchise -> (rapport, empreinte) après les éléments déjà traités
+        alive = set()
+        
+        with self._lock:
+            registered = set(self._probes)
+        
+        for index, item in enumerate(items):
+            result = {"index": index}
+            if isinstance(item, dict) and 'id' in item:
+                result['id'] = item['id']
+            results.append(result)
+            
+            error = self._validate_ingest_item(item)
+            if error:
+                result.update(status=400, error=error)
+                continue
+            
+            franchise_id = item['franchise_id']
+            data = item.get('data')
+            
+            if item['type'] == 'heartbeat':
+                if franchise_id in registered:
+                    alive.add(franchise_id)
+                    result['status'] = 200
+                else:
+                    result.update(status=404, error="Probe not found")
+            
+            elif item['type'] == 'logs':
+                try:
+                    log_chunk = self.parse_log_chunk(data)
+                except ValueError:
+                    result.update(status=400, error="Invalid log data")
+                    continue
+                tasks.append((franchise_id, 'logs', log_chunk))
+                written_results.append(result)
+                result['status'] = accepted_status
+            
+            else:
+                if item['type'] == 'report':
+                    report_data, digest = data, report_hash(data)
+                else:
+                    base, base_hash = latest.get(franchise_id) or (
+                        self.get_report(franchise_id), self.get_report_hash(franchise_id)
+                    )
+                    report_data = None
+                    if base is not None and base_hash == data['base_hash']:
+                        report_data, digest = apply_report_delta(base, data), data['target_hash']
+                        if report_hash(report_data) != digest:
+                            self.logger.warning(f"Rapport différentiel incohérent pour {franchise_id}")
+                            report_data = None
+                    if report_data is None:
+                        result.update(status=409, error="Resync required", current_hash=base_hash)
+                        continue
+                
+                latest[franchise_id] = (report_data, digest)
+                tasks.append((franchise_id, 'report', (report_data, received_at)))
+                report_count += 1
+                written_results.append(result)
+                alive.add(franchise_id)
+                result.update(status=accepted_status, hash=digest)
+        
+        if tasks:
+            try:
+                with self._lock:
+                    # Chaque rapport du lot est comparé au précédent, dans l'ordre
+                    event_tasks = []
+                    for franchise_id, kind, payload in tasks:
+                        if kind == 'report':
+                            events = self._detect_events(franchise_id, payload[0])
+                            if events:
+                                event_tasks.append((franchise_id, 'events', events))
+                    self.ingestion.submit_many(tasks + event_tasks)
+                    for franchise_id, (report_data, digest) in latest.items():
+                        self._latest_reports[franchise_id] = report_data
+                        self._latest_hashes[franchise_id] = (report_data, digest)
+                        self._update_contribution(franchise_id)
+            except Exception as e:
+                # Écriture synchrone uniquement: en mode asynchrone, rien n'est écrit ici
+                self.logger.error(f"Erreur lors de l'écriture du lot: {e}")
+                for result in written_results:
+                    result.update(status=500, error="Storage error")
+                    result.pop('hash', None)
+        
+        if latest:
+            self.responses.bump(
+                'statistics', 'probes', *(f"report:{franchise_id}" for franchise_id in latest)
+            )
+            for franchise_id, (report_data, digest) in latest.items():
+                self.live.publish('report', {
+                    "franchise_id": franchise_id,
+                    "last_report": self._report_summary(report_data)
+                })
+            self.live.publish('statistics', self._statistics())
+        
+        for franchise_id in alive:
+            self.update_probe_heartbeat(franchise_id)
         
-        log_file = self.logs_dir / metadata['log_file']
-        if log_file.exists():
-            with open(log_file, 'r', encoding='utf-8') as f:
-                metadata['content'] = f.read()
+        self.logger.info(
+            f"Lot ingéré: {len(items)} éléments, {report_count} rapports, "
+            f"{len(alive)} sondes"
+        )
+        return results
+    
+    def get_probe_logs(self, franchise_id: str):
+        """Récupère les métadonnées et la fin du journal d'une sonde"""
+        with self._logs_lock:
+            metadata = self._load_logs_metadata(franchise_id)
+            if not metadata:
+                return None
+            
+            log_file = self.logs_dir / metadata['log_file']
+            if not log_file.exists():
+                return metadata
+            
+            with open(log_file, 'rb') as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(size - self.LOG_TAIL_BYTES, 0))
+                tail = f.read()
+        
+        # Première ligne tronquée par la lecture de la fin du fichier
+        if size > self.LOG_TAIL_BYTES:
+            tail = tail[tail.find(b'\n') + 1:]
         
+        metadata['content'] = tail.decode('utf-8', errors='replace')
+        metadata['lines_returned'] = tail.count(b'\n')
         return metadata
 
 
 # Instance globale du gestionnaire
 nester = NesterManager()
+nester.retention.start()
+nester.ingestion.start()
+# Les écritures en attente sont faites avant l'arrêt du processus
+atexit.register(nester.ingestion.stop)
+atexit.register(nester.live.close)
 
 
 # Routes web
@@ -277,9 +1007,48 @@ def probe_detail(franchise_id):
 
 
 # API REST
+def _cached_json(resource: str, build, variant: str = ''):
+    """
+    Réponse JSON servie depuis le cache des réponses
+    
+    ETag fort, Last-Modified et Cache-Control: no-cache (le navigateur
+    revalide à chaque fois); 304 si le client a déjà cette version.
+    Les durées relatives du corps (last_seen_ago_seconds) datent de sa
+    construction: l'en-tête Age donne le temps écoulé depuis.
+    
+    Args:
+        build: Retourne le contenu, (contenu, en-têtes), ou None si absent
+    
+    Returns:
+        La réponse, ou None si la ressource n'existe pas
+    """
+    def serialize():
+        result = build()
+        if result is None:
+            return None
+        data, headers = result if isinstance(result, tuple) else (result, {})
+        return app.json.response(data).get_data(), headers
+    
+    cached = nester.responses.get(resource, serialize, variant)
+    if cached.body is None:
+        return None
+    
+    response = Response(cached.body, mimetype='application/json', headers=cached.headers)
+    response.set_etag(cached.etag)
+    response.last_modified = cached.last_modified
+    response.cache_control.no_cache = True
+    response.headers['Age'] = str(int(time.time() - cached.built_at))
+    return response.make_conditional(request)
+
+
 @app.route('/api/status')
 def api_status():
-    """API: Statut général du Nester"""
+    """
+    API: Statut général du Nester
+    
+    Pas de cache des réponses: timestamp est l'instant de la requête, et
+    les statistiques incrémentales ne coûtent rien à relire.
+    """
     return jsonify({
         "version": NesterManager.VERSION,
         "status": "online",
@@ -290,25 +1059,64 @@ def api_status():
 
 @app.route('/api/probes')
 def api_probes():
-    """API: Liste de toutes les sondes"""
-    probes = nester.get_all_probes()
-    return jsonify(probes)
+    """
+    API: Liste des sondes (résumé sans les hôtes)
+    
+    Paramètres optionnels:
+        status: connected | disconnected
+        franchise: identifiants séparés par des virgules
+        fields: champs à retourner, séparés par des virgules
+        limit / offset: pagination (total dans l'en-tête X-Total-Count)
+    """
+    status = request.args.get('status')
+    if status and status not in ('connected', 'disconnected'):
+        return jsonify({"error": "Invalid status filter"}), 400
+    
+    franchise_ids = None
+    if request.args.get('franchise'):
+        franchise_ids = [f for f in request.args['franchise'].split(',') if f]
+    
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = request.args.get('limit')
+        limit = max(int(limit), 0) if limit is not None else None
+    except ValueError:
+        return jsonify({"error": "Invalid pagination parameters"}), 400
+    
+    def build():
+        probes = nester.get_all_probes(status=status, franchise_ids=franchise_ids)
+        total = len(probes)
+        
+        if limit is not None:
+            probes = probes[offset:offset + limit]
+        elif offset:
+            probes = probes[offset:]
+        
+        if request.args.get('fields'):
+            fields = [f for f in request.args['fields'].split(',') if f]
+            probes = [{k: p[k] for k in fields if k in p} for p in probes]
+        
+        return probes, {'X-Total-Count': str(total)}
+    
+    nester.check_connections()
+    return _cached_json('probes', build, variant=request.query_string.decode('latin-1'))
 
 
 @app.route('/api/statistics')
 def api_statistics():
     """API: Statistiques globales"""
-    stats = nester.get_statistics()
-    return jsonify(stats)
+    nester.check_connections()
+    return _cached_json('statistics', nester.get_statistics)
 
 
 @app.route('/api/probe/<franchise_id>')
 def api_probe(franchise_id):
     """API: Détail d'une sonde"""
-    probe = nester.get_probe(franchise_id)
+    nester.check_connections()
+    response = _cached_json(f"probe:{franchise_id}", lambda: nester.get_probe(franchise_id))
     
-    if probe:
-        return jsonify(probe)
+    if response:
+        return response
     
     return jsonify({"error": "Probe not found"}), 404
 
@@ -316,18 +1124,260 @@ def api_probe(franchise_id):
 @app.route('/api/probe/<franchise_id>/report')
 def api_probe_report(franchise_id):
     """API: Dernier rapport d'une sonde"""
-    report = nester.get_report(franchise_id)
+    response = _cached_json(f"report:{franchise_id}", lambda: nester.get_report(franchise_id) or None)
+    
+    if response:
+        return response
+    
+    return jsonify({"error": "No report available"}), 404
+
+
+@app.route('/api/probe/<franchise_id>/hosts')
+def api_probe_hosts(franchise_id):
+    """API: Hôtes du dernier rapport d'une sonde"""
+    def build():
+        report = nester.get_report(franchise_id)
+        return report.get('hosts', []) if report else None
     
-    if report:
-        return jsonify(report)
+    response = _cached_json(f"report:{franchise_id}", build, variant='hosts')
+    
+    if response:
+        return response
     
     return jsonify({"error": "No report available"}), 404
 
 
+def _history_window(args):
+    """
+    Décode la fenêtre d'historique demandée
+    
+    Paramètres: since / until (ISO 8601), range (ex: 30d, défaut 24h) quand
+    since est absent, step (ex: 1h) sinon choisi automatiquement. Une
+    fenêtre plus ancienne que la rétention des agrégats fins (1 min: 7
+    jours) est servie par la plus fine résolution encore conservée.
+    
+    Returns:
+        (since, until, step) en secondes
+    """
+    until = rollups.to_epoch(args.get('until') or datetime.now().isoformat())
+    
+    if args.get('since'):
+        since = rollups.to_epoch(args['since'])
+    else:
+        since = until - rollups.parse_step(args.get('range', '24h'))
+    
+    if since >= until:
+        raise ValueError("since doit précéder until")
+    
+    purged_before = nester.retention.rollups_before()
+    if args.get('step'):
+        step = rollups.kept_step(rollups.parse_step(args['step']), since, purged_before)
+    else:
+        step = rollups.choose_step(since, until, purged_before)
+    
+    return since, until, step
+
+
+def _history_response(points, since: int, until: int, step: int, **extra):
+    """Enveloppe JSON commune des séries temporelles"""
+    body = {
+        "since": rollups.from_epoch(since),
+        "until": rollups.from_epoch(until),
+        "step_seconds": step,
+        "points": points
+    }
+    body.update(extra)
+    return jsonify(body)
+
+
+@app.route('/api/probe/<franchise_id>/history')
+def api_probe_history(franchise_id):
+    """API: Historique agrégé (latence, hôtes, ports) d'une sonde"""
+    try:
+        since, until, step = _history_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    points = nester.get_history(franchise_id, since, until, step)
+    return _history_response(points, since, until, step, franchise_id=franchise_id)
+
+
+@app.route('/api/history')
+def api_history():
+    """API: Historique agrégé de tout le parc (filtre optionnel: franchise)"""
+    try:
+        since, until, step = _history_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    franchise_ids = None
+    if request.args.get('franchise'):
+        franchise_ids = [f for f in request.args['franchise'].split(',') if f]
+    
+    points = nester.get_global_history(since, until, step, franchise_ids)
+    return _history_response(points, since, until, step)
+
+
+@app.route('/api/events')
+def api_events():
+    """
+    API: Événements de changement des hôtes, paginés par curseur
+    
+    Paramètres optionnels:
+        cursor: next_cursor de la réponse précédente (0: le plus ancien gardé)
+        limit: événements par page (100 par défaut, 1000 au plus)
+        franchise: identifiants séparés par des virgules
+        type: host_up, host_down, port_opened, port_closed, service_changed
+            (séparés par des virgules)
+    """
+    try:
+        cursor = max(int(request.args.get('cursor', 0)), 0)
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+    except ValueError:
+        return jsonify({"error": "Invalid pagination parameters"}), 400
+    
+    franchise_ids = None
+    if request.args.get('franchise'):
+        franchise_ids = [f for f in request.args['franchise'].split(',') if f]
+    
+    types = None
+    if request.args.get('type'):
+        types = [t for t in request.args['type'].split(',') if t]
+        if any(t not in EVENT_TYPES for t in types):
+            return jsonify({"error": "Invalid event type"}), 400
+    
+    return jsonify(nester.get_events(cursor, limit, franchise_ids, types))
+
+
+@app.route('/api/stream')
+def api_stream():
+    """
+    API: Mises à jour en direct des dashboards (Server-Sent Events)
+    
+    Événements: heartbeat, status, probe, report, statistics, et resync
+    (recharger l'état complet). Un navigateur qui se reconnecte envoie
+    l'en-tête Last-Event-ID et reçoit les événements manqués.
+    """
+    subscription = nester.live.subscribe(
+        request.headers.get('Last-Event-ID'), on_idle=nester.check_connections
+    )
+    if subscription is None:
+        response = jsonify({"error": "Too many live clients"})
+        response.headers['Retry-After'] = '60'
+        return response, 503
+    
+    return Response(subscription, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Pas de mise en tampon par Nginx
+    })
+
+
+@app.route('/api/ingest')
+def api_ingest():
+    """API: Profondeur et latences de la file d'ingestion"""
+    return jsonify(nester.ingestion.stats())
+
+
+@app.route('/api/retention')
+def api_retention():
+    """API: Politique et métriques du job de rétention"""
+    return jsonify({
+        "policy": nester.retention.policy,
+        "metrics": nester.retention.metrics
+    })
+
+
+def _read_payload():
+    """
+    Corps décodé d'un upload: JSON ou MessagePack, compressé ou non (gzip, zstd)
+    
+    Returns:
+        Objet décodé, ou None si le corps est vide ou invalide
+    """
+    return wire_format.decode_body(
+        request.get_data(cache=False),
+        request.headers.get('Content-Encoding'),
+        request.mimetype,
+        MAX_PAYLOAD_BYTES
+    )
+
+
+def _queue_full(count: int = 1):
+    """Réponse 429 si la file d'ingestion ne peut pas prendre count écritures, sinon None"""
+    if nester.ingestion.accepting(count):
+        return None
+    
+    retry_after = nester.ingestion.retry_after()
+    response = jsonify({"error": "Ingestion queue full", "retry_after": retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def _accepted_status() -> int:
+    """202 si l'écriture est faite en arrière-plan, 201 si elle est déjà faite"""
+    return 202 if nester.ingestion.asynchronous else 201
+
+
+@app.errorhandler(wire_format.UnsupportedPayload)
+def handle_unsupported_payload(error):
+    """Format non pris en charge: annonce ceux qui le sont (RFC 7694)"""
+    response = jsonify({"error": str(error), **wire_format.capabilities(MAX_PAYLOAD_BYTES)})
+    response.status_code = 415
+    response.headers['Accept-Encoding'] = ', '.join(wire_format.supported_encodings())
+    return response
+
+
+@app.errorhandler(wire_format.PayloadTooLarge)
+def handle_payload_too_large(error):
+    """Upload trop volumineux une fois décompressé"""
+    return jsonify({"error": str(error)}), 413
+
+
+@app.route('/api/wire')
+def api_wire():
+    """API: Formats d'upload acceptés (négociation par les Harvesters)"""
+    return jsonify({
+        **wire_format.capabilities(MAX_PAYLOAD_BYTES),
+        "batch_max_items": NesterManager.MAX_BATCH_ITEMS,
+        "log_bytes": True  # Logs en octets bruts (data_b64)
+    })
+
+
+@app.route('/api/ingest/batch', methods=['POST'])
+def api_ingest_batch():
+    """
+    API: Ingestion groupée de rapports, différentiels, heartbeats et logs
+    
+    Corps: {"items": [{"type", "franchise_id", "data", "id" (optionnel)}, ...]}
+    """
+    batch = _read_payload()
+    items = batch.get('items') if isinstance(batch, dict) else None
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Invalid batch"}), 400
+    if len(items) > NesterManager.MAX_BATCH_ITEMS:
+        return jsonify({
+            "error": f"Batch too large (max {NesterManager.MAX_BATCH_ITEMS} items)"
+        }), 413
+    
+    busy = _queue_full(len(items))
+    if busy is not None:
+        return busy
+    
+    results = nester.ingest_batch(items)
+    accepted = sum(1 for result in results if result['status'] < 300)
+    return jsonify({
+        "accepted": accepted,
+        "rejected": len(results) - accepted,
+        "results": results
+    })
+
+
 @app.route('/api/probe/register', methods=['POST'])
 def api_register_probe():
     """API: Enregistrement d'une nouvelle sonde"""
-    data = request.get_json()
+    data = _read_payload()
     
     if not data or 'franchise_id' not in data or 'franchise_name' not in data:
         return jsonify({"error": "Missing required fields"}), 400
@@ -350,25 +1400,60 @@ def api_heartbeat(franchise_id):
 @app.route('/api/probe/<franchise_id>/report', methods=['POST'])
 def api_upload_report(franchise_id):
     """API: Upload d'un rapport de scan"""
-    report_data = request.get_json()
+    report_data = _read_payload()
     
     if not report_data:
         return jsonify({"error": "Invalid report data"}), 400
     
-    nester.save_report(franchise_id, report_data)
-    return jsonify({"success": True, "message": "Report saved"}), 201
+    busy = _queue_full()
+    if busy is not None:
+        return busy
+    
+    digest = nester.save_report(franchise_id, report_data)
+    return jsonify({
+        "success": True,
+        "message": "Report accepted",
+        "hash": digest
+    }), _accepted_status()
+
+
+@app.route('/api/probe/<franchise_id>/report/delta', methods=['POST'])
+def api_upload_report_delta(franchise_id):
+    """API: Upload d'un rapport différentiel (par rapport au dernier rapport reçu)"""
+    delta = _read_payload()
+    
+    if not delta or 'base_hash' not in delta or 'target_hash' not in delta:
+        return jsonify({"error": "Invalid delta"}), 400
+    
+    busy = _queue_full()
+    if busy is not None:
+        return busy
+    
+    digest = nester.save_report_delta(franchise_id, delta)
+    
+    if digest is None:
+        return jsonify({
+            "error": "Resync required",
+            "current_hash": nester.get_report_hash(franchise_id)
+        }), 409
+    
+    return jsonify({"success": True, "message": "Report accepted", "hash": digest}), _accepted_status()
 
 
 @app.route('/api/probe/<franchise_id>/logs', methods=['POST'])
 def api_upload_logs(franchise_id):
     """API: Upload des logs d'une sonde"""
-    log_data = request.get_json()
-    
-    if not log_data:
+    try:
+        log_chunk = NesterManager.parse_log_chunk(_read_payload())
+    except ValueError:
         return jsonify({"error": "Invalid log data"}), 400
     
-    nester.save_probe_logs(franchise_id, log_data)
-    return jsonify({"success": True, "message": "Logs saved"}), 201
+    busy = _queue_full()
+    if busy is not None:
+        return busy
+    
+    nester.save_probe_logs(franchise_id, log_chunk)
+    return jsonify({"success": True, "message": "Logs accepted"}), _accepted_status()
 
 
 @app.route('/api/probe/<franchise_id>/logs')
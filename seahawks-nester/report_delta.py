@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Seahawks Nester - Application des rapports différentiels envoyés par les Harvesters
+"""
+
+import hashlib
+import json
+
+
+def report_hash(report: dict) -> str:
+    """
+    Empreinte SHA-256 d'un rapport, indépendante de l'ordre des clés et des hôtes
+    
+    Doit rester identique à report_hash() côté Harvester (report_delta.py).
+    """
+    canonical = dict(report)
+    canonical['hosts'] = sorted(report.get('hosts', []), key=lambda h: h.get('ip', ''))
+    payload = json.dumps(canonical, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def apply_report_delta(base: dict, delta: dict) -> dict:
+    """
+    Reconstruit le nouveau rapport à partir du précédent et du différentiel
+    
+    Les hôtes conservent l'ordre du rapport de base; les nouveaux sont ajoutés
+    à la fin.
+    """
+    unset = set(delta.get('unset', []))
+    report = {k: v for k, v in base.items() if k != 'hosts' and k not in unset}
+    report.update(delta.get('set', {}))
+    
+    removed = set(delta.get('hosts_removed', []))
+    upserted = {h.get('ip'): h for h in delta.get('hosts_upserted', [])}
+    
+    hosts = []
+    for host in base.get('hosts', []):
+        ip = host.get('ip')
+        if ip in removed:
+            continue
+        hosts.append(upserted.pop(ip, host))
+    hosts.extend(upserted.values())
+    
+    report['hosts'] = hosts
+    return report
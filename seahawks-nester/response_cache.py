@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Seahawks Nester - Cache des réponses de l'API de lecture
+Corps sérialisés une fois par version de ressource, ETag forts pour les
+requêtes conditionnelles (réponses 304)
+
+Même code que seahawks-harvester/response_cache.py: chaque image Docker ne
+copie que le répertoire de son application. Les tests sont dans
+seahawks-nester/tests.
+"""
+
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+import secrets
+import threading
+import time
+
+
+# Corps sérialisé (None: ressource absente) et ses validateurs
+CachedBody = namedtuple('CachedBody', 'version body headers etag last_modified built_at')
+
+
+class ResponseCache:
+    """
+    Versions des ressources et corps de réponse sérialisés
+    
+    Chaque ressource ('statistics', 'probes', 'report:<franchise>'...) a un
+    compteur de version, incrémenté par bump() après chaque écriture (ou par
+    track() quand une signature, par exemple les dates des fichiers, change).
+    Un corps est construit une fois par version et par variante (paramètres
+    de la requête), puis servi tel quel: une lecture sans changement coûte
+    une recherche dans un dictionnaire. L'ETag identifie le corps construit
+    et porte un identifiant du processus (les compteurs repartent de zéro au
+    redémarrage). Les max_entries corps les plus récemment servis sont
+    gardés en mémoire.
+    """
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max(max_entries, 1)
+        self._epoch = secrets.token_hex(4)
+        self._started = time.time()
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._modified = {}
+        self._signatures = {}
+        self._entries = OrderedDict()
+        self._builds = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def bump(self, *resources):
+        """Nouvelle version des ressources (à appeler après l'écriture)"""
+        now = time.time()
+        with self._lock:
+            for resource in resources:
+                self._versions[resource] = self._versions.get(resource, 0) + 1
+                self._modified[resource] = now
+    
+    def track(self, resource: str, signature):
+        """Nouvelle version de la ressource si sa signature a changé depuis l'appel précédent"""
+        with self._lock:
+            changed = resource in self._signatures and self._signatures[resource] != signature
+            self._signatures[resource] = signature
+        if changed:
+            self.bump(resource)
+    
+    def get(self, resource: str, build, variant: str = '') -> CachedBody:
+        """
+        Corps de la ressource pour sa version courante
+        
+        Args:
+            build: Appelée hors verrou en cas d'absence: retourne
+                (corps en octets, en-têtes) ou None si la ressource n'existe pas
+            variant: Distingue les représentations d'une même ressource
+        """
+        key = (resource, variant)
+        with self._lock:
+            version = self._versions.get(resource, 0)
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            self._builds += 1
+            build_id = self._builds
+            modified = self._modified.get(resource, self._started)
+        
+        # Une écriture pendant la construction incrémente la version: ce
+        # corps, rangé sous l'ancienne, sera reconstruit à la lecture suivante
+        result = build()
+        body, headers = result if result is not None else (None, {})
+        entry = CachedBody(
+            version=version,
+            body=body,
+            headers=headers,
+            etag=f"{self._epoch}-{version}-{build_id}",
+            last_modified=datetime.fromtimestamp(modified, timezone.utc),
+            built_at=time.time()
+        )
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None or current.version <= version:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+    
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(len(entry.body) for entry in self._entries.values() if entry.body),
+                "hits": self.hits,
+                "misses": self.misses
+            }
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Seahawks Nester - Rétention et compaction des données
+Archive les anciens rapports par jour (gzip/zstd), purge les logs expirés
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import json
+import logging
+import os
+import threading
+import time
+
+import rollups
+import storage
+
+
+# Politique par défaut, surchargée par NESTER_RETENTION_<CLÉ EN MAJUSCULES>
+DEFAULT_POLICY = {
+    # Rapports JSON bruts: au-delà, compactés dans une archive journalière
+    "reports_raw_days": 7,
+    "reports_raw_max_per_franchise": 168,
+    # Archives journalières supprimées au-delà de cet âge
+    "reports_archive_days": 365,
+    "compression": "gzip",
+    # Logs des sondes
+    "logs_max_days": 30,
+    "logs_max_per_probe": 48,
+    # Base SQLite: rapports détaillés (hôtes/ports) et agrégats fins
+    "db_reports_days": 90,
+    "rollups_minute_days": 7,
+    "rollups_hour_days": 180,
+    # Période du job en arrière-plan (0 pour le désactiver)
+    "interval_seconds": 3600
+}
+
+
+def load_policy(environ=None) -> dict:
+    """Politique de rétention: valeurs par défaut surchargées par l'environnement"""
+    environ = os.environ if environ is None else environ
+    policy = dict(DEFAULT_POLICY)
+    
+    for key, default in DEFAULT_POLICY.items():
+        value = environ.get(f"NESTER_RETENTION_{key.upper()}")
+        if value is None:
+            continue
+        policy[key] = type(default)(value)
+    
+    if policy['compression'] not in storage.ARCHIVE_SUFFIXES:
+        raise ValueError(f"Compression inconnue: {policy['compression']}")
+    if policy['compression'] == "zstd" and storage.zstandard is None:
+        policy['compression'] = "gzip"
+    
+    return policy
+
+
+class RetentionManager:
+    """Applique la politique de rétention sur les répertoires et la base du Nester"""
+    
+    def __init__(self, reports_dir: Path, logs_dir: Path, report_storage, policy: dict = None):
+        self.reports_dir = Path(reports_dir)
+        self.archive_dir = self.reports_dir / "archive"
+        self.logs_dir = Path(logs_dir)
+        self.storage = report_storage
+        self.policy = policy or load_policy()
+        
+        self.logger = logging.getLogger('SeahawksNester')
+        
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        
+        self.metrics = {
+            "runs": 0,
+            "errors": 0,
+            "bytes_reclaimed_total": 0,
+            "last_run": None
+        }
+    
+    def run_once(self, now: datetime = None) -> dict:
+        """Exécute une passe complète de rétention et retourne ses métriques"""
+        now = now or datetime.now()
+        started = time.perf_counter()
+        
+        with self._run_lock:
+            stats = {
+                "started_at": now.isoformat(),
+                "reports_compacted": 0,
+                "archives_deleted": 0,
+                "logs_deleted": 0,
+                "db_reports_purged": 0,
+                "db_rollups_purged": 0,
+                "bytes_reclaimed": 0
+            }
+            
+            self._compact_reports(now, stats)
+            self._expire_archives(now, stats)
+            self._expire_logs(now, stats)
+            self._purge_storage(now, stats)
+            
+            stats['duration_seconds'] = round(time.perf_counter() - started, 3)
+            
+            self.metrics['runs'] += 1
+            self.metrics['bytes_reclaimed_total'] += stats['bytes_reclaimed']
+            self.metrics['last_run'] = stats
+        
+        self.logger.info(
+            f"Rétention: {stats['reports_compacted']} rapports compactés, "
+            f"{stats['logs_deleted']} logs supprimés, "
+            f"{stats['db_reports_purged']} rapports purgés en base, "
+            f"{stats['bytes_reclaimed']} octets récupérés"
+        )
+        return stats
+    
+    def _compact_reports(self, now: datetime, stats: dict):
+        """Regroupe les rapports JSON bruts expirés en archives journalières"""
+        cutoff = now - timedelta(days=self.policy['reports_raw_days'])
+        keep_count = self.policy['reports_raw_max_per_franchise']
+        codec = self.policy['compression']
+        
+        by_franchise = {}
+        for report_file in self.reports_dir.glob("*.json"):
+            parsed = storage.parse_report_filename(report_file.name)
+            if parsed is None:
+                continue
+            by_franchise.setdefault(parsed[0], []).append((parsed[1], report_file))
+        
+        # Rapports à compacter, regroupés par (franchise, jour)
+        groups = {}
+        for franchise_id, entries in by_franchise.items():
+            entries.sort(reverse=True)
+            for rank, (received_at, report_file) in enumerate(entries):
+                if rank < keep_count and received_at >= cutoff:
+                    continue
+                day = received_at.replace(hour=0, minute=0, second=0, microsecond=0)
+                groups.setdefault((franchise_id, day), []).append((received_at, report_file))
+        
+        if not groups:
+            return
+        
+        self.archive_dir.mkdir(exist_ok=True)
+        
+        for (franchise_id, day), entries in groups.items():
+            entries.sort()
+            path = storage.archive_path(self.archive_dir, franchise_id, day, codec)
+            
+            records = []
+            compacted_files = []
+            raw_bytes = 0
+            for received_at, report_file in entries:
+                try:
+                    with open(report_file, 'r', encoding='utf-8') as f:
+                        records.append({
+                            "received_at": received_at.isoformat(),
+                            "report": json.load(f)
+                        })
+                    compacted_files.append(report_file)
+                    raw_bytes += report_file.stat().st_size
+                except (OSError, ValueError) as e:
+                    self.logger.error(f"Rapport non compactable {report_file.name}: {e}")
+            
+            if not records:
+                continue
+            
+            size_before = path.stat().st_size if path.exists() else 0
+            storage.append_archive_records(path, records, codec)
+            archive_growth = path.stat().st_size - size_before
+            
+            # Les fichiers bruts ne sont supprimés qu'une fois l'archive écrite
+            for report_file in compacted_files:
+                report_file.unlink(missing_ok=True)
+            
+            stats['reports_compacted'] += len(records)
+            # Gain net seulement: une archive qui grossit plus que les fichiers
+            # remplacés ne fait pas baisser le total récupéré
+            stats['bytes_reclaimed'] += max(0, raw_bytes - archive_growth)
+    
+    def _expire_archives(self, now: datetime, stats: dict):
+        """Supprime les archives journalières trop anciennes"""
+        if not self.archive_dir.exists():
+            return
+        
+        cutoff = now - timedelta(days=self.policy['reports_archive_days'])
+        for archive_file in self.archive_dir.iterdir():
+            parsed = storage.parse_archive_filename(archive_file.name)
+            if parsed is None or parsed[1] >= cutoff:
+                continue
+            stats['bytes_reclaimed'] += archive_file.stat().st_size
+            archive_file.unlink()
+            stats['archives_deleted'] += 1
+    
+    def _expire_logs(self, now: datetime, stats: dict):
+        """Supprime les logs de sondes au-delà de l'âge ou du nombre maximal"""
+        cutoff = now - timedelta(days=self.policy['logs_max_days'])
+        keep_count = max(self.policy['logs_max_per_probe'], 1)
+        
+        by_probe = {}
+        for log_file in self.logs_dir.glob("*.log"):
+            parsed = storage.parse_report_filename(log_file.name, suffix='.log')
+            if parsed is None:
+                continue
+            by_probe.setdefault(parsed[0], []).append((parsed[1], log_file))
+        
+        for entries in by_probe.values():
+            entries.sort(reverse=True)
+            # Le segment le plus récent est toujours gardé (historique immédiat du journal)
+            for rank, (received_at, log_file) in enumerate(entries[1:], start=1):
+                if rank < keep_count and received_at >= cutoff:
+                    continue
+                stats['bytes_reclaimed'] += log_file.stat().st_size
+                log_file.unlink()
+                stats['logs_deleted'] += 1
+    
+    def rollups_before(self, now: datetime = None) -> dict:
+        """{résolution: epoch} avant lequel les agrégats fins sont purgés"""
+        now = now or datetime.now()
+        return {
+            60: rollups.to_epoch(
+                (now - timedelta(days=self.policy['rollups_minute_days'])).isoformat()
+            ),
+            3600: rollups.to_epoch(
+                (now - timedelta(days=self.policy['rollups_hour_days'])).isoformat()
+            )
+        }
+    
+    def _purge_storage(self, now: datetime, stats: dict):
+        """Purge les rapports détaillés et agrégats fins du backend"""
+        purged = self.storage.purge(
+            now - timedelta(days=self.policy['db_reports_days']), self.rollups_before(now)
+        )
+        
+        stats['db_reports_purged'] += purged['reports']
+        stats['db_rollups_purged'] += purged['rollups']
+        stats['bytes_reclaimed'] += purged['bytes']
+    
+    def start(self):
+        """Démarre le job de rétention en arrière-plan"""
+        interval = self.policy['interval_seconds']
+        if interval <= 0 or self._thread is not None:
+            return
+        
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.run_once()
+                except Exception as e:
+                    self.metrics['errors'] += 1
+                    self.logger.error(f"Erreur lors de la rétention: {e}")
+        
+        self._thread = threading.Thread(target=loop, name="nester-retention", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Arrête le job de rétention"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
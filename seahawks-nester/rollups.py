@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Seahawks Nester - Agrégats temporels (rollups) des rapports
+Séries par intervalles: latence min/moy/max/p95, hôtes actifs, ports ouverts
+"""
+
+from bisect import bisect_left
+from datetime import datetime, timezone
+import calendar
+import math
+import re
+
+
+# Résolutions précalculées (secondes): 1 minute, 1 heure, 1 jour
+RESOLUTIONS = (60, 3600, 86400)
+
+# Nombre de points visé quand l'intervalle n'est pas imposé
+MAX_POINTS = 1000
+
+# Bornes hautes (ms) de l'histogramme de latence: progression géométrique
+# de 0,1 ms à ~60 s, soit des classes de 5 % de large
+LATENCY_BINS = tuple(round(0.1 * 1.05 ** i, 3) for i in range(274))
+
+_STEP_PATTERN = re.compile(r'^(\d+)([smhd]?)$')
+_STEP_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def to_epoch(timestamp: str) -> int:
+    """Convertit un horodatage ISO 8601 en secondes (heure murale, sans fuseau)"""
+    dt = datetime.fromisoformat(timestamp)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return calendar.timegm(dt.timetuple())
+
+
+def from_epoch(epoch: int) -> str:
+    """Inverse de to_epoch"""
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def parse_step(value: str) -> int:
+    """
+    Décode un intervalle ('90', '15m', '6h', '1d') en secondes
+    
+    Raises:
+        ValueError: si l'intervalle est invalide ou n'est pas un multiple de la minute
+    """
+    match = _STEP_PATTERN.match(value.strip())
+    if not match:
+        raise ValueError(f"Intervalle invalide: {value}")
+    
+    step = int(match.group(1)) * _STEP_UNITS[match.group(2)]
+    if step <= 0 or step % RESOLUTIONS[0]:
+        raise ValueError(f"L'intervalle doit être un multiple de {RESOLUTIONS[0]}s")
+    return step
+
+
+def kept_resolutions(since: int, purged_before: dict = None) -> list:
+    """
+    Résolutions dont les agrégats couvrent encore since
+    
+    Args:
+        purged_before: {résolution: epoch} avant lequel la rétention a
+            supprimé les agrégats de cette résolution
+    """
+    purged_before = purged_before or {}
+    return [r for r in RESOLUTIONS if since >= purged_before.get(r, since)]
+
+
+def choose_step(since: int, until: int, purged_before: dict = None) -> int:
+    """Plus petit intervalle précalculé donnant au plus MAX_POINTS points"""
+    span = max(until - since, 1)
+    for resolution in kept_resolutions(since, purged_before):
+        if span / resolution <= MAX_POINTS:
+            return resolution
+    
+    largest = RESOLUTIONS[-1]
+    return math.ceil(span / MAX_POINTS / largest) * largest
+
+
+def source_resolution(step: int) -> int:
+    """Plus grande résolution précalculée dont l'intervalle est un multiple"""
+    return max(r for r in RESOLUTIONS if step % r == 0)
+
+
+def kept_step(step: int, since: int, purged_before: dict = None) -> int:
+    """Intervalle imposé, arrondi au multiple de la plus fine résolution encore conservée"""
+    finest = kept_resolutions(since, purged_before)[0]
+    if source_resolution(step) >= finest:
+        return step
+    return math.ceil(step / finest) * finest
+
+
+def new_bucket() -> dict:
+    """Agrégat vide d'un intervalle"""
+    return {
+        'reports': 0,
+        'latency_count': 0,
+        'latency_sum': 0.0,
+        'latency_min': None,
+        'latency_max': None,
+        'latency_hist': {},
+        'hosts_up_sum': 0,
+        'hosts_up_max': 0,
+        'ports_open_sum': 0,
+        'ports_open_max': 0
+    }
+
+
+def add_point(bucket: dict, wan_latency_ms, hosts_up: int, ports_open: int):
+    """Ajoute un rapport à un agrégat"""
+    bucket['reports'] += 1
+    bucket['hosts_up_sum'] += hosts_up or 0
+    bucket['hosts_up_max'] = max(bucket['hosts_up_max'], hosts_up or 0)
+    bucket['ports_open_sum'] += ports_open or 0
+    bucket['ports_open_max'] = max(bucket['ports_open_max'], ports_open or 0)
+    
+    if wan_latency_ms is None:
+        return
+    
+    bucket['latency_count'] += 1
+    bucket['latency_sum'] += wan_latency_ms
+    bucket['latency_min'] = _min(bucket['latency_min'], wan_latency_ms)
+    bucket['latency_max'] = _max(bucket['latency_max'], wan_latency_ms)
+    
+    index = min(bisect_left(LATENCY_BINS, wan_latency_ms), len(LATENCY_BINS) - 1)
+    bucket['latency_hist'][index] = bucket['latency_hist'].get(index, 0) + 1
+
+
+def merge_bucket(target: dict, other: dict):
+    """Fusionne l'agrégat other dans target"""
+    target['reports'] += other['reports']
+    target['hosts_up_sum'] += other['hosts_up_sum']
+    target['hosts_up_max'] = max(target['hosts_up_max'], other['hosts_up_max'])
+    target['ports_open_sum'] += other['ports_open_sum']
+    target['ports_open_max'] = max(target['ports_open_max'], other['ports_open_max'])
+    target['latency_count'] += other['latency_count']
+    target['latency_sum'] += other['latency_sum']
+    target['latency_min'] = _min(target['latency_min'], other['latency_min'])
+    target['latency_max'] = _max(target['latency_max'], other['latency_max'])
+    
+    for index, count in other['latency_hist'].items():
+        target['latency_hist'][index] = target['latency_hist'].get(index, 0) + count
+
+
+def percentile(bucket: dict, fraction: float):
+    """Percentile de latence estimé depuis l'histogramme, borné par min/max"""
+    total = bucket['latency_count']
+    if not total:
+        return None
+    
+    rank = math.ceil(total * fraction)
+    seen = 0
+    for index in sorted(bucket['latency_hist']):
+        count = bucket['latency_hist'][index]
+        if seen + count >= rank:
+            # Interpolation linéaire dans la classe
+            lower = LATENCY_BINS[index - 1] if index else 0.0
+            upper = LATENCY_BINS[index]
+            value = lower + (upper - lower) * (rank - seen) / count
+            value = min(max(value, bucket['latency_min']), bucket['latency_max'])
+            return round(value, 2)
+        seen += count
+    
+    return bucket['latency_max']
+
+
+def bucket_point(start: int, bucket: dict) -> dict:
+    """Point de série publié par l'API pour un intervalle"""
+    reports = bucket['reports'] or 1
+    latency_count = bucket['latency_count']
+    
+    return {
+        'timestamp': from_epoch(start),
+        'reports': bucket['reports'],
+        'latency_min_ms': bucket['latency_min'],
+        'latency_avg_ms': round(bucket['latency_sum'] / latency_count, 2) if latency_count else None,
+        'latency_max_ms': bucket['latency_max'],
+        'latency_p95_ms': percentile(bucket, 0.95),
+        'hosts_up_avg': round(bucket['hosts_up_sum'] / reports, 2),
+        'hosts_up_max': bucket['hosts_up_max'],
+        'ports_open_avg': round(bucket['ports_open_sum'] / reports, 2),
+        'ports_open_max': bucket['ports_open_max']
+    }
+
+
+def regroup(rows, step: int) -> dict:
+    """
+    Regroupe des agrégats (début, agrégat) dans des intervalles de step secondes
+    
+    Returns:
+        {début d'intervalle: agrégat fusionné}
+    """
+    grouped = {}
+    for start, bucket in rows:
+        key = start - start % step
+        if key not in grouped:
+            grouped[key] = new_bucket()
+        merge_bucket(grouped[key], bucket)
+    return grouped
+
+
+def _min(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a, b)
+
+
+def _max(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
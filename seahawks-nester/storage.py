@@ -0,0 +1,888 @@
+#!/usr/bin/env python3
+"""
+Seahawks Nester - Stockage des rapports de scan
+Backends interchangeables : fichiers JSON (historique) ou SQLite embarqué
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import gzip
+import io
+import json
+import os
+import sqlite3
+import threading
+
+import rollups
+
+try:
+    import zstandard
+except ImportError:  # Compression zstd optionnelle
+    zstandard = None
+
+
+# Archives journalières compactées: <franchise>_<YYYYmmdd>.jsonl.<ext>
+ARCHIVE_SUFFIXES = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+
+
+class ReportStorage:
+    """Interface commune des backends de stockage des rapports"""
+    
+    name = "base"
+    # Vrai si save_reports n'écrit rien quand il échoue (une transaction)
+    atomic_batches = False
+    
+    def save_report(self, franchise_id: str, report_data: dict, received_at: datetime = None):
+        """Enregistre un rapport et en fait le dernier rapport de la franchise"""
+        raise NotImplementedError
+    
+    def save_reports(self, items) -> int:
+        """
+        Enregistre plusieurs rapports en un seul passage (une transaction si
+        le backend le permet)
+        
+        Args:
+            items: Itérable de (franchise_id, rapport, reçu le, dernier rapport ?)
+        
+        Returns:
+            Nombre de rapports enregistrés
+        """
+        raise NotImplementedError
+    
+    def load_latest_reports(self) -> dict:
+        """Retourne le dernier rapport de chaque franchise {franchise_id: rapport}"""
+        raise NotImplementedError
+    
+    def get_report_history(self, franchise_id: str, since: str = None, until: str = None) -> list:
+        """
+        Retourne l'historique résumé des rapports d'une franchise
+        
+        Args:
+            franchise_id: Identifiant de la franchise
+            since: Borne basse ISO 8601 (incluse)
+            until: Borne haute ISO 8601 (exclue)
+        
+        Returns:
+            Liste de points {timestamp, wan_latency_ms, hosts_up, total_ports_open}
+            triée par timestamp
+        """
+        raise NotImplementedError
+    
+    def find_franchises_with_open_port(self, port: int) -> list:
+        """Liste les franchises dont le dernier rapport expose le port donné"""
+        raise NotImplementedError
+    
+    def get_rollups(self, franchise_ids, resolution: int, since: int, until: int):
+        """
+        Parcourt les agrégats précalculés d'une résolution donnée
+        
+        Args:
+            franchise_ids: Franchises concernées (None pour toutes)
+            resolution: Résolution, une valeur de rollups.RESOLUTIONS
+            since / until: Bornes en secondes (until exclue)
+        
+        Returns:
+            Itérable de (franchise_id, début d'intervalle, agrégat)
+        """
+        raise NotImplementedError
+    
+    def get_history(self, franchise_id: str, since: int, until: int, step: int) -> list:
+        """Série temporelle d'une franchise par intervalles de step secondes"""
+        rows = self.get_rollups(
+            [franchise_id], rollups.source_resolution(step), since, until
+        )
+        grouped = rollups.regroup(((start, bucket) for _, start, bucket in rows), step)
+        return [rollups.bucket_point(start, grouped[start]) for start in sorted(grouped)]
+    
+    def get_global_history(self, since: int, until: int, step: int, franchise_ids=None) -> list:
+        """
+        Série temporelle de tout le parc par intervalles de step secondes
+        
+        En plus des champs par franchise, chaque point porte hosts_up_total:
+        la somme des moyennes d'hôtes actifs de chaque franchise sur l'intervalle.
+        """
+        rows = self.get_rollups(
+            franchise_ids, rollups.source_resolution(step), since, until
+        )
+        
+        per_franchise = {}
+        for franchise_id, start, bucket in rows:
+            per_franchise.setdefault(franchise_id, []).append((start, bucket))
+        
+        merged = {}
+        hosts_total = {}
+        franchises = {}
+        for franchise_rows in per_franchise.values():
+            for start, bucket in rollups.regroup(franchise_rows, step).items():
+                if start not in merged:
+                    merged[start] = rollups.new_bucket()
+                    hosts_total[start] = 0.0
+                    franchises[start] = 0
+                rollups.merge_bucket(merged[start], bucket)
+                hosts_total[start] += bucket['hosts_up_sum'] / bucket['reports']
+                franchises[start] += 1
+        
+        points = []
+        for start in sorted(merged):
+            point = rollups.bucket_point(start, merged[start])
+            point['franchises'] = franchises[start]
+            point['hosts_up_total'] = round(hosts_total[start], 2)
+            points.append(point)
+        return points
+    
+    def purge(self, reports_before: datetime, rollups_before: dict) -> dict:
+        """
+        Supprime les rapports détaillés et agrégats fins expirés
+        
+        Args:
+            reports_before: Les rapports reçus avant cette date sont supprimés
+                (le dernier rapport de chaque franchise est toujours conservé)
+            rollups_before: {résolution: epoch} limite par résolution d'agrégat
+        
+        Returns:
+            {reports, rollups, bytes} supprimés
+        """
+        return {"reports": 0, "rollups": 0, "bytes": 0}
+    
+    def close(self):
+        """Libère les ressources du backend"""
+
+
+def _report_timestamp(report_data: dict, received_at: datetime) -> str:
+    """Horodatage d'un rapport: celui du scan, sinon celui de la réception"""
+    return report_data.get('timestamp') or received_at.isoformat()
+
+
+def _history_point(timestamp: str, report_data: dict) -> dict:
+    """Point d'historique résumé d'un rapport"""
+    summary = report_data.get('summary') or {}
+    return {
+        'timestamp': timestamp,
+        'wan_latency_ms': report_data.get('wan_latency_ms'),
+        'hosts_up': summary.get('hosts_up', 0),
+        'total_ports_open': summary.get('total_ports_open', 0)
+    }
+
+
+class JsonFileStorage(ReportStorage):
+    """
+    Un fichier JSON par rapport plus une copie <franchise>_latest.json
+    
+    Les agrégats de l'historique sont tenus à jour à chaque rapport, en
+    mémoire, et journalisés dans rollups.jsonl: une ligne par agrégat
+    modifié, la dernière version l'emporte à la relecture. Le journal est
+    réécrit (une ligne par agrégat) quand les versions remplacées dominent,
+    et par la purge de la rétention.
+    """
+    
+    name = "json"
+    
+    # Lignes du journal des agrégats tolérées par agrégat avant réécriture
+    ROLLUPS_COMPACT_RATIO = 4
+    
+    def __init__(self, reports_dir: Path):
+        self.reports_dir = Path(reports_dir)
+        self.reports_dir.mkdir(exist_ok=True)
+        self.archive_dir = self.reports_dir / "archive"
+        
+        # {(résolution, franchise_id): {début d'intervalle: agrégat}}
+        self.rollups_path = self.reports_dir / "rollups.jsonl"
+        self._rollups_lock = threading.Lock()
+        self._rollups = {}
+        self._rollup_lines = 0
+        if self.rollups_path.exists():
+            self._load_rollups()
+        elif self.archived_franchise_ids():
+            # Rapports enregistrés avant l'ajout des agrégats: les recalculer une fois
+            self.rebuild_rollups()
+    
+    def _load_rollups(self):
+        with open(self.rollups_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break  # Dernière ligne incomplète (arrêt pendant l'écriture)
+                record = json.loads(line)
+                bucket = {column: record[column] for column in rollups.new_bucket()}
+                bucket['latency_hist'] = {int(k): v for k, v in bucket['latency_hist'].items()}
+                self._rollups.setdefault(
+                    (record['resolution'], record['franchise_id']), {}
+                )[record['bucket']] = bucket
+                self._rollup_lines += 1
+    
+    @staticmethod
+    def _rollup_line(resolution: int, franchise_id: str, start: int, bucket: dict) -> str:
+        return json.dumps({
+            "resolution": resolution, "franchise_id": franchise_id, "bucket": start, **bucket
+        }, separators=(',', ':')) + '\n'
+    
+    def _add_to_rollups(self, franchise_id: str, point: dict) -> list:
+        """
+        Ajoute un point d'historique aux agrégats de chaque résolution (appelé sous verrou)
+        
+        Returns:
+            Lignes du journal des agrégats modifiés
+        """
+        try:
+            epoch = rollups.to_epoch(point['timestamp'])
+        except ValueError:
+            return []
+        
+        lines = []
+        for resolution in rollups.RESOLUTIONS:
+            start = epoch - epoch % resolution
+            buckets = self._rollups.setdefault((resolution, franchise_id), {})
+            bucket = buckets.setdefault(start, rollups.new_bucket())
+            rollups.add_point(
+                bucket, point['wan_latency_ms'], point['hosts_up'], point['total_ports_open']
+            )
+            lines.append(self._rollup_line(resolution, franchise_id, start, bucket))
+        return lines
+    
+    def _write_rollups(self):
+        """Réécrit le journal des agrégats, une ligne par agrégat (appelé sous verrou)"""
+        tmp_path = self.rollups_path.with_suffix('.tmp')
+        count = 0
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for (resolution, franchise_id), buckets in self._rollups.items():
+                for start, bucket in buckets.items():
+                    f.write(self._rollup_line(resolution, franchise_id, start, bucket))
+                    count += 1
+        os.replace(tmp_path, self.rollups_path)
+        self._rollup_lines = count
+    
+    def rebuild_rollups(self):
+        """Recalcule tous les agrégats depuis les rapports horodatés, bruts et compactés"""
+        with self._rollups_lock:
+            self._rollups.clear()
+            for franchise_id in sorted(self.archived_franchise_ids()):
+                for point in self.get_report_history(franchise_id):
+                    self._add_to_rollups(franchise_id, point)
+            self._write_rollups()
+    
+    def save_report(self, franchise_id: str, report_data: dict, received_at: datetime = None):
+        self.save_reports([(franchise_id, report_data, received_at or datetime.now(), True)])
+    
+    def save_reports(self, items) -> int:
+        count = 0
+        for franchise_id, report_data, received_at, update_latest in items:
+            # Rapport avec timestamp (à la seconde près: une file d'envoi vidée d'un
+            # coup peut livrer plusieurs rapports dans la même seconde)
+            report_file = self.reports_dir / f"{franchise_id}_{received_at.strftime('%Y%m%d_%H%M%S')}.json"
+            while report_file.exists():
+                received_at += timedelta(seconds=1)
+                report_file = self.reports_dir / f"{franchise_id}_{received_at.strftime('%Y%m%d_%H%M%S')}.json"
+            
+            with open(report_file, 'w', encoding='utf-8') as f:
+                json.dump(report_data, f, indent=2, ensure_ascii=False)
+            
+            # Dernier rapport
+            if update_latest:
+                latest_file = self.reports_dir / f"{franchise_id}_latest.json"
+                with open(latest_file, 'w', encoding='utf-8') as f:
+                    json.dump(report_data, f, indent=2, ensure_ascii=False)
+            
+            point = _history_point(_report_timestamp(report_data, received_at), report_data)
+            with self._rollups_lock:
+                lines = self._add_to_rollups(franchise_id, point)
+                self._rollup_lines += len(lines)
+                if self._rollup_lines > self.ROLLUPS_COMPACT_RATIO * self._rollup_count() + 1000:
+                    self._write_rollups()
+                else:
+                    with open(self.rollups_path, 'a', encoding='utf-8') as f:
+                        f.write(''.join(lines))
+            count += 1
+        return count
+    
+    def _rollup_count(self) -> int:
+        return sum(len(buckets) for buckets in self._rollups.values())
+    
+    def load_latest_reports(self) -> dict:
+        reports = {}
+        for report_file in self.reports_dir.glob("*_latest.json"):
+            franchise_id = report_file.name[:-len("_latest.json")]
+            with open(report_file, 'r', encoding='utf-8') as f:
+                reports[franchise_id] = json.load(f)
+        return reports
+    
+    def iter_archived_reports(self, franchise_id: str = None):
+        """Parcourt les rapports horodatés: (franchise_id, reçu le, chemin)"""
+        pattern = f"{franchise_id}_*.json" if franchise_id else "*.json"
+        for report_file in self.reports_dir.glob(pattern):
+            parsed = parse_report_filename(report_file.name)
+            if parsed is None:
+                continue
+            if franchise_id and parsed[0] != franchise_id:
+                continue
+            yield parsed[0], parsed[1], report_file
+    
+    def iter_compacted_reports(self, franchise_id: str):
+        """Parcourt les rapports des archives journalières: (reçu le, rapport)"""
+        if not self.archive_dir.exists():
+            return
+        
+        for archive_file in self.archive_dir.glob(f"{franchise_id}_*.jsonl.*"):
+            parsed = parse_archive_filename(archive_file.name)
+            if parsed is None or parsed[0] != franchise_id:
+                continue
+            for record in iter_archive_records(archive_file):
+                yield datetime.fromisoformat(record['received_at']), record['report']
+    
+    def archived_franchise_ids(self) -> set:
+        """Franchises ayant des rapports horodatés, bruts ou déjà compactés"""
+        franchise_ids = {entry[0] for entry in self.iter_archived_reports()}
+        if self.archive_dir.exists():
+            for archive_file in self.archive_dir.iterdir():
+                parsed = parse_archive_filename(archive_file.name)
+                if parsed is not None:
+                    franchise_ids.add(parsed[0])
+        return franchise_ids
+    
+    def get_report_history(self, franchise_id: str, since: str = None, until: str = None) -> list:
+        def reports():
+            for _, received_at, report_file in self.iter_archived_reports(franchise_id):
+                with open(report_file, 'r', encoding='utf-8') as f:
+                    yield received_at, json.load(f)
+            yield from self.iter_compacted_reports(franchise_id)
+        
+        points = []
+        for received_at, report_data in reports():
+            timestamp = _report_timestamp(report_data, received_at)
+            if since and timestamp < since:
+                continue
+            if until and timestamp >= until:
+                continue
+            points.append(_history_point(timestamp, report_data))
+        
+        return sorted(points, key=lambda p: p['timestamp'])
+    
+    def get_rollups(self, franchise_ids, resolution: int, since: int, until: int):
+        # Les intervalles commencés avant since restent inclus
+        first = since - since % resolution
+        rows = []
+        with self._rollups_lock:
+            if franchise_ids is None:
+                franchise_ids = [key[1] for key in self._rollups if key[0] == resolution]
+            for franchise_id in franchise_ids:
+                for start, bucket in self._rollups.get((resolution, franchise_id), {}).items():
+                    if first <= start < until:
+                        rows.append((
+                            franchise_id, start,
+                            dict(bucket, latency_hist=dict(bucket['latency_hist']))
+                        ))
+        return rows
+    
+    def purge(self, reports_before: datetime, rollups_before: dict) -> dict:
+        # Les rapports bruts sont compactés par la rétention, pas supprimés ici
+        with self._rollups_lock:
+            size_before = self.rollups_path.stat().st_size if self.rollups_path.exists() else 0
+            purged = 0
+            for (resolution, _), buckets in self._rollups.items():
+                before = rollups_before.get(resolution)
+                if before is None:
+                    continue
+                for start in [start for start in buckets if start < before]:
+                    del buckets[start]
+                    purged += 1
+            self._rollups = {key: buckets for key, buckets in self._rollups.items() if buckets}
+            self._write_rollups()
+            size_after = self.rollups_path.stat().st_size
+        
+        return {"reports": 0, "rollups": purged, "bytes": max(size_before - size_after, 0)}
+    
+    def find_franchises_with_open_port(self, port: int) -> list:
+        franchises = []
+        for franchise_id, report_data in self.load_latest_reports().items():
+            for host in report_data.get('hosts', []):
+                if any(p.get('port') == port and p.get('state') == 'open'
+                       for p in host.get('ports', [])):
+                    franchises.append(franchise_id)
+                    break
+        return sorted(franchises)
+
+
+class SQLiteStorage(ReportStorage):
+    """Base SQLite embarquée: rapports, hôtes et ports normalisés"""
+    
+    name = "sqlite"
+    atomic_batches = True
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS reports (
+            id INTEGER PRIMARY KEY,
+            franchise_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            received_at TEXT NOT NULL,
+            scan_id TEXT,
+            network TEXT,
+            total_hosts INTEGER,
+            hosts_up INTEGER,
+            hosts_down INTEGER,
+            total_ports_open INTEGER,
+            wan_latency_ms REAL,
+            scan_duration_seconds REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_reports_franchise_ts
+            ON reports (franchise_id, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_reports_ts ON reports (timestamp);
+        
+        CREATE TABLE IF NOT EXISTS hosts (
+            report_id INTEGER NOT NULL REFERENCES reports (id) ON DELETE CASCADE,
+            ip TEXT NOT NULL,
+            hostname TEXT,
+            state TEXT,
+            mac_address TEXT,
+            vendor TEXT,
+            os_name TEXT,
+            os_accuracy INTEGER,
+            PRIMARY KEY (report_id, ip)
+        ) WITHOUT ROWID;
+        
+        CREATE TABLE IF NOT EXISTS ports (
+            report_id INTEGER NOT NULL,
+            ip TEXT NOT NULL,
+            port INTEGER NOT NULL,
+            state TEXT,
+            service TEXT,
+            product TEXT,
+            version TEXT,
+            PRIMARY KEY (report_id, ip, port),
+            FOREIGN KEY (report_id, ip) REFERENCES hosts (report_id, ip) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_ports_port_state ON ports (port, state);
+        
+        CREATE TABLE IF NOT EXISTS latest_reports (
+            franchise_id TEXT PRIMARY KEY,
+            report_id INTEGER NOT NULL,
+            document TEXT NOT NULL
+        );
+        
+        CREATE TABLE IF NOT EXISTS rollups (
+            franchise_id TEXT NOT NULL,
+            resolution INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            reports INTEGER NOT NULL,
+            latency_count INTEGER NOT NULL,
+            latency_sum REAL NOT NULL,
+            latency_min REAL,
+            latency_max REAL,
+            latency_hist TEXT NOT NULL,
+            hosts_up_sum INTEGER NOT NULL,
+            hosts_up_max INTEGER NOT NULL,
+            ports_open_sum INTEGER NOT NULL,
+            ports_open_max INTEGER NOT NULL,
+            PRIMARY KEY (resolution, franchise_id, bucket)
+        ) WITHOUT ROWID;
+    """
+    
+    ROLLUP_COLUMNS = (
+        'reports', 'latency_count', 'latency_sum', 'latency_min', 'latency_max',
+        'latency_hist', 'hosts_up_sum', 'hosts_up_max', 'ports_open_sum', 'ports_open_max'
+    )
+    
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+        
+        # Base créée avant l'ajout des rollups: les recalculer une fois
+        has_reports = self._conn.execute("SELECT 1 FROM reports LIMIT 1").fetchone()
+        has_rollups = self._conn.execute("SELECT 1 FROM rollups LIMIT 1").fetchone()
+        if has_reports and not has_rollups:
+            self.rebuild_rollups()
+    
+    def _add_to_rollups(self, franchise_id: str, timestamp: str, wan_latency_ms,
+                        hosts_up: int, ports_open: int):
+        """Ajoute un rapport aux agrégats de chaque résolution (appelé dans une transaction)"""
+        try:
+            epoch = rollups.to_epoch(timestamp)
+        except ValueError:
+            return
+        
+        for resolution in rollups.RESOLUTIONS:
+            start = epoch - epoch % resolution
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.ROLLUP_COLUMNS)} FROM rollups "
+                "WHERE resolution = ? AND franchise_id = ? AND bucket = ?",
+                (resolution, franchise_id, start)
+            ).fetchone()
+            
+            bucket = self._row_to_bucket(row) if row else rollups.new_bucket()
+            rollups.add_point(bucket, wan_latency_ms, hosts_up, ports_open)
+            
+            values = [bucket[c] for c in self.ROLLUP_COLUMNS]
+            values[self.ROLLUP_COLUMNS.index('latency_hist')] = json.dumps(bucket['latency_hist'])
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO rollups (franchise_id, resolution, bucket, "
+                f"{', '.join(self.ROLLUP_COLUMNS)}) VALUES "
+                f"(?, ?, ?, {', '.join('?' * len(self.ROLLUP_COLUMNS))})",
+                [franchise_id, resolution, start] + values
+            )
+    
+    def _row_to_bucket(self, row) -> dict:
+        """Reconstruit un agrégat depuis une ligne de la table rollups"""
+        bucket = dict(zip(self.ROLLUP_COLUMNS, row))
+        bucket['latency_hist'] = {int(k): v for k, v in json.loads(bucket['latency_hist']).items()}
+        return bucket
+    
+    def rebuild_rollups(self):
+        """Recalcule tous les agrégats depuis la table reports"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM rollups")
+            rows = self._conn.execute(
+                "SELECT franchise_id, timestamp, wan_latency_ms, hosts_up, total_ports_open "
+                "FROM reports ORDER BY id"
+            ).fetchall()
+            for row in rows:
+                self._add_to_rollups(*row)
+    
+    def _insert_report(self, franchise_id: str, report_data: dict, received_at: datetime,
+                       update_latest: bool = True) -> int:
+        """Insère un rapport et ses hôtes/ports (appelé dans une transaction)"""
+        summary = report_data.get('summary') or {}
+        timestamp = _report_timestamp(report_data, received_at)
+        
+        cursor = self._conn.execute(
+            "INSERT INTO reports (franchise_id, timestamp, received_at, scan_id, network, "
+            "total_hosts, hosts_up, hosts_down, total_ports_open, wan_latency_ms, "
+            "scan_duration_seconds) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                franchise_id, timestamp, received_at.isoformat(),
+                report_data.get('scan_id'), report_data.get('network'),
+                summary.get('total_hosts', 0), summary.get('hosts_up', 0),
+                summary.get('hosts_down', 0), summary.get('total_ports_open', 0),
+                report_data.get('wan_latency_ms'), report_data.get('scan_duration_seconds')
+            )
+        )
+        report_id = cursor.lastrowid
+        
+        self._add_to_rollups(
+            franchise_id, timestamp, report_data.get('wan_latency_ms'),
+            summary.get('hosts_up', 0), summary.get('total_ports_open', 0)
+        )
+        
+        hosts = {}
+        ports = {}
+        for host in report_data.get('hosts', []):
+            ip = host.get('ip')
+            if not ip:
+                continue
+            os_info = host.get('os') or {}
+            hosts[ip] = (
+                report_id, ip, host.get('hostname'), host.get('state'),
+                host.get('mac_address'), host.get('vendor'),
+                os_info.get('name'), os_info.get('accuracy')
+            )
+            for port in host.get('ports', []):
+                ports[(ip, port.get('port'))] = (
+                    report_id, ip, port.get('port'), port.get('state'),
+                    port.get('service'), port.get('product'), port.get('version')
+                )
+        
+        self._conn.executemany(
+            "INSERT INTO hosts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", hosts.values()
+        )
+        self._conn.executemany(
+            "INSERT INTO ports VALUES (?, ?, ?, ?, ?, ?, ?)", ports.values()
+        )
+        
+        if update_latest:
+            self._conn.execute(
+                "INSERT INTO latest_reports (franchise_id, report_id, document) VALUES (?, ?, ?) "
+                "ON CONFLICT (franchise_id) DO UPDATE SET "
+                "report_id = excluded.report_id, document = excluded.document",
+                (franchise_id, report_id, json.dumps(report_data, ensure_ascii=False))
+            )
+        
+        return report_id
+    
+    def save_report(self, franchise_id: str, report_data: dict, received_at: datetime = None):
+        received_at = received_at or datetime.now()
+        with self._lock, self._conn:
+            self._insert_report(franchise_id, report_data, received_at)
+    
+    def save_reports(self, items) -> int:
+        count = 0
+        with self._lock, self._conn:
+            for franchise_id, report_data, received_at, update_latest in items:
+                self._insert_report(franchise_id, report_data, received_at, update_latest)
+                count += 1
+        return count
+    
+    def count_reports(self) -> int:
+        """Nombre total de rapports stockés"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+    
+    def load_latest_reports(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT franchise_id, document FROM latest_reports"
+            ).fetchall()
+        return {franchise_id: json.loads(document) for franchise_id, document in rows}
+    
+    def get_report_history(self, franchise_id: str, since: str = None, until: str = None) -> list:
+        query = (
+            "SELECT timestamp, wan_latency_ms, hosts_up, total_ports_open "
+            "FROM reports WHERE franchise_id = ?"
+        )
+        params = [franchise_id]
+        if since:
+            query += " AND timestamp >= ?"
+            params.append(since)
+        if until:
+            query += " AND timestamp < ?"
+            params.append(until)
+        query += " ORDER BY timestamp"
+        
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        
+        return [
+            {
+                'timestamp': timestamp,
+                'wan_latency_ms': latency,
+                'hosts_up': hosts_up,
+                'total_ports_open': ports_open
+            }
+            for timestamp, latency, hosts_up, ports_open in rows
+        ]
+    
+    def get_rollups(self, franchise_ids, resolution: int, since: int, until: int):
+        query = (
+            f"SELECT franchise_id, bucket, {', '.join(self.ROLLUP_COLUMNS)} FROM rollups "
+            "WHERE resolution = ? AND bucket >= ? AND bucket < ?"
+        )
+        # Les intervalles commencés avant since restent inclus
+        params = [resolution, since - since % resolution, until]
+        if franchise_ids is not None:
+            query += f" AND franchise_id IN ({', '.join('?' * len(franchise_ids))})"
+            params.extend(franchise_ids)
+        
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        
+        return [(row[0], row[1], self._row_to_bucket(row[2:])) for row in rows]
+    
+    def purge(self, reports_before: datetime, rollups_before: dict) -> dict:
+        with self._lock:
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+            free_before = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            
+            with self._conn:
+                reports = self._conn.execute(
+                    "DELETE FROM reports WHERE received_at < ? "
+                    "AND id NOT IN (SELECT report_id FROM latest_reports)",
+                    (reports_before.isoformat(),)
+                ).rowcount
+                
+                rollup_rows = 0
+                for resolution, before in rollups_before.items():
+                    rollup_rows += self._conn.execute(
+                        "DELETE FROM rollups WHERE resolution = ? AND bucket < ?",
+                        (resolution, before)
+                    ).rowcount
+            
+            # Les pages libérées sont réutilisées par les prochaines insertions
+            free_after = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        
+        return {
+            "reports": reports,
+            "rollups": rollup_rows,
+            "bytes": max(free_after - free_before, 0) * page_size
+        }
+    
+    def find_franchises_with_open_port(self, port: int) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT l.franchise_id FROM latest_reports l "
+                "JOIN ports p ON p.report_id = l.report_id "
+                "WHERE p.port = ? AND p.state = 'open' ORDER BY l.franchise_id",
+                (port,)
+            ).fetchall()
+        return [row[0] for row in rows]
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def parse_report_filename(filename: str, suffix: str = '.json'):
+    """
+    Décode un nom de fichier horodaté <franchise>_<YYYYmmdd>_<HHMMSS><suffix>
+    
+    Returns:
+        (franchise_id, datetime de réception), ou None pour les autres fichiers
+    """
+    if not filename.endswith(suffix):
+        return None
+    
+    parts = filename[:-len(suffix)].rsplit('_', 2)
+    if len(parts) != 3:
+        return None
+    
+    try:
+        received_at = datetime.strptime(f"{parts[1]}_{parts[2]}", '%Y%m%d_%H%M%S')
+    except ValueError:
+        return None
+    
+    return parts[0], received_at
+
+
+def parse_archive_filename(filename: str):
+    """
+    Décode un nom d'archive journalière <franchise>_<YYYYmmdd>.jsonl.<ext>
+    
+    Returns:
+        (franchise_id, jour, compression), ou None pour les autres fichiers
+    """
+    for codec, suffix in ARCHIVE_SUFFIXES.items():
+        if not filename.endswith(suffix):
+            continue
+        parts = filename[:-len(suffix)].rsplit('_', 1)
+        if len(parts) != 2:
+            return None
+        try:
+            day = datetime.strptime(parts[1], '%Y%m%d')
+        except ValueError:
+            return None
+        return parts[0], day, codec
+    return None
+
+
+def archive_path(archive_dir: Path, franchise_id: str, day: datetime, codec: str) -> Path:
+    """Chemin de l'archive journalière d'une franchise"""
+    return Path(archive_dir) / f"{franchise_id}_{day.strftime('%Y%m%d')}{ARCHIVE_SUFFIXES[codec]}"
+
+
+def append_archive_records(path: Path, records, codec: str):
+    """
+    Ajoute des enregistrements JSON (une ligne chacun) à une archive compressée
+    
+    Chaque ajout forme un nouveau membre gzip / une nouvelle trame zstd, ce que
+    les deux formats permettent de relire d'un seul flux.
+    """
+    payload = ''.join(
+        json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        for record in records
+    ).encode('utf-8')
+    
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Compression zstd indisponible (pip install zstandard)")
+        data = zstandard.ZstdCompressor(level=10).compress(payload)
+    else:
+        data = gzip.compress(payload, compresslevel=9)
+    
+    with open(path, 'ab') as f:
+        f.write(data)
+
+
+def iter_archive_records(path: Path):
+    """Relit les enregistrements d'une archive journalière"""
+    path = Path(path)
+    if path.name.endswith(ARCHIVE_SUFFIXES["zstd"]):
+        if zstandard is None:
+            raise RuntimeError("Compression zstd indisponible (pip install zstandard)")
+        raw = zstandard.ZstdDecompressor().stream_reader(
+            open(path, 'rb'), read_across_frames=True, closefd=True
+        )
+        stream = io.TextIOWrapper(raw, encoding='utf-8')
+    else:
+        stream = gzip.open(path, 'rt', encoding='utf-8')
+    
+    with stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def create_storage(backend: str, data_dir: Path) -> ReportStorage:
+    """Instancie le backend de stockage demandé ('json' ou 'sqlite')"""
+    data_dir = Path(data_dir)
+    if backend == "sqlite":
+        return SQLiteStorage(data_dir / "nester.db")
+    if backend == "json":
+        return JsonFileStorage(data_dir / "reports")
+    raise ValueError(f"Backend de stockage inconnu: {backend}")
+
+
+def migrate_json_reports(reports_dir: Path, storage: SQLiteStorage, batch_size: int = 500) -> int:
+    """
+    Importe l'arborescence data/reports existante dans la base SQLite
+    
+    Les rapports bruts et ceux des archives journalières compactées sont
+    insérés par franchise et par ordre chronologique, par lots d'une
+    transaction; le plus récent de chaque franchise devient son dernier rapport.
+    
+    Returns:
+        Nombre de rapports importés
+    """
+    archive = JsonFileStorage(reports_dir)
+    
+    imported = 0
+    batch = []
+    for franchise_id in sorted(archive.archived_franchise_ids()):
+        # Un rapport encore brut l'emporte sur sa copie compactée (compaction interrompue)
+        entries = {
+            received_at: report_file
+            for _, received_at, report_file in archive.iter_archived_reports(franchise_id)
+        }
+        for received_at, report_data in archive.iter_compacted_reports(franchise_id):
+            entries.setdefault(received_at, report_data)
+        
+        ordered = sorted(entries.items(), key=lambda entry: entry[0])
+        for i, (received_at, source) in enumerate(ordered):
+            report_data = source
+            if isinstance(source, Path):
+                try:
+                    with open(source, 'r', encoding='utf-8') as f:
+                        report_data = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"Rapport ignoré {source.name}: {e}")
+                    continue
+            
+            batch.append((franchise_id, report_data, received_at, i == len(ordered) - 1))
+            if len(batch) >= batch_size:
+                imported += storage.save_reports(batch)
+                batch = []
+    
+    if batch:
+        imported += storage.save_reports(batch)
+    
+    return imported
+
+def main():
+    """Interface CLI: migration des rapports JSON vers SQLite"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Stockage des rapports du Nester")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    migrate = subparsers.add_parser("migrate", help="Importer data/reports dans SQLite")
+    migrate.add_argument("--data-dir", default="data", help="Répertoire de données du Nester")
+    migrate.add_argument("--batch-size", type=int, default=500, help="Rapports par transaction")
+    migrate.add_argument("--force", action="store_true", help="Importer même si la base contient des rapports")
+    
+    args = parser.parse_args()
+    
+    if args.command == "migrate":
+        data_dir = Path(args.data_dir)
+        storage = SQLiteStorage(data_dir / "nester.db")
+        if storage.count_reports() and not args.force:
+            storage.close()
+            print("❌ La base contient déjà des rapports (utiliser --force pour réimporter)")
+            return
+        try:
+            count = migrate_json_reports(data_dir / "reports", storage, args.batch_size)
+        finally:
+            storage.close()
+        print(f"✅ {count} rapports importés dans {data_dir / 'nester.db'}")
+
+
+if __name__ == "__main__":
+    main()
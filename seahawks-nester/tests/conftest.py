@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Tests du Seahawks Nester
+Les modules de l'application sont à plat dans le répertoire parent
+"""
+
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
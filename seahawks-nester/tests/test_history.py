@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests des endpoints d'historique: intervalle choisi selon la rétention
+des agrégats fins
+"""
+
+from datetime import datetime, timedelta
+import os
+
+import pytest
+
+
+@pytest.fixture
+def nester_module(tmp_path_factory):
+    # Le module instancie un gestionnaire global dans ./data
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("nester"))
+    try:
+        import nester
+    finally:
+        os.chdir(cwd)
+    nester.nester.logger.disabled = True
+    return nester
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def client(nester_module, tmp_path, monkeypatch, request):
+    """Client de l'API sur un gestionnaire dont la rétention a purgé les agrégats fins"""
+    manager = nester_module.NesterManager(tmp_path / "data", storage_backend=request.param)
+    manager.logger.disabled = True
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    
+    # Un rapport toutes les 10 minutes: il y a un mois, et ces derniers jours
+    for start in (now - timedelta(days=30), now - timedelta(days=2)):
+        for number in range(6 * 24):
+            received_at = start + timedelta(minutes=10 * number)
+            manager.storage.save_report("franchise_01", {
+                "timestamp": received_at.isoformat(),
+                "wan_latency_ms": 12.5,
+                "summary": {"hosts_up": 4, "total_ports_open": 9},
+                "hosts": []
+            }, received_at)
+    manager.retention.run_once(now)
+    
+    monkeypatch.setattr(nester_module, 'nester', manager)
+    return nester_module.app.test_client(), now
+
+
+def window(start: datetime, hours: int = 12) -> str:
+    until = start + timedelta(hours=hours, minutes=-1)
+    return f"since={start.isoformat()}&until={until.isoformat()}"
+
+
+@pytest.mark.parametrize("url", ["/api/history", "/api/probe/franchise_01/history"])
+def test_old_short_window_uses_kept_resolution(client, url):
+    client, now = client
+    old = now - timedelta(days=30)
+    
+    body = client.get(f"{url}?{window(old)}").get_json()
+    # Agrégats 1 min purgés (7 jours): les agrégats horaires servent la fenêtre
+    assert body['step_seconds'] == 3600
+    assert len(body['points']) == 12
+    assert all(point['reports'] == 6 for point in body['points'])
+    
+    # Intervalle imposé plus fin que ce qui est conservé: arrondi à l'heure
+    body = client.get(f"{url}?{window(old)}&step=5m").get_json()
+    assert body['step_seconds'] == 3600
+    assert len(body['points']) == 12
+    
+    body = client.get(f"{url}?{window(old)}&step=2h").get_json()
+    assert body['step_seconds'] == 7200
+    assert len(body['points']) == 6
+
+
+def test_recent_short_window_keeps_minute_resolution(client):
+    client, now = client
+    recent = now - timedelta(days=2)
+    body = client.get(f"/api/history?{window(recent)}").get_json()
+    assert body['step_seconds'] == 60
+    assert len(body['points']) == 6 * 12
+    assert all(point['reports'] == 1 for point in body['points'])
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Tests de la file d'ingestion: une écriture en échec est réessayée, sans
+bloquer les autres franchises ni perdre d'upload acquitté
+"""
+
+import os
+import threading
+
+import pytest
+
+import ingestion
+from ingestion import IngestionQueue
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(ingestion, 'RETRY_DELAY', 0.01)
+    monkeypatch.setattr(ingestion, 'RETRY_MAX_DELAY', 0.05)
+
+
+class FlakyWriter:
+    """Écrivain qui échoue failures fois pour les clés données"""
+    
+    def __init__(self, failures: dict):
+        self.failures = dict(failures)
+        self.written = {}
+        self.lock = threading.Lock()
+    
+    def __call__(self, batch):
+        failed = {}
+        with self.lock:
+            for key, tasks in batch:
+                if self.failures.get(key, 0) > 0:
+                    self.failures[key] -= 1
+                    failed[key] = (tasks, OSError(f"disque plein pour {key}"))
+                    continue
+                self.written.setdefault(key, []).extend(
+                    (task['kind'], task['payload']) for task in tasks
+                )
+        return failed
+
+
+def make_queue(writer, workers: int = 2, **kwargs):
+    return IngestionQueue(
+        writer, {"workers": workers, "queue_size": 1000, "batch_size": 50}, **kwargs
+    )
+
+
+def test_failed_key_is_retried_without_blocking_others():
+    writer = FlakyWriter({"franchise_01": 3})
+    queue = make_queue(writer)
+    queue.start()
+    for number in range(20):
+        queue.submit_many([
+            ("franchise_01", 'report', number),
+            ("franchise_02", 'report', number)
+        ])
+    assert queue.flush(5)
+    queue.stop()
+    
+    # Rien de perdu, et chaque franchise dans l'ordre d'arrivée
+    expected = [('report', number) for number in range(20)]
+    assert writer.written["franchise_01"] == expected
+    assert writer.written["franchise_02"] == expected
+    stats = queue.stats()
+    assert stats['depth'] == 0
+    assert stats['written'] == 40
+    assert stats['errors'] > 0
+    assert stats['retrying_keys'] == 0
+
+
+def test_writer_exception_retries_whole_batch():
+    calls = []
+    
+    def writer(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise RuntimeError("base verrouillée")
+        return None
+    
+    queue = make_queue(writer, workers=1)
+    queue.submit("franchise_01", 'report', 1)
+    queue.start()
+    assert queue.flush(5)
+    queue.stop()
+    assert len(calls) == 2
+    assert queue.stats()['written'] == 1
+
+
+def test_superseded_coalesced_task_is_not_retried():
+    release = threading.Event()
+    writer = FlakyWriter({"franchise_01": 1})
+    
+    def slow_writer(batch):
+        result = writer(batch)
+        release.wait(5)
+        return result
+    
+    queue = make_queue(slow_writer, workers=1, coalesce_kinds=('probe',))
+    queue.submit("franchise_01", 'probe', 'ancien')
+    queue.start()
+    # Nouvel état de la sonde pendant l'écriture (en échec) de l'ancien
+    while not queue.stats()['in_flight_keys']:
+        pass
+    queue.submit("franchise_01", 'probe', 'nouveau')
+    release.set()
+    assert queue.flush(5)
+    queue.stop()
+    
+    assert writer.written["franchise_01"] == [('probe', 'nouveau')]
+    assert queue.stats()['depth'] == 0
+
+
+def test_synchronous_mode_raises_write_errors():
+    queue = make_queue(FlakyWriter({"franchise_01": 1}), workers=0)
+    with pytest.raises(OSError):
+        queue.submit("franchise_01", 'report', 1)
+
+
+@pytest.fixture
+def nester_module(tmp_path_factory):
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("nester"))
+    try:
+        import nester
+    finally:
+        os.chdir(cwd)
+    nester.nester.logger.disabled = True
+    return nester
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_one_failing_franchise_does_not_lose_the_others(nester_module, tmp_path, backend):
+    manager = nester_module.NesterManager(tmp_path / "data", storage_backend=backend)
+    manager.logger.disabled = True
+    for number in range(4):
+        manager.register_probe(f"franchise_0{number}", f"Franchise {number}")
+    
+    save_reports = manager.storage.save_reports
+    failures = {"franchise_02": 2}
+    
+    def failing_save(items):
+        items = list(items)
+        for franchise_id, *_ in items:
+            if failures.get(franchise_id, 0) > 0:
+                failures[franchise_id] -= 1
+                raise OSError("disque plein")
+        return save_reports(items)
+    
+    manager.storage.save_reports = failing_save
+    for number in range(4):
+        manager.save_report(f"franchise_0{number}", {
+            "timestamp": "2026-03-07T14:00:00",
+            "summary": {"hosts_up": number, "total_ports_open": 0},
+            "hosts": []
+        })
+        manager.save_probe_logs(
+            f"franchise_0{number}", manager.parse_log_chunk({"lines": f"ligne {number}\n"})
+        )
+    
+    manager.ingestion.start()
+    assert manager.ingestion.flush(10)
+    manager.ingestion.stop()
+    
+    reloaded = nester_module.NesterManager(tmp_path / "data", storage_backend=backend)
+    reloaded.logger.disabled = True
+    for number in range(4):
+        franchise_id = f"franchise_0{number}"
+        assert reloaded.get_report(franchise_id)['summary']['hosts_up'] == number
+        assert reloaded.get_probe(franchise_id) is not None
+        assert f"ligne {number}" in reloaded.get_probe_logs(franchise_id)["content"]
+    assert manager.ingestion.stats()['errors'] > 0
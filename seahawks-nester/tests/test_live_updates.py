@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests de la diffusion SSE: reprise après Last-Event-ID, resync quand le
+tampon a débordé, limite d'abonnés
+"""
+
+from live_updates import Broadcaster
+
+
+def event_ids(chunk: bytes) -> list:
+    return [int(line[4:]) for line in chunk.decode('utf-8').splitlines() if line.startswith('id: ')]
+
+
+def open_stream(broadcaster, last_event_id=None):
+    subscription = broadcaster.subscribe(last_event_id)
+    assert next(subscription).startswith(b"retry: ")
+    return subscription
+
+
+def test_reconnection_resumes_after_last_event_id():
+    broadcaster = Broadcaster(flush_interval=0)
+    for n in range(3):
+        broadcaster.publish('heartbeat', {"n": n})
+    
+    subscription = open_stream(broadcaster, last_event_id='1')
+    assert event_ids(next(subscription)) == [2, 3]
+    
+    broadcaster.publish('heartbeat', {"n": 3})
+    assert event_ids(next(subscription)) == [4]
+
+
+def test_new_or_unknown_last_event_id_starts_at_the_end():
+    broadcaster = Broadcaster(flush_interval=0, keepalive=0.01)
+    broadcaster.publish('heartbeat', {})
+    
+    # Identifiant illisible ou d'un processus précédent (au-delà du dernier)
+    for last_event_id in (None, 'abc', '99'):
+        subscription = open_stream(broadcaster, last_event_id)
+        assert next(subscription) == b": keepalive\n\n"
+        subscription.close()
+
+
+def test_overflowed_backlog_sends_resync():
+    broadcaster = Broadcaster(backlog=2, flush_interval=0)
+    subscription = open_stream(broadcaster, last_event_id='0')
+    for n in range(5):
+        broadcaster.publish('heartbeat', {"n": n})
+    
+    # Les événements 1 à 3 sont sortis du tampon: rechargement complet
+    chunk = next(subscription)
+    assert b"event: resync" in chunk
+    assert event_ids(chunk) == [5]
+    assert broadcaster.get_stats()["resyncs"] == 1
+    
+    broadcaster.publish('heartbeat', {"n": 5})
+    assert event_ids(next(subscription)) == [6]
+
+
+def test_subscriber_limit():
+    broadcaster = Broadcaster(max_subscribers=2)
+    first = broadcaster.subscribe()
+    second = broadcaster.subscribe()
+    assert broadcaster.subscribe() is None
+    
+    # La déconnexion d'un navigateur libère sa place (une seule fois)
+    first.close()
+    first.close()
+    assert broadcaster.get_stats()["subscribers"] == 1
+    assert broadcaster.subscribe() is not None
+    assert broadcaster.subscribe() is None
+    second.close()
+
+
+def test_keepalive_calls_on_idle():
+    broadcaster = Broadcaster(keepalive=0.01)
+    calls = []
+    subscription = broadcaster.subscribe(on_idle=lambda: calls.append(1))
+    next(subscription)
+    
+    assert next(subscription) == b": keepalive\n\n"
+    assert calls == [1]
+    
+    broadcaster.close()
+    assert list(subscription) == []
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests du journal des sondes: les renvois de logs sont dédupliqués sur les
+octets exacts du fichier source, même hors UTF-8 valide
+"""
+
+import base64
+import os
+
+import pytest
+
+
+@pytest.fixture
+def manager(tmp_path_factory, tmp_path):
+    # Le module instancie un gestionnaire global dans ./data
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("nester"))
+    try:
+        import nester
+    finally:
+        os.chdir(cwd)
+    nester.nester.logger.disabled = True
+    
+    manager = nester.NesterManager(tmp_path / "data", storage_backend="json")
+    manager.logger.disabled = True
+    manager.ingestion.start()
+    yield manager
+    manager.ingestion.stop()
+
+
+# Octet invalide en UTF-8 et caractère coupé en fin de morceau
+SOURCE = b"ligne 1 \xff\n" + "ligne 2 é\n".encode('utf-8') + b"ligne 3\n" + "ligne 4 é".encode('utf-8')[:-1]
+
+
+def chunk(start: int, end: int, **fields) -> dict:
+    return {
+        "source": "harvester_service.log", "inode": 42, "generation": 0,
+        "offset": start, "end_offset": end,
+        "data_b64": base64.b64encode(SOURCE[start:end]).decode('ascii'),
+        **fields
+    }
+
+
+def journal(manager) -> bytes:
+    assert manager.ingestion.flush(10)
+    return (manager.logs_dir / "franchise_01.log").read_bytes()
+
+
+def test_resent_raw_chunks_are_deduplicated(manager):
+    second_line = SOURCE.index(b"ligne 2")
+    manager.save_probe_logs("franchise_01", manager.parse_log_chunk(chunk(0, second_line)))
+    assert journal(manager) == SOURCE[:second_line]
+    
+    # Renvoi chevauchant le déjà reçu: seuls les octets nouveaux sont ajoutés
+    manager.save_probe_logs("franchise_01", manager.parse_log_chunk(chunk(0, len(SOURCE) - 4)))
+    manager.save_probe_logs("franchise_01", manager.parse_log_chunk(chunk(0, len(SOURCE))))
+    manager.save_probe_logs("franchise_01", manager.parse_log_chunk(chunk(second_line, len(SOURCE))))
+    assert journal(manager) == SOURCE
+    assert manager.get_probe_logs("franchise_01")['cursor']['offset'] == len(SOURCE)
+    assert manager.get_probe_logs("franchise_01")['total_lines'] == 3
+
+
+def test_invalid_log_chunks_are_rejected(manager):
+    for log_data in (None, {"lines": 12}, {"data_b64": "pas du base64!"}, {"data_b64": 3}):
+        with pytest.raises(ValueError):
+            manager.parse_log_chunk(log_data)
+    
+    # Ancien Harvester: texte
+    assert manager.parse_log_chunk({"lines": "ligne é\n"})['data'] == "ligne é\n".encode('utf-8')
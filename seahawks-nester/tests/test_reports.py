@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests des uploads de rapports: un différentiel et un rapport complet
+concurrents ne laissent jamais une empreinte qui ne correspond pas au
+dernier rapport
+"""
+
+import os
+import threading
+
+import pytest
+
+from report_delta import report_hash
+
+
+@pytest.fixture
+def nester_module(tmp_path_factory):
+    # Le module instancie un gestionnaire global dans ./data
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("nester"))
+    try:
+        import nester
+    finally:
+        os.chdir(cwd)
+    nester.nester.logger.disabled = True
+    return nester
+
+
+def make_report(hosts_up: int) -> dict:
+    return {
+        "timestamp": f"2026-03-07T14:{hosts_up:02d}:00",
+        "summary": {"hosts_up": hosts_up, "total_ports_open": 0},
+        "hosts": [{"ip": f"192.168.1.{number}", "ports": []} for number in range(hosts_up)]
+    }
+
+
+def make_delta(base: dict, target: dict) -> dict:
+    """Différentiel qui remplace tout le rapport de base"""
+    return {
+        "base_hash": report_hash(base),
+        "target_hash": report_hash(target),
+        "set": {key: value for key, value in target.items() if key != 'hosts'},
+        "hosts_removed": [host['ip'] for host in base['hosts']],
+        "hosts_upserted": target['hosts']
+    }
+
+
+def test_full_report_waits_for_concurrent_delta(nester_module, tmp_path, monkeypatch):
+    manager = nester_module.NesterManager(tmp_path / "data", storage_backend="json")
+    manager.logger.disabled = True
+    base, target, concurrent = make_report(1), make_report(2), make_report(3)
+    assert manager.save_report("franchise_01", base) == report_hash(base)
+    
+    # Différentiel suspendu entre la vérification de sa base et l'enregistrement
+    applying, release = threading.Event(), threading.Event()
+    apply_report_delta = nester_module.apply_report_delta
+    
+    def slow_apply(report, delta):
+        applying.set()
+        release.wait(5)
+        return apply_report_delta(report, delta)
+    
+    monkeypatch.setattr(nester_module, 'apply_report_delta', slow_apply)
+    results = {}
+    delta_thread = threading.Thread(target=lambda: results.update(
+        delta=manager.save_report_delta("franchise_01", make_delta(base, target))
+    ))
+    full_thread = threading.Thread(target=lambda: results.update(
+        full=manager.save_report("franchise_01", concurrent)
+    ))
+    
+    delta_thread.start()
+    assert applying.wait(5)
+    full_thread.start()
+    full_thread.join(0.2)
+    assert full_thread.is_alive()  # Le rapport complet attend la fin du différentiel
+    
+    release.set()
+    delta_thread.join(5)
+    full_thread.join(5)
+    
+    assert results == {"delta": report_hash(target), "full": report_hash(concurrent)}
+    assert manager.get_report("franchise_01") == concurrent
+    assert manager.get_report_hash("franchise_01") == report_hash(concurrent)
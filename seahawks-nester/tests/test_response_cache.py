@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests du cache des réponses: un corps par version, ETag et 304 jusqu'au
+prochain bump()
+"""
+
+import os
+
+import pytest
+
+from response_cache import ResponseCache
+
+
+@pytest.fixture(scope="module")
+def nester_module(tmp_path_factory):
+    # Le module instancie un gestionnaire global dans ./data
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("nester"))
+    try:
+        import nester
+    finally:
+        os.chdir(cwd)
+    nester.nester.logger.disabled = True
+    return nester
+
+
+def counting_build(body=b'{}'):
+    calls = []
+    
+    def build():
+        calls.append(1)
+        return body, {}
+    return build, calls
+
+
+def test_body_built_once_per_version():
+    cache = ResponseCache()
+    build, calls = counting_build()
+    
+    first = cache.get('statistics', build)
+    assert cache.get('statistics', build) is first
+    assert len(calls) == 1
+    
+    cache.bump('statistics')
+    second = cache.get('statistics', build)
+    assert len(calls) == 2
+    assert second.etag != first.etag
+    assert cache.get_stats()["hits"] == 1
+    
+    # Les autres ressources et variantes ne sont pas touchées
+    other = cache.get('probes', build)
+    cache.bump('statistics')
+    assert cache.get('probes', build) is other
+
+
+def test_track_bumps_only_on_signature_change():
+    cache = ResponseCache()
+    build, _ = counting_build()
+    
+    cache.track('report:f1', (1, 100))
+    first = cache.get('report:f1', build)
+    cache.track('report:f1', (1, 100))
+    assert cache.get('report:f1', build) is first
+    cache.track('report:f1', (2, 100))
+    assert cache.get('report:f1', build).etag != first.etag
+
+
+def test_etag_differs_across_restarts():
+    build, _ = counting_build()
+    assert ResponseCache().get('statistics', build).etag != ResponseCache().get('statistics', build).etag
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    build, calls = counting_build()
+    for variant in ('a', 'b', 'c'):
+        cache.get('probes', build, variant)
+    
+    cache.get('probes', build, 'c')
+    assert len(calls) == 3
+    cache.get('probes', build, 'a')
+    assert len(calls) == 4
+
+
+def test_not_modified_until_bump(nester_module):
+    client = nester_module.app.test_client()
+    
+    response = client.get('/api/statistics')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    
+    response = client.get('/api/statistics', headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    
+    nester_module.nester.responses.bump('statistics')
+    response = client.get('/api/statistics', headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    
+    response = client.get('/api/statistics', headers={"If-None-Match": response.headers['ETag']})
+    assert response.status_code == 304
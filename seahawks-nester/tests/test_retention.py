@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests de la rétention: les rapports compactés restent interrogeables
+"""
+
+from datetime import datetime, timedelta
+
+import rollups
+import storage
+from retention import RetentionManager, load_policy
+
+
+NOW = datetime(2026, 3, 20, 12, 0, 0)
+
+
+def make_report(timestamp: datetime, latency: float, hosts_up: int) -> dict:
+    return {
+        "timestamp": timestamp.isoformat(),
+        "wan_latency_ms": latency,
+        "summary": {"hosts_up": hosts_up, "total_ports_open": hosts_up * 2},
+        "hosts": []
+    }
+
+
+def populate(report_storage, franchise_ids, days: int = 3):
+    """Un rapport par heure pendant days jours, il y a plus d'un mois"""
+    start = NOW - timedelta(days=40)
+    for franchise_index, franchise_id in enumerate(franchise_ids):
+        for hour in range(days * 24):
+            received_at = start + timedelta(hours=hour)
+            report_storage.save_report(
+                franchise_id, make_report(received_at, 10.0 + hour % 7, franchise_index + 3),
+                received_at
+            )
+
+
+def histories(report_storage):
+    since = rollups.to_epoch((NOW - timedelta(days=60)).isoformat())
+    until = rollups.to_epoch(NOW.isoformat())
+    step = 3600
+    return (
+        report_storage.get_global_history(since, until, step),
+        {
+            franchise_id: report_storage.get_history(franchise_id, since, until, step)
+            for franchise_id in ("franchise_01", "franchise_02")
+        }
+    )
+
+
+def test_global_history_survives_compaction(tmp_path):
+    report_storage = storage.JsonFileStorage(tmp_path / "reports")
+    populate(report_storage, ["franchise_01", "franchise_02"])
+    global_before, per_franchise_before = histories(report_storage)
+    assert len(global_before) == 72
+    
+    policy = load_policy({})
+    policy['interval_seconds'] = 0
+    manager = RetentionManager(tmp_path / "reports", tmp_path / "logs", report_storage, policy)
+    stats = manager.run_once(NOW)
+    
+    assert stats['reports_compacted'] == 2 * 72
+    assert not list(report_storage.iter_archived_reports())
+    assert report_storage.archived_franchise_ids() == {"franchise_01", "franchise_02"}
+    
+    global_after, per_franchise_after = histories(report_storage)
+    assert global_after == global_before
+    assert per_franchise_after == per_franchise_before
+    assert all(point['franchises'] == 2 for point in global_after)
+
+
+def test_bytes_reclaimed_never_negative(tmp_path):
+    report_storage = storage.JsonFileStorage(tmp_path / "reports")
+    policy = load_policy({})
+    manager = RetentionManager(tmp_path / "reports", tmp_path / "logs", report_storage, policy)
+    
+    # Rapports minuscules: l'archive compressée (en-têtes gzip) pèse plus lourd
+    for day in range(3):
+        received_at = NOW - timedelta(days=30 + day)
+        report_storage.save_report("franchise_01", {}, received_at)
+        stats = manager.run_once(NOW)
+        assert stats['reports_compacted'] == 1
+        assert stats['bytes_reclaimed'] >= 0
+    
+    assert manager.metrics['bytes_reclaimed_total'] >= 0
+
+
+def test_migration_imports_compacted_reports(tmp_path):
+    report_storage = storage.JsonFileStorage(tmp_path / "reports")
+    populate(report_storage, ["franchise_01", "franchise_02"])
+    policy = load_policy({})
+    RetentionManager(tmp_path / "reports", tmp_path / "logs", report_storage, policy).run_once(NOW)
+    
+    # Rapports récents encore bruts, à côté des archives compactées
+    for hour in range(6):
+        received_at = NOW - timedelta(hours=6 - hour)
+        report_storage.save_report("franchise_01", make_report(received_at, 20.0, 5), received_at)
+    expected_global, expected_per_franchise = histories(report_storage)
+    
+    database = storage.SQLiteStorage(tmp_path / "nester.db")
+    try:
+        assert storage.migrate_json_reports(tmp_path / "reports", database, batch_size=50) == 2 * 72 + 6
+        assert database.count_reports() == 2 * 72 + 6
+        assert histories(database) == (expected_global, expected_per_franchise)
+        
+        latest = database.load_latest_reports()
+        assert latest["franchise_01"]["timestamp"] == (NOW - timedelta(hours=1)).isoformat()
+        assert latest["franchise_02"]["timestamp"] == (NOW - timedelta(days=37, hours=1)).isoformat()
+    finally:
+        database.close()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests des statistiques incrémentales du NesterManager: après chaque
+écriture, les agrégats maintenus en O(1) valent un recalcul complet
+"""
+
+from datetime import datetime, timedelta
+from fractions import Fraction
+import os
+import random
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def nester_module(tmp_path_factory):
+    # Le module instancie un gestionnaire global dans ./data
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("nester"))
+    try:
+        import nester
+    finally:
+        os.chdir(cwd)
+    nester.nester.logger.disabled = True
+    return nester
+
+
+@pytest.fixture
+def clock(nester_module, monkeypatch):
+    """Horloge du module nester avancée à la main (expiration des heartbeats)"""
+    class Clock(datetime):
+        current = datetime(2026, 3, 7, 14, 0, 0)
+        
+        @classmethod
+        def now(cls, tz=None):
+            return cls.current
+        
+        @classmethod
+        def advance(cls, seconds: float):
+            cls.current += timedelta(seconds=seconds)
+    
+    monkeypatch.setattr(nester_module, 'datetime', Clock)
+    return Clock
+
+
+def make_report(rng: random.Random) -> dict:
+    # Latences absentes ou nulles comprises: elles ne comptent pas dans la moyenne
+    latency = rng.choice([None, 0, round(rng.uniform(0.1, 250), 3), rng.uniform(0.1, 250)])
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "wan_latency_ms": latency,
+        "summary": {
+            "hosts_up": rng.randint(0, 40),
+            "total_ports_open": rng.randint(0, 200)
+        },
+        "hosts": []
+    }
+
+
+def exact_average_latency(manager):
+    """Moyenne exacte des latences des derniers rapports des sondes enregistrées"""
+    latencies = [
+        Fraction(report['wan_latency_ms'])
+        for franchise_id, report in manager._latest_reports.items()
+        if franchise_id in manager._probes and report.get('wan_latency_ms')
+    ]
+    return sum(latencies) / len(latencies) if latencies else None
+
+
+def assert_consistent(manager):
+    incremental = manager.get_statistics()
+    assert incremental == manager.compute_statistics()
+    
+    expected = exact_average_latency(manager)
+    if expected is None:
+        assert manager._latency_count == 0
+        assert manager._latency_sum == 0
+    else:
+        assert manager._latency_sum / manager._latency_count == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_statistics_match_full_recompute(nester_module, clock, tmp_path, seed):
+    rng = random.Random(seed)
+    manager = nester_module.NesterManager(tmp_path / "data", storage_backend="json")
+    manager.logger.disabled = True
+    manager.ingestion.start()
+    
+    franchise_ids = [f"franchise_{number:02d}" for number in range(12)]
+    steps = ('register', 'heartbeat', 'report', 'expire', 'reregister')
+    
+    for _ in range(400):
+        step = rng.choice(steps)
+        franchise_id = rng.choice(franchise_ids)
+        
+        if step == 'register':
+            manager.register_probe(franchise_id, f"Franchise {franchise_id}")
+        elif step == 'reregister':
+            known = sorted(manager._probes)
+            if known:
+                franchise_id = rng.choice(known)
+                manager.register_probe(franchise_id, f"Franchise {franchise_id} (renommée)")
+        elif step == 'heartbeat':
+            # Heartbeat d'une sonde inconnue compris: ignoré
+            manager.update_probe_heartbeat(franchise_id)
+        elif step == 'report':
+            # Rapport d'une sonde pas encore enregistrée compris: compté à son enregistrement
+            manager.save_report(franchise_id, make_report(rng))
+        else:
+            # Silence assez long pour que des heartbeats expirent
+            clock.advance(rng.choice([30, 120, manager.HEARTBEAT_TIMEOUT, manager.HEARTBEAT_TIMEOUT + 1, 900]))
+        
+        # Secondes entières: des heartbeats expirent pile à HEARTBEAT_TIMEOUT
+        clock.advance(rng.randint(0, 20))
+        assert_consistent(manager)
+        
+        statistics = manager.get_statistics()
+        connected = sum(
+            1 for probe in manager._probes.values()
+            if (clock.now() - datetime.fromisoformat(probe['last_seen'])).total_seconds()
+            <= manager.HEARTBEAT_TIMEOUT
+        )
+        assert statistics['connected_probes'] == connected
+        assert statistics['disconnected_probes'] == len(manager._probes) - connected
+    
+    # Au redémarrage, les agrégats reconstruits depuis le disque sont les mêmes
+    manager.ingestion.flush()
+    reloaded = nester_module.NesterManager(tmp_path / "data", storage_backend="json")
+    reloaded.logger.disabled = True
+    assert reloaded.get_statistics() == manager.get_statistics()
+    assert_consistent(reloaded)
+
+
+def test_status_timestamp_is_not_cached(nester_module, clock, tmp_path, monkeypatch):
+    manager = nester_module.NesterManager(tmp_path / "data", storage_backend="json")
+    manager.logger.disabled = True
+    monkeypatch.setattr(nester_module, 'nester', manager)
+    manager.register_probe("franchise_01", "Franchise 01")
+    client = nester_module.app.test_client()
+    
+    first = client.get('/api/status')
+    assert first.get_json()['timestamp'] == clock.now().isoformat()
+    
+    # Rien n'a changé entre-temps: le statut reste daté de la requête
+    clock.advance(30)
+    second = client.get('/api/status', headers={'If-None-Match': first.headers.get('ETag', '*')})
+    assert second.status_code == 200
+    assert second.get_json()['timestamp'] == clock.now().isoformat()
+    assert second.get_json()['statistics'] == first.get_json()['statistics']
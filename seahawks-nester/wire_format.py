@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Seahawks Nester - Format de transport des uploads des Harvesters
+Décodage des corps compressés (gzip, zstd) et MessagePack
+"""
+
+import json
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # Compression zstd optionnelle
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:  # Encodage MessagePack optionnel
+    msgpack = None
+
+
+JSON_TYPE = "application/json"
+MSGPACK_TYPE = "application/msgpack"
+
+# Taille maximale d'un corps une fois décompressé (protection contre les bombes)
+DEFAULT_MAX_PAYLOAD_BYTES = 256 * 1024 * 1024
+
+_READ_CHUNK = 1024 * 1024
+
+
+class UnsupportedPayload(ValueError):
+    """Content-Encoding ou Content-Type non pris en charge"""
+
+
+class PayloadTooLarge(ValueError):
+    """Corps décompressé au-delà de la taille autorisée"""
+
+
+def supported_encodings() -> list:
+    """Content-Encoding acceptés, du plus efficace au plus simple"""
+    encodings = ["gzip", "identity"]
+    if zstandard is not None:
+        encodings.insert(0, "zstd")
+    return encodings
+
+
+def supported_content_types() -> list:
+    """Content-Type acceptés, du plus compact au plus simple"""
+    content_types = [JSON_TYPE]
+    if msgpack is not None:
+        content_types.insert(0, MSGPACK_TYPE)
+    return content_types
+
+
+def capabilities(max_payload_bytes: int = DEFAULT_MAX_PAYLOAD_BYTES) -> dict:
+    """Formats annoncés aux Harvesters pour la négociation"""
+    return {
+        "content_encodings": supported_encodings(),
+        "content_types": supported_content_types(),
+        "max_payload_bytes": max_payload_bytes
+    }
+
+
+def decode_body(body: bytes, content_encoding: str = None, content_type: str = None,
+                max_size: int = DEFAULT_MAX_PAYLOAD_BYTES):
+    """
+    Décode le corps d'un upload
+    
+    Args:
+        body: Corps brut de la requête
+        content_encoding: En-tête Content-Encoding (éventuellement une liste)
+        content_type: Type MIME sans paramètres (JSON par défaut)
+        max_size: Taille maximale une fois décompressé
+    
+    Returns:
+        Objet décodé, ou None si le corps est vide ou invalide
+    
+    Raises:
+        UnsupportedPayload: encodage ou type non pris en charge
+        PayloadTooLarge: corps décompressé trop volumineux
+    """
+    # Les encodages sont listés dans l'ordre d'application: on les défait à l'envers
+    encodings = [e.strip().lower() for e in (content_encoding or "").split(',') if e.strip()]
+    for encoding in reversed(encodings):
+        body = _decompress(body, encoding, max_size)
+    
+    if len(body) > max_size:
+        raise PayloadTooLarge(f"Corps supérieur à {max_size} octets")
+    if not body:
+        return None
+    
+    content_type = (content_type or JSON_TYPE).lower()
+    try:
+        if content_type == MSGPACK_TYPE:
+            if msgpack is None:
+                raise UnsupportedPayload(f"Content-Type non pris en charge: {content_type}")
+            return msgpack.unpackb(body, raw=False)
+        if content_type == JSON_TYPE:
+            return json.loads(body)
+    except UnsupportedPayload:
+        raise
+    except Exception:
+        return None
+    
+    raise UnsupportedPayload(f"Content-Type non pris en charge: {content_type}")
+
+
+def _decompress(body: bytes, encoding: str, max_size: int) -> bytes:
+    """Défait un Content-Encoding en bornant la taille produite"""
+    if encoding == "identity":
+        return body
+    
+    if encoding in ("gzip", "x-gzip"):
+        # wbits=47: en-tête gzip ou zlib détecté automatiquement
+        decompressor = zlib.decompressobj(wbits=47)
+        try:
+            data = decompressor.decompress(body, max_size + 1)
+        except zlib.error:
+            return b""
+        if len(data) > max_size or decompressor.unconsumed_tail:
+            raise PayloadTooLarge(f"Corps supérieur à {max_size} octets")
+        return data
+    
+    if encoding == "zstd" and zstandard is not None:
+        reader = zstandard.ZstdDecompressor().stream_reader(body, read_across_frames=True)
+        chunks = []
+        size = 0
+        try:
+            while True:
+                chunk = reader.read(_READ_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise PayloadTooLarge(f"Corps supérieur à {max_size} octets")
+                chunks.append(chunk)
+        except zstandard.ZstdError:
+            return b""
+        return b"".join(chunks)
+    
+    raise UnsupportedPayload(f"Content-Encoding non pris en charge: {encoding}")